@@ -0,0 +1,94 @@
+"""
+Benchmark the time it takes to import clarify
+
+Each statement is run in a fresh interpreter, several times, and the median
+time spent importing modules, as measured by ``python -X importtime``, is
+reported along with the slowest modules it imported.  Modules imported at
+interpreter startup aren't counted.  For example:
+
+    python benchmarks/bench_import.py --repeat 20
+
+Python 3.7 or later is required for ``-X importtime``.
+
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+STATEMENTS = [
+    'import clarify',
+    'import clarify; clarify.Parser',
+    'import clarify; clarify.Jurisdiction',
+    'from clarify.parser import Parser',
+]
+"""Statements whose import time is measured"""
+
+
+def import_times(statement):
+    """
+    Run a statement in a fresh interpreter with ``-X importtime``
+
+    Returns:
+        List of ``(name, cumulative, top_level)`` tuples, one for each
+        imported module, with the cumulative import time in microseconds.
+
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.STDOUT, env=env, cwd=ROOT).decode('utf-8')
+
+    times = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level
+        times.append((name.strip(), int(cumulative), not name[1:].startswith(' ')))
+    return times
+
+
+def measure(statement, startup):
+    """
+    Measure the time a statement spends importing modules
+
+    Args:
+        statement: Python statement
+        startup: Set of the names of modules imported at interpreter
+            startup, which are excluded
+
+    Returns:
+        Tuple of the total import time in microseconds and a list of
+        ``(name, cumulative)`` tuples for the top-level imports.
+
+    """
+    modules = [(name, cumulative) for name, cumulative, top_level in import_times(statement)
+               if top_level and name not in startup]
+    return sum(cumulative for _name, cumulative in modules), modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10,
+        help="Number of interpreters to run for each statement")
+    parser.add_argument('--top', type=int, default=5,
+        help="Number of the slowest modules to list")
+    parser.add_argument('statements', nargs='*', default=STATEMENTS)
+    args = parser.parse_args(argv)
+
+    startup = set(name for name, _cumulative, _top_level in import_times('pass'))
+    for statement in args.statements:
+        runs = sorted((measure(statement, startup) for _i in range(args.repeat)),
+                      key=lambda run: run[0])
+        total, modules = runs[len(runs) // 2]
+        print('{:<45}{:>8.1f} ms'.format(statement, total / 1000.0))
+        slowest = sorted(modules, key=lambda module: module[1], reverse=True)
+        for name, cumulative in slowest[:args.top]:
+            print('    {:<41}{:>8.1f} ms'.format(name, cumulative / 1000.0))
+
+
+if __name__ == '__main__':
+    main()
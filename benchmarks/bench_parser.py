@@ -0,0 +1,220 @@
+"""
+Benchmark parsing a synthetic detail XML report
+
+For each parsing mode, this measures parse time and throughput, how much
+the peak resident set size of the process grew while parsing, the peak
+memory allocated by Python while parsing, as traced by ``tracemalloc``, and
+the number of objects tracked by the garbage collector that the parsed
+results keep alive.  For example, to benchmark a statewide precinct-level
+file:
+
+    python benchmarks/bench_parser.py --contests 60 --choices 4 --jurisdictions 3000
+
+``tracemalloc`` doesn't see memory allocated by libxml2, such as the XML
+tree, so the growth of the resident set size is the measure to watch for
+memory regressions.  Memory is measured in a fresh process for each mode, so
+modes don't inherit each other's high-water mark, and time is measured in
+separate runs, because tracing allocations slows parsing down.
+
+"""
+import argparse
+import concurrent.futures
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from clarify.parser import Parser  # noqa: E402
+
+from synthetic import add_report_arguments, make_report, report_options  # noqa: E402
+
+
+def _parse(**options):
+    def run(xml):
+        parser = Parser(**options)
+        parser.parse(xml)
+        # Build the results of every contest, so lazy parsing is comparable
+        return parser, len(parser.results)
+    return run
+
+
+def _iter_results(**options):
+    def run(xml):
+        parser = Parser(**options)
+        count = 0
+        for _record in parser.iter_results(xml):
+            count += 1
+        return parser, count
+    return run
+
+
+def _parse_table(**options):
+    def run(xml):
+        table = Parser(**options).parse_table(xml)
+        return table, len(table)
+    return run
+
+
+MODES = {
+    'tree': _parse(),
+    'stream': _parse(stream=True),
+    'lean': _parse(lean=True),
+    'lazy': _parse(lazy=True),
+    'fast': _parse(backend='fast'),
+    'fast_lean': _parse(lean=True, backend='fast'),
+    'iter_results': _iter_results(),
+    'iter_results_fast': _iter_results(backend='fast'),
+    'parse_table': _parse_table(),
+    'parse_table_fast': _parse_table(backend='fast'),
+}
+"""Functions that parse a report in each mode, returning what they parsed and the number of results"""
+
+
+def benchmark(mode, xml, path, repeat=3):
+    """
+    Benchmark one way of parsing a report
+
+    Args:
+        mode: Name of the parsing mode, one of the keys of ``MODES``
+        xml: Bytes of the report
+        path: Path of a file containing the report, which is read by the
+            process that measures memory
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary of measurements: the number of ``results``, the best
+        ``seconds`` of the timed runs, and the measurements returned by
+        ``measure_memory()``.
+
+    """
+    run = MODES[mode]
+    timings = []
+    for _i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        parsed, num_results = run(xml)
+        timings.append(time.perf_counter() - start)
+        del parsed
+
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        stats = executor.submit(measure_memory, mode, path).result()
+
+    stats.update(results=num_results, seconds=min(timings))
+    return stats
+
+
+def measure_memory(mode, path):
+    """
+    Measure the memory used to parse a report, in the current process
+
+    This should be called in a fresh process, since the resident set size
+    is only measured by its high-water mark.  The report is read from a file
+    rather than passed from the parent process, because unpickling it would
+    briefly hold two copies, raising the high-water mark before parsing
+    starts.
+
+    Returns:
+        Dictionary of measurements: ``peak_rss_bytes``, how much the peak
+        resident set size grew while parsing, or None if it can't be
+        measured, ``peak_bytes`` allocated by Python while parsing and the
+        number of ``objects`` kept alive by the results.
+
+    """
+    # dateutil warns about the timezone abbreviations in report timestamps
+    warnings.filterwarnings('ignore', message='tzname')
+
+    run = MODES[mode]
+    with open(path, 'rb') as f:
+        xml = f.read()
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    rss_before = _max_rss()
+    tracemalloc.start()
+    try:
+        parsed, _num_results = run(xml)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss_after = _max_rss()
+    gc.collect()
+    objects = len(gc.get_objects()) - objects_before
+    del parsed
+
+    return {
+        'peak_rss_bytes': rss_after - rss_before if rss_before is not None else None,
+        'peak_bytes': peak,
+        'objects': objects,
+    }
+
+
+def _max_rss():
+    """Return the peak resident set size of this process in bytes, or None"""
+    # On Linux, ru_maxrss is carried over from the parent process when a
+    # process is started, so read the high-water mark of this process's own
+    # memory instead
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_report_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=3,
+        help="Number of timed runs of each mode")
+    parser.add_argument('--mode', action='append', choices=sorted(MODES),
+        help="Parsing mode to benchmark.  Can be repeated.  Defaults to all modes.")
+    args = parser.parse_args(argv)
+
+    # dateutil warns about the timezone abbreviations in report timestamps
+    warnings.filterwarnings('ignore', message='tzname')
+
+    xml, num_results = make_report(**report_options(args))
+    print('{} layout, {:,} results, {:.1f} MB'.format(args.layout, num_results,
+                                                      len(xml) / 1e6))
+    print('{:<18}{:>10}{:>14}{:>10}{:>14}{:>14}{:>12}'.format(
+        'mode', 'seconds', 'results/s', 'MB/s', 'peak RSS MB', 'peak py MB', 'objects'))
+
+    with tempfile.NamedTemporaryFile(suffix='.xml', delete=False) as f:
+        f.write(xml)
+    try:
+        for mode in args.mode or sorted(MODES):
+            stats = benchmark(mode, xml, f.name, args.repeat)
+            if stats['results'] != num_results:
+                raise AssertionError("{} parsed {} results, expected {}".format(
+                    mode, stats['results'], num_results))
+            peak_rss = stats['peak_rss_bytes']
+            print('{:<18}{:>10.3f}{:>14,.0f}{:>10.1f}{:>14}{:>14.1f}{:>12,}'.format(
+                mode, stats['seconds'], num_results / stats['seconds'],
+                len(xml) / 1e6 / stats['seconds'],
+                '{:.1f}'.format(peak_rss / 1e6) if peak_rss is not None else 'n/a',
+                stats['peak_bytes'] / 1e6, stats['objects']))
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Generate synthetic Clarity detail XML reports for benchmarking
+
+Reports can use either of the layouts that ``clarify.Parser`` handles:
+"precinct", the layout of county reports, which list precincts under
+``VoterTurnout/Precincts``, or "county", the layout of state reports, which
+list counties under ``ElectionVoterTurnout/Counties``.
+
+Run this module as a script to write a report to a file:
+
+    python benchmarks/synthetic.py --layout precinct --jurisdictions 3000 detail.xml
+
+"""
+import argparse
+import io
+import random
+import sys
+
+DEFAULT_VOTE_TYPES = ('Election Day', 'Early Vote', 'Absentee', 'Provisional')
+
+# Sub-jurisdiction element name, and the elements the turnout is listed under,
+# for each layout
+LAYOUTS = {
+    'precinct': ('Precinct', 'VoterTurnout', 'Precincts'),
+    'county': ('County', 'ElectionVoterTurnout', 'Counties'),
+}
+
+
+def write_report(f, layout='precinct', contests=10, choices=4, jurisdictions=100,
+        vote_types=DEFAULT_VOTE_TYPES, seed=0):
+    """
+    Write a synthetic detail XML report
+
+    Args:
+        f: Text file-like object to write the report to
+        layout: "precinct" or "county".  See the module docstring.
+        contests: Number of contests
+        choices: Number of choices in each contest
+        jurisdictions: Number of precincts or counties
+        vote_types: Names of the vote types of each choice's results
+        seed: Seed for the random vote counts, so reports are reproducible
+
+    Returns:
+        The number of results in the report, which is the number of
+        ``Result`` objects ``Parser`` creates when parsing it.
+
+    """
+    element, turnout_element, turnout_list = LAYOUTS[layout]
+    rng = random.Random(seed)
+    names = ['{} {:05d}'.format(element, i) for i in range(jurisdictions)]
+    num_results = 0
+
+    write = f.write
+    write(u'<?xml version="1.0"?>\n<ElectionResult>\n')
+    write(u'    <Timestamp>11/4/2014 11:59:00 PM CST</Timestamp>\n')
+    write(u'    <ElectionName>Synthetic General Election</ElectionName>\n')
+    write(u'    <ElectionDate>11/4/2014</ElectionDate>\n')
+    write(u'    <Region>Synthetic</Region>\n')
+
+    total_voters = 1000 * jurisdictions
+    write(u'    <{} totalVoters="{}" ballotsCast="{}" voterTurnout="50.00">\n'.format(
+        turnout_element, total_voters, total_voters // 2))
+    write(u'        <{}>\n'.format(turnout_list))
+    for name in names:
+        if layout == 'precinct':
+            write(u'            <Precinct name="{}" totalVoters="1000" ballotsCast="500" '
+                  u'voterTurnout="50.00" percentReporting="4" />\n'.format(name))
+        else:
+            write(u'            <County name="{}" totalVoters="1000" ballotsCast="500" '
+                  u'voterTurnout="50.00" precinctsParticipating="10" precinctsReported="10" '
+                  u'precinctsReportingPercent="100.00" />\n'.format(name))
+    write(u'        </{}>\n'.format(turnout_list))
+    write(u'    </{}>\n'.format(turnout_element))
+
+    for contest in range(contests):
+        if layout == 'precinct':
+            write(u'    <Contest key="{0}" text="Contest {0}" voteFor="1" isQuestion="false" '
+                  u'precinctsReporting="{1}" precinctsReported="{1}">\n'.format(
+                      contest, jurisdictions))
+            for vote_type in ('Undervotes', 'Overvotes'):
+                num_results += _write_vote_type(write, rng, element, names,
+                                                vote_type, '        ')[0]
+        else:
+            write(u'    <Contest key="{0}" text="Contest {0}" voteFor="1" isQuestion="false" '
+                  u'countiesParticipating="{1}" countiesReported="{1}" '
+                  u'precinctsParticipating="{2}" precinctsReported="{2}" '
+                  u'precinctsReportingPercent="100.00">\n'.format(
+                      contest, jurisdictions, 10 * jurisdictions))
+            write(u'        <ParticipatingCounties>\n')
+            for name in names:
+                write(u'            <County name="{}" precinctsParticipating="10" '
+                      u'precinctsReported="10" precinctsReportingPercent="100.00" />\n'.format(name))
+            write(u'        </ParticipatingCounties>\n')
+
+        for choice in range(choices):
+            # Total votes are written after the vote types are generated, so
+            # buffer the choice's vote types.
+            buf = io.StringIO()
+            votes = 0
+            for vote_type in vote_types:
+                n, vote_type_votes = _write_vote_type(buf.write, rng, element, names,
+                                                      vote_type, '            ')
+                num_results += n
+                votes += vote_type_votes
+            write(u'        <Choice key="{0}" text="Candidate {1}-{0}" party="P{0}" '
+                  u'totalVotes="{2}">\n'.format(choice, contest, votes))
+            write(buf.getvalue())
+            write(u'        </Choice>\n')
+
+        write(u'    </Contest>\n')
+
+    write(u'</ElectionResult>\n')
+    return num_results
+
+
+def make_report(**kwargs):
+    """
+    Generate a synthetic detail XML report in memory
+
+    Args:
+        **kwargs: Options for the report.  See ``write_report()``.
+
+    Returns:
+        Tuple of the report as UTF-8 encoded ``bytes`` and the number of
+        results in it.
+
+    """
+    f = io.StringIO()
+    num_results = write_report(f, **kwargs)
+    return f.getvalue().encode('utf-8'), num_results
+
+
+def _write_vote_type(write, rng, element, names, vote_type, indent):
+    """
+    Write a ``VoteType`` element with a random vote count per jurisdiction
+
+    Returns:
+        Tuple of the number of results written, including the vote type's
+        total, and the total votes.
+
+    """
+    votes = [rng.randint(0, 500) for _name in names]
+    write(u'{}<VoteType name="{}" votes="{}">\n'.format(indent, vote_type, sum(votes)))
+    for name, v in zip(names, votes):
+        write(u'{}    <{} name="{}" votes="{}" />\n'.format(indent, element, name, v))
+    write(u'{}</VoteType>\n'.format(indent))
+    return len(names) + 1, sum(votes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_report_arguments(parser)
+    parser.add_argument('output', nargs='?', help="Output filename.  Defaults to stdout.")
+    args = parser.parse_args(argv)
+
+    options = report_options(args)
+    if args.output:
+        with io.open(args.output, 'w', encoding='utf-8') as f:
+            num_results = write_report(f, **options)
+    else:
+        num_results = write_report(sys.stdout, **options)
+    sys.stderr.write('{} results\n'.format(num_results))
+
+
+def add_report_arguments(parser):
+    """Add command line arguments for the shape of a report"""
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='precinct')
+    parser.add_argument('--contests', type=int, default=10)
+    parser.add_argument('--choices', type=int, default=4,
+        help="Choices per contest")
+    parser.add_argument('--jurisdictions', type=int, default=100,
+        help="Number of precincts or counties")
+    parser.add_argument('--vote-types', type=int, default=len(DEFAULT_VOTE_TYPES),
+        help="Vote types per choice")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def report_options(args):
+    """Get keyword arguments for ``write_report()`` from parsed arguments"""
+    vote_types = list(DEFAULT_VOTE_TYPES[:args.vote_types])
+    vote_types.extend('Vote Type {}'.format(i)
+                      for i in range(len(vote_types), args.vote_types))
+    return dict(layout=args.layout, contests=args.contests, choices=args.choices,
+                jurisdictions=args.jurisdictions, vote_types=vote_types,
+                seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
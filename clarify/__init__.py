@@ -1,3 +1,33 @@
+import sys
+
 from .version import __version__
-from .jurisdiction import Jurisdiction
-from .parser import Parser
+
+__all__ = ['__version__', 'Jurisdiction', 'Parser']
+
+# Modules that define the public attributes of the package.  These are only
+# imported when an attribute is first accessed, so that ``import clarify``
+# doesn't pay for importing requests and its dependencies in a process that
+# only parses local files, or vice versa.
+_LAZY_ATTRIBUTES = {
+    'Jurisdiction': 'clarify.jurisdiction',
+    'Parser': 'clarify.parser',
+}
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        module_name = _LAZY_ATTRIBUTES.get(name)
+        if module_name is None:
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+        import importlib
+        value = getattr(importlib.import_module(module_name), name)
+        # Cache the attribute, so this isn't called again
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+else:
+    # Module ``__getattr__`` isn't supported (PEP 562)
+    from .jurisdiction import Jurisdiction
+    from .parser import Parser
@@ -0,0 +1,364 @@
+"""
+Vectorized rollups of election results
+
+The functions in this module compute group-by sums, vote shares, top-N
+choices and margins from a ``clarify.table.ResultTable`` using NumPy array
+operations, rather than a Python loop over ``Result`` objects:
+
+    >>> table = clarify.Parser().parse_table("path/to/detail.xml")
+    >>> by_party = rollup(table, ('contest', 'party'))
+    >>> by_party.to_dict()
+
+Results are grouped by any combination of the columns in ``COLUMNS``.  A
+results file contains both totals for the whole jurisdiction of the report
+and results for each sub-jurisdiction, so to avoid counting votes twice,
+rollups by ``jurisdiction`` use the sub-jurisdiction results and all other
+rollups use the jurisdiction-wide totals.
+
+This requires NumPy to be installed.
+
+"""
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import six
+
+from clarify.table import combined_key
+
+COLUMNS = ('contest', 'choice', 'party', 'jurisdiction', 'vote_type')
+"""Names of the columns results can be grouped by"""
+
+DENSE_KEYS = 1 << 20
+"""
+Rollups with at most this many possible groups, beyond twice the number of
+results, are computed by counting rather than sorting
+"""
+
+Margins = namedtuple('Margins', ['keys', 'winner', 'runner_up', 'margin', 'total'])
+"""
+The leading choices in each group of results, as returned by ``margins()``.
+
+``keys`` is an ordered dictionary mapping each grouping column to an array
+of codes, one per group.  ``winner`` and ``runner_up`` are arrays of choice
+codes, with -1 for groups with only one choice.  ``margin`` is the
+difference between the votes of the winner and the runner-up and ``total``
+is the votes for all choices in the group.
+"""
+
+
+class Rollup(object):
+    """
+    Votes summed over groups of results
+
+    Attributes:
+        table: The ``ResultTable`` that was rolled up
+        by: Tuple of the names of the columns results were grouped by
+        keys: Ordered dictionary mapping each name in ``by`` to an array of
+            codes, one per group.  Codes for ``party`` index into
+            ``parties``.  Other codes are the codes used by ``table``, with
+            -1 for results not associated with a choice.
+        votes: Array of the total votes in each group
+        parties: List of party names, in order of first appearance in the
+            table's choices.  Choices without a party have the party None.
+
+    Groups are sorted by their codes, in the order of ``by``.
+
+    """
+    def __init__(self, table, by, keys, votes, parties, sorted_by=()):
+        self.table = table
+        self.by = by
+        self.keys = keys
+        self.votes = votes
+        self.parties = parties
+        # Columns that the groups are sorted by, in order
+        self._sorted_by = sorted_by
+
+    def __len__(self):
+        return len(self.votes)
+
+    def labels(self, column):
+        """
+        Get the label of each group for one of the grouping columns
+
+        Args:
+            column: Name of a column in ``by``
+
+        Returns:
+            List with one label per group: contest or choice text,
+            jurisdiction name, vote type name or party name.  Labels for a
+            code of -1 are None.
+
+        """
+        labels = _labels(self.table, self.parties, column)
+        return [labels[code] if code >= 0 else None for code in self.keys[column].tolist()]
+
+    def to_dict(self):
+        """
+        Return an ordered dictionary mapping tuples of group labels to votes
+
+        When grouping by a single column, the keys are the labels
+        themselves rather than tuples.
+
+        """
+        labels = [self.labels(column) for column in self.by]
+        if len(labels) == 1:
+            keys = labels[0]
+        else:
+            keys = zip(*labels)
+        return OrderedDict(zip(keys, self.votes.tolist()))
+
+    def shares(self, within=None):
+        """
+        Get each group's share of the votes of a larger group
+
+        Args:
+            within: Iterable of the columns of the larger groups, which must
+                be in ``by``.  Defaults to all but the last of ``by``, so
+                the shares of ``rollup(table, ('contest', 'choice'))`` are
+                each choice's share of its contest.
+
+        Returns:
+            Array of floats between 0 and 1, one per group.  Groups in a
+            larger group with no votes have a share of 0.
+
+        """
+        ids, num_groups = self._group_ids(self._within(within))
+        totals = np.bincount(ids, weights=self.votes, minlength=num_groups)
+        denominator = totals[ids]
+        shares = np.zeros(len(self.votes), dtype=np.float64)
+        np.divide(self.votes, denominator, out=shares, where=denominator > 0)
+        return shares
+
+    def top(self, n, within=None):
+        """
+        Get the groups with the most votes within each larger group
+
+        Args:
+            n: Maximum number of groups to keep in each larger group
+            within: Iterable of the columns of the larger groups.  See
+                ``shares()``.
+
+        Returns:
+            A new ``Rollup``, sorted by larger group and then by votes in
+            descending order.  Ties keep their original order.
+
+        """
+        within = self._within(within)
+        ids, num_groups = self._group_ids(within)
+        max_votes = int(self.votes.max()) if len(self.votes) else 0
+        if num_groups * (max_votes + 1) < 1 << 62:
+            # Sort by group and then votes, descending, in a single pass
+            order = np.argsort(ids * (max_votes + 1) + (max_votes - self.votes),
+                kind='stable')
+        else:
+            order = np.lexsort((-self.votes, ids))
+        starts = _group_starts(ids[order])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return self._take(order[rank < n], within)
+
+    def _take(self, rows, sorted_by):
+        keys = OrderedDict((column, codes[rows]) for column, codes in self.keys.items())
+        return Rollup(self.table, self.by, keys, self.votes[rows], self.parties,
+            sorted_by)
+
+    def _within(self, within):
+        if within is None:
+            return self.by[:-1]
+
+        within = _columns(within)
+        for column in within:
+            if column not in self.by:
+                raise ValueError("{} isn't one of the grouping columns".format(column))
+        return within
+
+    def _group_ids(self, within):
+        """
+        Number the larger groups that the groups belong to
+
+        Args:
+            within: Tuple of the columns of the larger groups
+
+        Returns:
+            Tuple of an array containing the number of each group's larger
+            group, and the number of larger groups.  Larger groups are
+            numbered in the order of their codes.
+
+        """
+        if not within:
+            return np.zeros(len(self.votes), dtype=np.intp), 1
+
+        if tuple(within) == tuple(self._sorted_by[:len(within)]):
+            # The larger groups are already contiguous, so just number runs
+            changed = np.zeros(len(self.votes), dtype=bool)
+            for column in within:
+                codes = self.keys[column]
+                changed[1:] |= codes[1:] != codes[:-1]
+            ids = np.cumsum(changed)
+            return ids, int(ids[-1]) + 1 if len(ids) else 0
+
+        key, _sizes = combined_key([self.keys[column] for column in within])
+        groups, ids = np.unique(key, return_inverse=True)
+        return ids.reshape(-1), len(groups)
+
+
+def rollup(table, by, include_no_choice=False):
+    """
+    Sum votes by groups of results
+
+    Args:
+        table: A ``ResultTable``
+        by: Name of the column to group results by, or an iterable of names.
+            See ``COLUMNS``.
+        include_no_choice: If True, include results not associated with a
+            choice, such as overvotes and undervotes.  They are grouped under
+            a choice code of -1 and a party of None.
+
+    Returns:
+        A ``Rollup`` object.
+
+    Raises:
+        ValueError: If ``by`` contains an unknown column.
+
+    """
+    by = _columns(by)
+    for column in by:
+        if column not in COLUMNS:
+            raise ValueError("Unknown column {}".format(column))
+
+    if 'jurisdiction' in by:
+        mask = table.jurisdiction >= 0
+    else:
+        mask = table.jurisdiction < 0
+    if not include_no_choice:
+        mask &= table.choice >= 0
+
+    parties, choice_party = _parties(table)
+    codes = []
+    for column in by:
+        if column == 'party':
+            choice = table.choice[mask]
+            # Results without a choice have no party
+            party = np.full(len(choice), -1, dtype=np.int32)
+            has_choice = choice >= 0
+            party[has_choice] = choice_party[choice[has_choice]]
+            codes.append(party)
+        else:
+            codes.append(getattr(table, column)[mask])
+
+    votes = table.votes[mask]
+    if not by:
+        keys = OrderedDict()
+        return Rollup(table, by, keys, np.array([votes.sum()], dtype=votes.dtype), parties)
+
+    key, sizes = combined_key(codes)
+    num_keys = int(np.prod(sizes))
+    if num_keys <= 2 * len(key) + DENSE_KEYS:
+        # Few enough possible groups to count them all in linear time.
+        # Float sums of integer vote counts are exact up to 2 ** 53.
+        group_key = np.flatnonzero(np.bincount(key, minlength=num_keys))
+        totals = np.bincount(key, weights=votes, minlength=num_keys)[group_key]
+        totals = totals.astype(votes.dtype)
+    else:
+        order = np.argsort(key)
+        key = key[order]
+        starts = _group_starts(key)
+        group_key = key[starts]
+        if len(votes):
+            totals = np.add.reduceat(votes[order], starts)
+        else:
+            totals = np.zeros(0, dtype=votes.dtype)
+
+    group_codes = []
+    for size in reversed(sizes):
+        group_key, code = np.divmod(group_key, size)
+        group_codes.append((code - 1).astype(np.int32))
+    keys = OrderedDict(zip(by, reversed(group_codes)))
+    return Rollup(table, by, keys, totals, parties, by)
+
+
+def margins(table, by='contest'):
+    """
+    Find the leading two choices, and the margin between them, in each group
+
+    Args:
+        table: A ``ResultTable``
+        by: Name of the column to group results by, or an iterable of names,
+            not including ``choice``.  For example, ``('contest',
+            'jurisdiction')`` finds the margin in each contest in each
+            sub-jurisdiction.
+
+    Returns:
+        A ``Margins`` object.
+
+    """
+    by = _columns(by)
+    if 'choice' in by or 'party' in by:
+        raise ValueError("Margins are between choices, so can't be grouped by choice or party")
+
+    votes = rollup(table, by + ('choice',))
+    if len(votes) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return Margins(OrderedDict((column, empty) for column in by),
+                       empty, empty, empty, empty)
+
+    ids, num_groups = votes._group_ids(by)
+    totals = np.bincount(ids, weights=votes.votes, minlength=num_groups).astype(np.int64)
+
+    leading = votes.top(2, within=by)
+    ids, _num_groups = leading._group_ids(by)
+    first = _group_starts(ids)
+    second = first + 1
+    has_second = np.zeros(len(first), dtype=bool)
+    in_range = second < len(ids)
+    has_second[in_range] = ids[second[in_range]] == ids[first[in_range]]
+    second = np.where(has_second, second, first)
+
+    choice = leading.keys['choice']
+    runner_up_votes = np.where(has_second, leading.votes[second], 0)
+    return Margins(
+        OrderedDict((column, leading.keys[column][first]) for column in by),
+        choice[first],
+        np.where(has_second, choice[second], -1),
+        leading.votes[first] - runner_up_votes,
+        totals,
+    )
+
+
+def _columns(by):
+    if isinstance(by, six.string_types):
+        return (by,)
+    return tuple(by)
+
+
+def _group_starts(sorted_key):
+    """Return the index of the first element of each run of equal values"""
+    if len(sorted_key) == 0:
+        return np.zeros(0, dtype=np.intp)
+    return np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+
+
+def _parties(table):
+    """
+    Number the parties of a table's choices
+
+    Returns:
+        Tuple of a list of party names and an array with the party code of
+        each choice.
+
+    """
+    parties = []
+    codes = {}
+    choice_party = np.zeros(len(table.choices), dtype=np.int32)
+    for i, choice in enumerate(table.choices):
+        code = codes.get(choice.party)
+        if code is None:
+            code = codes[choice.party] = len(parties)
+            parties.append(choice.party)
+        choice_party[i] = code
+    return parties, choice_party
+
+
+def _labels(table, parties, column):
+    if column == 'party':
+        return parties
+    return table.labels(column)
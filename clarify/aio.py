@@ -0,0 +1,189 @@
+"""
+Discover Clarity results with asyncio
+
+``AsyncJurisdiction`` is a counterpart to ``Jurisdiction`` whose methods
+that make requests are coroutines.  Requests are made with an
+``aiohttp.ClientSession``, so tracking many elections from one process
+costs a coroutine per request in flight rather than a thread, and every
+jurisdiction shares the session's connection pool:
+
+    >>> async def main():
+    ...     async with make_client_session(pool_size=50) as session:
+    ...         j = AsyncJurisdiction(url, 'state', session=session)
+    ...         counties = await j.get_subjurisdictions()
+    ...         return await asyncio.gather(*(c.report_url('xml') for c in counties))
+    >>> asyncio.run(main())
+
+Requests beyond the pool size wait for a connection rather than opening a
+new one.  Unlike ``clarify.session``, failed requests aren't retried.
+
+This requires aiohttp and Python 3.6 or later.
+
+"""
+import asyncio
+
+import aiohttp
+
+from clarify.jurisdiction import (_JurisdictionBase, _UNRESOLVED,
+    HEAD_NOT_SUPPORTED_STATUSES)
+from clarify.session import DEFAULT_TIMEOUT
+
+DEFAULT_POOL_SIZE = 100
+"""Default maximum number of connections kept open by a client session"""
+
+
+def make_client_session(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+    """
+    Create a session for asynchronous requests to Clarity results sites
+
+    This must be called while an event loop is running, and the session
+    should be closed when it's no longer needed, for example by using it
+    with ``async with``.
+
+    Args:
+        pool_size: Maximum number of connections open at once.  Requests
+            beyond this wait for a connection to be free.
+        timeout: Timeout in seconds for connecting and for each read,
+            either a number or a tuple of connect and read timeouts, as in
+            ``clarify.session.make_session()``.  None to wait forever.
+
+    Returns:
+        An ``aiohttp.ClientSession`` object.
+
+    """
+    if isinstance(timeout, tuple):
+        connect_timeout, read_timeout = timeout
+    else:
+        connect_timeout = read_timeout = timeout
+
+    connector = aiohttp.TCPConnector(limit=pool_size)
+    client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout,
+        sock_read=read_timeout)
+    return aiohttp.ClientSession(connector=connector, timeout=client_timeout)
+
+
+class AsyncJurisdiction(_JurisdictionBase):
+
+    """
+    A state, county or city that has a Clarity election results page, whose
+    methods that make requests are coroutines
+
+    See ``Jurisdiction`` for the meaning of each method.
+    """
+
+    def __init__(self, url, level, name='', session=None):
+        """
+        Args:
+            url: Clarity results URL of the jurisdiction
+            level: Level of the jurisdiction in lowercase, "state",
+                "county" or "city"
+            name: Name of the jurisdiction
+            session: ``aiohttp.ClientSession`` used to make requests, which
+                is also used by the jurisdiction's sub-jurisdictions.  See
+                ``make_client_session()``.
+
+        Raises:
+            ValueError: If ``session`` isn't specified.
+
+        """
+        if session is None:
+            raise ValueError("An aiohttp.ClientSession is required")
+
+        super(AsyncJurisdiction, self).__init__(url, level, name)
+        self.session = session
+
+    @classmethod
+    async def get_current_ver(cls, election_url, session):
+        async with session.get(cls._current_ver_url(election_url)) as r:
+            if not r.ok:
+                return None
+            return await r.text()
+
+    @classmethod
+    async def get_latest_summary_url(cls, election_url, session):
+        current_ver = await cls.get_current_ver(election_url, session)
+
+        # If we don't have current_ver, we can't determine a summary URL.
+        if current_ver is None:
+            return None
+
+        for latest_summary_url in cls._latest_summary_url_candidates(election_url, current_ver):
+            async with session.get(latest_summary_url) as r:
+                if r.ok:
+                    return latest_summary_url
+
+        # If none of the expected paths succeed, return None.
+        return None
+
+    async def get_subjurisdictions(self):
+        """
+        Returns a list of subjurisdictions depending on the level
+        of the main jurisdiction.
+
+        The pages of all the sub-jurisdictions are requested concurrently.
+        """
+        subjurisdictions_url = self._get_subjurisdictions_url()
+        if not subjurisdictions_url:
+            async with self.session.get(self._electionsettings_url()) as r:
+                if not r.ok:
+                    return []
+                # The settings aren't always served as application/json
+                settings = await r.json(content_type=None)
+
+            counties = settings['settings']['electiondetails']['participatingcounties']
+            return [AsyncJurisdiction(url, 'county', name, session=self.session)
+                    for url, name in self._subjurisdiction_urls_from_json(counties)]
+
+        async with self.session.get(subjurisdictions_url) as r:
+            if not r.ok:
+                return []
+            html = await r.text()
+
+        paths = self._scrape_subjurisdiction_paths(html)
+        urls = await asyncio.gather(*(self._get_subjurisdiction_url(path)
+                                      for path, _name in paths))
+        return [AsyncJurisdiction(url, 'county', name, session=self.session)
+                for url, (_path, name) in zip(urls, paths)]
+
+    async def get_summary_url(self):
+        """
+        Returns the summary report URL, or None if the jurisdiction has none.
+
+        The URL is looked up the first time this is called, and then cached.
+        """
+        if self._summary_url is _UNRESOLVED:
+            url = self._reports_url() + "/summary.zip"
+            self._summary_url = url if await self._report_exists(url) else None
+        return self._summary_url
+
+    async def report_url(self, fmt):
+        """
+        Returns link to detailed report depending on format. Formats are xls, txt and xml.
+
+        Returns None if the report doesn't exist.  The report isn't
+        downloaded.
+        """
+        url = self._reports_url() + "/detail{}.zip".format(fmt)
+        if await self._report_exists(url):
+            return url
+        else:
+            return None
+
+    async def _get_subjurisdiction_url(self, path):
+        async with self.session.get(self._subjurisdiction_page_url(path)) as r:
+            html = await r.text()
+            return self._subjurisdiction_summary_url(str(r.url), html)
+
+    async def _report_exists(self, url):
+        """
+        Checks whether a report exists without downloading it, as in
+        ``Jurisdiction._report_exists()``.
+        """
+        async with self.session.head(url, allow_redirects=True) as r:
+            if r.status not in HEAD_NOT_SUPPORTED_STATUSES:
+                return r.status == 200
+
+        # Servers that ignore the range send the whole report, which isn't
+        # read
+        async with self.session.get(url, headers={'Range': 'bytes=0-0'}) as r:
+            return r.status in (200, 206)
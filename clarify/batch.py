@@ -0,0 +1,118 @@
+"""
+Parse many results files in parallel
+
+A statewide crawl downloads one results file per county.  ``parse_many``
+parses them in a pool of worker processes.  Each worker parses its file into
+a ``clarify.table.ResultTable``, so only a handful of compact arrays, rather
+than a graph of ``Contest``, ``Choice`` and ``Result`` objects, has to be
+passed back to the parent process.
+
+This requires NumPy to be installed.
+
+"""
+from collections import OrderedDict, namedtuple
+import concurrent.futures
+
+import six
+
+from clarify.parser import Parser
+
+
+ParsedReport = namedtuple('ParsedReport', ['source', 'region', 'timestamp',
+    'election_name', 'table'])
+"""A single parsed results file"""
+
+MergedResults = namedtuple('MergedResults', ['reports', 'totals'])
+"""
+Results parsed by ``parse_many``.
+
+``reports`` is an ordered dictionary mapping each file's region, usually the
+county name, to a ``ParsedReport``.  ``totals`` is an ordered dictionary
+mapping contest text to an ordered dictionary mapping choice text to the
+choice's total votes summed across all the files.
+"""
+
+
+def parse_many(sources, workers=None):
+    """
+    Parse many results files in parallel
+
+    Args:
+        sources: Iterable of filenames, or other values that can be passed to
+            ``Parser.parse`` and pickled, such as ``bytes``.  Each should be
+            a results file for a different region, such as a county.
+        workers: Maximum number of worker processes.  Defaults to the number
+            of processors on the machine.  If 1, files are parsed in the
+            calling process.
+
+    Returns:
+        A ``MergedResults`` object.
+
+    Raises:
+        ValueError: If more than one file has results for the same region.
+
+    """
+    sources = list(sources)
+    if workers == 1:
+        reports = [parse_report(source) for source in sources]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            reports = list(executor.map(parse_report, sources))
+
+    return merge_reports(reports)
+
+
+def parse_report(source):
+    """
+    Parse a single results file into a ``ParsedReport``
+
+    Args:
+        source: Filename or other value that can be passed to
+            ``Parser.parse``.
+
+    Returns:
+        A ``ParsedReport`` object.
+
+    """
+    parser = Parser()
+    table = parser.parse_table(source)
+    return ParsedReport(
+        source=source if isinstance(source, six.string_types) else None,
+        region=parser.region,
+        timestamp=parser.timestamp,
+        election_name=parser.election_name,
+        table=table,
+    )
+
+
+def merge_reports(reports):
+    """
+    Combine parsed results files and total their votes
+
+    Contests and choices are matched across files by their text, because
+    each jurisdiction numbers its contests and choices independently.
+
+    Args:
+        reports: Iterable of ``ParsedReport`` objects
+
+    Returns:
+        A ``MergedResults`` object.
+
+    Raises:
+        ValueError: If more than one report has results for the same region.
+
+    """
+    merged = OrderedDict()
+    totals = OrderedDict()
+    for report in reports:
+        if report.region in merged:
+            raise ValueError("More than one file has results for {}".format(report.region))
+        merged[report.region] = report
+
+        table = report.table
+        for choice in table.choices:
+            contest_totals = totals.setdefault(table.contests[choice.contest].text,
+                OrderedDict())
+            contest_totals[choice.text] = contest_totals.get(choice.text, 0) + choice.total_votes
+
+    return MergedResults(merged, totals)
@@ -0,0 +1,204 @@
+"""
+Persistent on-disk cache of parsed results files
+
+The same results file is often parsed many times, for example when workers
+restart, during backfills, or when successive versions of a report are
+identical.  ``ParseCache`` stores each parsed file on local disk, keyed by a
+hash of the file's contents, so that parsing it again only requires loading
+the cached copy.
+
+Cached files are pickles, so only point a cache at a directory that is
+writable by trusted users.
+
+"""
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import time
+import zlib
+
+from clarify.parser import Parser, PARSER_STATE_VERSION
+from clarify.sources import BUFFER_TYPES, is_filename
+
+CACHE_FILE_SUFFIX = '.parser'
+
+
+class ParseCache(object):
+    """
+    Cache of parsed results files on local disk
+
+    Parsed results are stored as compressed pickles of ``Parser`` objects,
+    which use a compact flat representation rather than the graph of result
+    objects.  Entries that haven't been used for longer than ``max_age``
+    seconds are evicted, as are the least recently used entries whenever the
+    total size of the cache exceeds ``max_size`` bytes.
+
+    """
+    def __init__(self, directory, max_size=None, max_age=None, **parser_options):
+        """
+        Args:
+            directory: Path of the directory to store cached results in.  It
+                is created if it doesn't exist.
+            max_size: Maximum total size of the cache in bytes, or None for no
+                limit.
+            max_age: Maximum number of seconds since an entry was last used
+                before it is evicted, or None for no limit.
+            **parser_options: Keyword arguments used to create ``Parser``
+                objects, for example ``lean=True``.
+
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        self.parser_options = parser_options
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def parse(self, f):
+        """
+        Parse a results file, using the cached results if available
+
+        Args:
+            f: Filename, file-like object or buffer for a results file or
+                zip archive, as accepted by ``Parser.parse``.  Buffers such as
+                ``mmap.mmap`` are hashed and parsed in place.
+
+        Returns:
+            A ``Parser`` object that has parsed the results file.
+
+        """
+        if not (is_filename(f) or isinstance(f, BUFFER_TYPES)):
+            # The contents have to be read to be hashed, so keep them for
+            # parsing rather than rereading the file.
+            f = f.read()
+
+        path = self._path(self.key(f))
+        parser = self._load(path)
+        if parser is not None:
+            return parser
+
+        parser = Parser(**self.parser_options)
+        parser.parse(f)
+        self._store(path, parser)
+        self.evict()
+        return parser
+
+    def key(self, f):
+        """
+        Compute the cache key for a results file
+
+        Args:
+            f: Filename, such as a string or ``pathlib.Path``, or a buffer
+                such as ``bytes`` or ``mmap.mmap``.
+
+        Returns:
+            String containing a hex digest of the file's contents and the
+            options used to parse it.
+
+        """
+        h = hashlib.sha256()
+        # Options that don't affect the parsed results
+        options = sorted((k, v) for k, v in self.parser_options.items()
+                         if k not in ('on_phase', 'backend'))
+        h.update(repr((PARSER_STATE_VERSION, options)).encode('utf-8'))
+        if is_filename(f):
+            with io.open(f, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+                    h.update(chunk)
+        else:
+            # Buffers are hashed in place, without copying them
+            h.update(f)
+        return h.hexdigest()
+
+    def evict(self):
+        """
+        Remove expired entries, then the least recently used entries until
+        the cache is no larger than ``max_size``
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_FILE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        now = time.time()
+        if self.max_age is not None:
+            for mtime, size, path in entries:
+                if now - mtime > self.max_age:
+                    self._remove(path)
+            entries = [e for e in entries if now - e[0] <= self.max_age]
+
+        if self.max_size is not None:
+            total_size = sum(size for mtime, size, path in entries)
+            # Oldest first
+            for mtime, size, path in sorted(entries):
+                if total_size <= self.max_size:
+                    break
+                self._remove(path)
+                total_size -= size
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_FILE_SUFFIX):
+                self._remove(os.path.join(self.directory, name))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_FILE_SUFFIX)
+
+    def _load(self, path):
+        """
+        Load a cached ``Parser``
+
+        Returns:
+            A ``Parser`` object, or None if there's no usable entry at
+            ``path``.
+
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+
+        try:
+            parser = pickle.loads(zlib.decompress(data))
+        except Exception:
+            # A corrupt entry, or one written by an incompatible version
+            self._remove(path)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return parser
+
+    def _store(self, path, parser):
+        data = zlib.compress(pickle.dumps(parser, pickle.HIGHEST_PROTOCOL))
+        # Write to a temporary file and then move it into place, so readers
+        # never see a partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            getattr(os, 'replace', os.rename)(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
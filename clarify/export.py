@@ -0,0 +1,206 @@
+"""
+Write results files out as CSV or JSON lines
+
+The exporters read results straight from the XML with
+``Parser.iter_results()`` and write each result as soon as it's parsed, so
+memory use stays flat no matter how large the results file is.  Every row
+has the same columns, in the order of ``EXPORT_FIELDS``.
+
+"""
+from contextlib import contextmanager
+import csv
+import gzip
+import io
+import json
+
+import six
+
+from clarify.parser import Parser, RESULT_RECORD_FIELDS
+
+EXPORT_FIELDS = tuple(RESULT_RECORD_FIELDS)
+"""Names of the columns written by the exporters, in order"""
+
+BUFFER_SIZE = 1024 * 1024
+"""Size in bytes of the write buffer used for output files"""
+
+
+def write_csv(source, out, compress=None, header=True, contests=None,
+        vote_types=None, levels=None):
+    """
+    Write the results in a results file as CSV
+
+    Args:
+        source: String containing filename, file-like object or buffer for
+            the XML report file, or for a zip archive containing it.  See
+            ``Parser.parse()``.
+        out: String containing the filename to write to, or a file-like
+            object.  File-like objects can be opened in text or binary mode,
+            except when compressing, which requires binary mode.
+        compress: If True, gzip the output.  Defaults to True if ``out`` is a
+            filename ending in ".gz".
+        header: If True, write a header row with the column names.
+        contests: Criteria for selecting contests.  See ``Parser.parse()``.
+        vote_types: Criteria for selecting vote types.  See
+            ``Parser.parse()``.
+        levels: Sub-jurisdiction levels to include.  See ``Parser.parse()``.
+
+    Returns:
+        Number of results written, not counting the header.
+
+    """
+    records = Parser().iter_results(source, contests=contests,
+        vote_types=vote_types, levels=levels)
+    count = 0
+    with _open_output(out, compress) as f:
+        writer = _csv_writer(f)
+        if header:
+            writer.writerow(EXPORT_FIELDS)
+        for record in records:
+            writer.writerow(record)
+            count += 1
+
+    return count
+
+
+def write_jsonl(source, out, compress=None, contests=None, vote_types=None,
+        levels=None):
+    """
+    Write the results in a results file as JSON lines
+
+    Each result is written as a JSON object on its own line, with keys in the
+    order of ``EXPORT_FIELDS``.  Missing values are written as ``null``.
+
+    Args:
+        source: String containing filename, file-like object or buffer for
+            the XML report file, or for a zip archive containing it.  See
+            ``Parser.parse()``.
+        out: String containing the filename to write to, or a file-like
+            object.  See ``write_csv()``.
+        compress: If True, gzip the output.  Defaults to True if ``out`` is a
+            filename ending in ".gz".
+        contests: Criteria for selecting contests.  See ``Parser.parse()``.
+        vote_types: Criteria for selecting vote types.  See
+            ``Parser.parse()``.
+        levels: Sub-jurisdiction levels to include.  See ``Parser.parse()``.
+
+    Returns:
+        Number of results written.
+
+    """
+    records = Parser().iter_results(source, contests=contests,
+        vote_types=vote_types, levels=levels)
+    encoder = json.JSONEncoder(separators=(',', ':'))
+    count = 0
+    with _open_output(out, compress) as f:
+        for record in records:
+            line = encoder.encode(record._asdict())
+            if isinstance(line, bytes):
+                # Python 2 encodes to ASCII str, since ensure_ascii is set
+                line = line.decode('ascii')
+            f.write(line)
+            f.write(u'\n')
+            count += 1
+
+    return count
+
+
+@contextmanager
+def _open_output(out, compress):
+    """
+    Open a buffered text stream for writing an export
+
+    Args:
+        out: Filename or file-like object
+        compress: If True, gzip the output.  If None, compress filenames
+            ending in ".gz".
+
+    Yields:
+        A text file-like object.  Streams wrapping a caller's file-like
+        object are flushed, but the caller's object is left open.
+
+    """
+    if isinstance(out, six.string_types):
+        if compress is None:
+            compress = out.endswith('.gz')
+        with io.open(out, 'wb', buffering=BUFFER_SIZE) as raw:
+            if compress:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+                    with _text_stream(gz) as f:
+                        yield f
+            else:
+                with _text_stream(raw) as f:
+                    yield f
+    elif compress:
+        with gzip.GzipFile(fileobj=out, mode='wb') as gz:
+            with _text_stream(gz) as f:
+                yield f
+    elif isinstance(out, io.TextIOBase):
+        yield out
+    else:
+        with _text_stream(out) as f:
+            yield f
+
+
+def _csv_writer(f):
+    """Create a CSV writer for a text stream"""
+    if six.PY2:
+        return _EncodingCsvWriter(f)
+    return csv.writer(f, lineterminator='\n')
+
+
+class _EncodingCsvWriter(object):
+    """
+    CSV writer for a text stream on Python 2
+
+    Python 2's csv module only handles byte strings, so values are encoded
+    as UTF-8 for the csv module and its output is decoded again.
+
+    """
+    def __init__(self, f):
+        self._f = f
+        self._writer = csv.writer(self, lineterminator='\n')
+
+    def writerow(self, row):
+        self._writer.writerow([v.encode('utf-8') if isinstance(v, six.text_type) else v
+                               for v in row])
+
+    def write(self, s):
+        self._f.write(s.decode('utf-8'))
+
+
+@contextmanager
+def _text_stream(raw):
+    """Wrap a binary file-like object in a text stream, without closing it"""
+    f = io.TextIOWrapper(_WriteBuffer(raw), encoding='utf-8', newline='')
+    try:
+        yield f
+    finally:
+        f.flush()
+        f.detach()
+
+
+class _WriteBuffer(io.BufferedWriter):
+    """
+    Buffer writes to a binary file-like object
+
+    ``io.TextIOWrapper`` needs an object from the ``io`` module, which
+    objects such as ``gzip.GzipFile`` on Python 2 aren't.
+
+    """
+    def __init__(self, raw):
+        super(_WriteBuffer, self).__init__(_RawWriter(raw), BUFFER_SIZE)
+
+
+class _RawWriter(io.RawIOBase):
+    """Adapt any object with a ``write()`` method to ``io.RawIOBase``"""
+    def __init__(self, f):
+        super(_RawWriter, self).__init__()
+        self._f = f
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        # bytes() of a memoryview is its repr on Python 2
+        self._f.write(b.tobytes() if isinstance(b, memoryview) else bytes(b))
+        return len(b)
@@ -1,34 +1,36 @@
-import concurrent.futures
-
 from six.moves.urllib import parse
 
 import requests
-from requests_futures.sessions import FuturesSession
-import lxml.html
-from lxml.cssselect import CSSSelector
 
+from clarify.session import get_default_session
+
+# Placeholder for a URL that hasn't been looked up yet
+_UNRESOLVED = object()
+
+DETAIL_REPORT_FORMATS = ('xml', 'txt', 'xls')
+"""Formats in which Clarity publishes detailed reports"""
 
-class Jurisdiction(object):
+# Statuses of responses to HEAD requests from servers that don't support them
+HEAD_NOT_SUPPORTED_STATUSES = (405, 501)
+
+
+class _JurisdictionBase(object):
 
     """
-    Returns an object representing a state, county or city that has
-    a Clarity election results page, and methods for retrieving
-    additional information about those results.
+    URLs and page scraping for a Clarity election results page
+
+    This doesn't make any requests itself.  It's shared by ``Jurisdiction``,
+    which makes blocking requests, and
+    ``clarify.aio.AsyncJurisdiction``, which makes them with asyncio.
     """
 
     def __init__(self, url, level, name=''):
-        """
-        To create an instance, pass a Clarity results URL for the top-level
-        political jurisdiction (a state, for example), and the corresponding
-        level in lowercase ("state" or "county").
-        """
-
         self.url = url
         self.parsed_url = self._parse_url()
         self.state = self._get_state_from_url()
         self.level = level
         self.name = name
-        self.summary_url = self._get_summary_url()
+        self._summary_url = _UNRESOLVED
 
     @classmethod
     def _url_ensure_trailing_slash(cls, url):
@@ -41,32 +43,22 @@ class Jurisdiction(object):
         return parse.urlunsplit(url_parts)
 
     @classmethod
-    def get_current_ver(cls, election_url):
+    def _current_ver_url(cls, election_url):
+        """
+        Returns the URL of the file containing an election's current version.
+        """
         election_url_parts = parse.urlsplit(cls._url_ensure_trailing_slash(election_url))
         election_url_parts = election_url_parts._replace(path=election_url_parts.path + "current_ver.txt")
 
-        current_ver_url = parse.urlunsplit(election_url_parts)
-
-        current_ver_response = requests.get(current_ver_url)
-
-        try:
-            current_ver_response.raise_for_status()
-        except requests.exceptions.HTTPError:
-            return None
-
-        return current_ver_response.text
+        return parse.urlunsplit(election_url_parts)
 
     @classmethod
-    def get_latest_summary_url(cls, election_url):
-        election_url = cls._url_ensure_trailing_slash(election_url)
-
-        election_url_parts = parse.urlsplit(election_url)
-
-        current_ver = cls.get_current_ver(election_url)
-
-        # If we don't have current_ver, we can't determine a summary URL.
-        if current_ver is None:
-            return None
+    def _latest_summary_url_candidates(cls, election_url, current_ver):
+        """
+        Returns the URLs where the summary page of an election's current
+        version may be, in the order they should be tried.
+        """
+        election_url_parts = parse.urlsplit(cls._url_ensure_trailing_slash(election_url))
 
         new_paths = [
             election_url_parts.path + current_ver + "/Web01/en/summary.html",
@@ -74,62 +66,8 @@ class Jurisdiction(object):
             # TODO: Support new-style summary pages.
         ]
 
-        for new_path in new_paths:
-            latest_summary_url_parts = election_url_parts._replace(path=new_path)
-
-            latest_summary_url = parse.urlunsplit(latest_summary_url_parts)
-
-            latest_summary_url_response = requests.get(latest_summary_url)
-
-            try:
-                latest_summary_url_response.raise_for_status()
-            except requests.exceptions.HTTPError:
-                continue
-
-            return latest_summary_url
-
-        # If none of the expected paths succeed, return None.
-        return None
-
-    def get_subjurisdictions(self):
-        """
-        Returns a list of subjurisdictions depending on the level
-        of the main jurisdiction. States always have counties, and
-        counties and cities may have precincts.
-        """
-
-        subjurisdictions_url = self._get_subjurisdictions_url()
-        if not subjurisdictions_url:
-            json_url = self.url.replace('summary.html','json/electionsettings.json')
-            try:
-                r = requests.get(json_url)
-                r.raise_for_status()
-                jurisdictions = []
-                counties = r.json()['settings']['electiondetails']['participatingcounties']
-                jurisdictions = self._get_subjurisdictions_urls_from_json(counties)
-                return jurisdictions
-            except requests.exceptions.HTTPError:
-                return []
-        try:
-            r = requests.get(subjurisdictions_url)
-            r.raise_for_status()
-
-            # Use a maximum of 10 workers.  Should we parameterize this?
-            session = FuturesSession(max_workers=10)
-            future_to_name = {}
-            for url, name in self._scrape_subjurisdiction_paths(r.text):
-                future = self._subjurisdiction_url_future(session, url)
-                future_to_name[future] = name
-
-            jurisdictions = []
-            for future in concurrent.futures.as_completed(future_to_name):
-                url = self._subjurisdiction_url_from_future(future)
-                name = future_to_name[future]
-                jurisdictions.append(Jurisdiction(url, 'county', name))
-
-            return jurisdictions
-        except requests.exceptions.HTTPError:
-            return []
+        return [parse.urlunsplit(election_url_parts._replace(path=new_path))
+                for new_path in new_paths]
 
     def _parse_url(self):
         """
@@ -143,12 +81,23 @@ class Jurisdiction(object):
             url = self.url
         return parse.urlsplit(url)
 
-    def _get_subjurisdictions_urls_from_json(self, counties):
+    def _electionsettings_url(self):
+        """
+        Returns the URL of the JSON settings of a Web01 results page, which
+        list the participating counties.
+        """
+        return self.url.replace('summary.html','json/electionsettings.json')
+
+    def _subjurisdiction_urls_from_json(self, counties):
+        """
+        Returns a list of ``(url, name)`` tuples for the participating
+        counties listed in the JSON settings of a Web01 results page.
+        """
         subjurisdictions = []
         for c in counties:
             name, first_id, second_id, date, fill = c.split('|')
             url = 'https://results.enr.clarityelections.com/'+self.state+'/'+name+'/'+first_id+'/'+second_id+'/Web01/en/summary.html'
-            subjurisdictions.append(Jurisdiction(url, 'county', name))
+            subjurisdictions.append((url, name))
         return subjurisdictions
 
     def _get_state_from_url(self):
@@ -177,12 +126,18 @@ class Jurisdiction(object):
         """
         Parse subjurisdictions_url to find paths for counties.
         """
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+
         tree = lxml.html.fromstring(html)
         sel = CSSSelector('ul li a')
         results = sel(tree)
         return [(match.get('value'), match.get('id')) for match in results]
 
-    def _subjurisdiction_url_future(self, session, path):
+    def _subjurisdiction_page_url(self, path):
+        """
+        Returns the URL of a county's page, which redirects to its results.
+        """
         url = self._state_url() + "/".join(path.split('/')[:3])
         # Make sure path ends with '/'
         # While the URL without the trailing forward slash will ultimately
@@ -190,13 +145,14 @@ class Jurisdiction(object):
         # extra request.
         if not url.endswith('/'):
             url = url + '/'
-        future = session.get(url)
-        return future
+        return url
 
-    def _subjurisdiction_url_from_future(self, future):
-        res = future.result()
-        url = res.url
-        redirect_path = self._scrape_subjurisdiction_summary_path(res.text)
+    def _subjurisdiction_summary_url(self, url, html):
+        """
+        Returns the summary URL of a county, given the URL and HTML of its
+        page.
+        """
+        redirect_path = self._scrape_subjurisdiction_summary_path(html)
         # We need to strip the trailing '/' from the URL before adding
         # the additional path
         return url.strip('/') + redirect_path
@@ -214,6 +170,8 @@ class Jurisdiction(object):
         There are two types of pages: one with segment in meta tag
         and the other with segment in script tag.
         """
+        import lxml.html
+
         tree = lxml.html.fromstring(html)
         try:
             segment = tree.xpath("//meta[@content]")[0].values()[1].split("=")[1].split('/')[1]
@@ -221,13 +179,189 @@ class Jurisdiction(object):
             segment = tree.xpath("//script")[0].values()[0].split('/')[1]
         return '/'+ segment + '/en/summary.html'
 
+    def _reports_url(self):
+        """
+        Returns the URL of the directory containing the jurisdiction's reports.
+        """
+        return self._state_url() + '/' + '/'.join(self.parsed_url.path.split('/')[2:-2]) + "/reports"
+
+
+class Jurisdiction(_JurisdictionBase):
+
+    """
+    Returns an object representing a state, county or city that has
+    a Clarity election results page, and methods for retrieving
+    additional information about those results.
+    """
+
+    def __init__(self, url, level, name='', session=None):
+        """
+        To create an instance, pass a Clarity results URL for the top-level
+        political jurisdiction (a state, for example), and the corresponding
+        level in lowercase ("state" or "county").
+
+        Requests are made with ``session``, a ``requests.Session`` object,
+        which is also used by the jurisdiction's sub-jurisdictions.  If it
+        isn't specified, a pooled session shared by all jurisdictions is
+        used.  See ``clarify.session``.
+        """
+
+        super(Jurisdiction, self).__init__(url, level, name)
+        self.session = session if session is not None else get_default_session()
+
+    @property
+    def summary_url(self):
+        """
+        URL of the summary report, or None if the jurisdiction has none.
+
+        Checking that the report exists requires a request, so this is only
+        done the first time the URL is accessed.  To look up the URLs for
+        many jurisdictions at once, use ``resolve_summary_urls()``.
+        """
+        if self._summary_url is _UNRESOLVED:
+            self._summary_url = self._get_summary_url()
+        return self._summary_url
+
+    @classmethod
+    def resolve_summary_urls(cls, jurisdictions, max_workers=10):
+        """
+        Look up the summary report URLs of many jurisdictions concurrently
+
+        Args:
+            jurisdictions: Iterable of ``Jurisdiction`` objects.  URLs that
+                have already been looked up aren't requested again.
+            max_workers: Maximum number of requests made at once.  This
+                should be at most the pool size of the jurisdictions'
+                sessions.
+
+        Returns:
+            List of the ``summary_url`` of each jurisdiction.
+
+        """
+        jurisdictions = list(jurisdictions)
+        pending = [j for j in jurisdictions if j._summary_url is _UNRESOLVED]
+        urls = _map_concurrently(lambda j: j._get_summary_url(), pending, max_workers)
+        for j, url in zip(pending, urls):
+            j._summary_url = url
+
+        return [j.summary_url for j in jurisdictions]
+
+    @classmethod
+    def report_urls(cls, jurisdictions, formats=DETAIL_REPORT_FORMATS, max_workers=10):
+        """
+        Look up the detailed report URLs of many jurisdictions concurrently
+
+        Each jurisdiction and format is checked with a HEAD request, as in
+        ``report_url()``, with at most ``max_workers`` requests made at once.
+
+        Args:
+            jurisdictions: Iterable of ``Jurisdiction`` objects
+            formats: Iterable of report formats.  See ``report_url()``.
+            max_workers: Maximum number of requests made at once.  This
+                should be at most the pool size of the jurisdictions'
+                sessions.
+
+        Returns:
+            List with a dictionary for each jurisdiction, mapping each
+            format to the URL of the report, or to None if the report
+            doesn't exist.
+
+        """
+        jurisdictions = list(jurisdictions)
+        formats = list(formats)
+        probes = [(j, fmt) for j in jurisdictions for fmt in formats]
+        urls = iter(_map_concurrently(lambda probe: probe[0].report_url(probe[1]),
+                                      probes, max_workers))
+        return [dict((fmt, next(urls)) for fmt in formats) for _j in jurisdictions]
+
+    @classmethod
+    def get_current_ver(cls, election_url, session=None):
+        current_ver_url = cls._current_ver_url(election_url)
+
+        session = session if session is not None else get_default_session()
+        current_ver_response = session.get(current_ver_url)
+
+        try:
+            current_ver_response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            return None
+
+        return current_ver_response.text
+
+    @classmethod
+    def get_latest_summary_url(cls, election_url, session=None):
+        session = session if session is not None else get_default_session()
+
+        current_ver = cls.get_current_ver(election_url, session=session)
+
+        # If we don't have current_ver, we can't determine a summary URL.
+        if current_ver is None:
+            return None
+
+        for latest_summary_url in cls._latest_summary_url_candidates(election_url, current_ver):
+            latest_summary_url_response = session.get(latest_summary_url)
+
+            try:
+                latest_summary_url_response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                continue
+
+            return latest_summary_url
+
+        # If none of the expected paths succeed, return None.
+        return None
+
+    def get_subjurisdictions(self):
+        """
+        Returns a list of subjurisdictions depending on the level
+        of the main jurisdiction. States always have counties, and
+        counties and cities may have precincts.
+        """
+
+        subjurisdictions_url = self._get_subjurisdictions_url()
+        if not subjurisdictions_url:
+            json_url = self._electionsettings_url()
+            try:
+                r = self.session.get(json_url)
+                r.raise_for_status()
+                jurisdictions = []
+                counties = r.json()['settings']['electiondetails']['participatingcounties']
+                jurisdictions = self._get_subjurisdictions_urls_from_json(counties)
+                return jurisdictions
+            except requests.exceptions.HTTPError:
+                return []
+        try:
+            r = self.session.get(subjurisdictions_url)
+            r.raise_for_status()
+
+            # Use a maximum of 10 workers.  Should we parameterize this?
+            # Requests are made with this jurisdiction's session, so they
+            # share its connection pool.
+            paths = self._scrape_subjurisdiction_paths(r.text)
+            urls = _map_concurrently(lambda p: self._get_subjurisdiction_url(p[0]),
+                                     paths, 10)
+            return [Jurisdiction(url, 'county', name, session=self.session)
+                    for url, (_path, name) in zip(urls, paths)]
+        except requests.exceptions.HTTPError:
+            return []
+
+    def _get_subjurisdictions_urls_from_json(self, counties):
+        return [Jurisdiction(url, 'county', name, session=self.session)
+                for url, name in self._subjurisdiction_urls_from_json(counties)]
+
+    def _get_subjurisdiction_url(self, path):
+        res = self.session.get(self._subjurisdiction_page_url(path))
+        return self._subjurisdiction_summary_url(res.url, res.text)
+
     def report_url(self, fmt):
         """
         Returns link to detailed report depending on format. Formats are xls, txt and xml.
+
+        Returns None if the report doesn't exist.  The report isn't
+        downloaded.  See ``_report_exists()``.
         """
-        url = self._state_url() + '/' + '/'.join(self.parsed_url.path.split('/')[2:-2]) + "/reports/detail{}.zip".format(fmt)
-        r = requests.get(url)
-        if r.status_code == 200:
+        url = self._reports_url() + "/detail{}.zip".format(fmt)
+        if self._report_exists(url):
             return url
         else:
             return None
@@ -236,9 +370,42 @@ class Jurisdiction(object):
         """
         Returns the summary report URL for a jurisdiction.
         """
-        url = self._state_url() + '/' + '/'.join(self.parsed_url.path.split('/')[2:-2]) + "/reports/summary.zip"
-        r = requests.get(url)
-        if r.status_code == 200:
+        url = self._reports_url() + "/summary.zip"
+        if self._report_exists(url):
             return url
         else:
             return None
+
+    def _report_exists(self, url):
+        """
+        Checks whether a report exists without downloading it.
+
+        A HEAD request is made for the report.  If the server doesn't
+        support HEAD requests, a GET request for the first byte of the
+        report is made instead.
+        """
+        r = self.session.head(url, allow_redirects=True)
+        if r.status_code not in HEAD_NOT_SUPPORTED_STATUSES:
+            return r.status_code == 200
+
+        with self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True) as r:
+            # Servers that ignore the range send the whole report, which
+            # isn't read because the response is streamed
+            return r.status_code in (200, 206)
+
+
+def _map_concurrently(fn, items, max_workers):
+    """
+    Call a function on each item in a thread pool
+
+    Returns:
+        List of the return values, in the same order as ``items``.
+
+    """
+    if not items:
+        return []
+
+    import concurrent.futures
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fn, items))
@@ -1,8 +1,24 @@
 import datetime
+import functools
+import hashlib
+import itertools
+import sys
+import threading
+import time
 from collections import namedtuple
 
-import dateutil.parser
 from lxml import etree
+import six
+
+from clarify.sources import open_report
+
+# Version of the format returned by ``Parser.__getstate__``.  Increment this
+# whenever the format changes.
+PARSER_STATE_VERSION = 1
+
+# Placeholder for a key that ``ResultIndex.query()`` shouldn't match on
+ANY = object()
+
 
 class Parser(object):
     """
@@ -12,7 +28,63 @@ class Parser(object):
     http://results.enr.clarityelections.com/KY/Adair/15263/27401/reports/detailxml.zip
 
     """
-    def __init__(self):
+    def __init__(self, stream=False, lean=False, lazy=False, on_phase=None,
+            backend='xpath', track_changes=False):
+        """
+        Args:
+            stream: If True, parse the report incrementally, handling each
+                ``Contest`` element as soon as it has been read and then
+                discarding it.  This keeps peak memory proportional to the
+                largest contest rather than to the whole XML document.
+            lean: If True, don't link ``ResultJurisdiction`` objects to their
+                results, leaving their ``results`` lists empty.  This reduces
+                the number of objects allocated and the time spent in the
+                allocator when parsing large files.
+            lazy: If True, only parse the attributes of each contest up
+                front.  A contest's choices and results are parsed the first
+                time they are accessed, from the XML element, which is kept
+                in memory until then.  Until a contest's results have been
+                parsed, they aren't included in the ``results`` of its
+                ``ResultJurisdiction`` objects.  This can't be combined with
+                ``stream``.
+            on_phase: Function called with a ``PhaseStats`` object at the end
+                of each phase of ``parse()``, for example to record how long
+                parsing the result jurisdictions took.  The phases are
+                "read", "timestamp", "election", "jurisdictions" and
+                "contests", in that order, except that in streaming mode the
+                file is read while the contests are parsed, so there is no
+                "read" phase and the "contests" phase includes the others.
+                ``iter_results()`` and ``parse_table()`` report the
+                "timestamp", "election" and "jurisdictions" phases.  If None,
+                parsing isn't measured at all.
+            backend: Name of the implementation used to find the results in
+                the XML, one of the keys of ``BACKENDS``.  "xpath" evaluates
+                XPath expressions for each ``VoteType`` element, while
+                "fast" iterates over child elements directly and is
+                considerably faster on large files.  Both produce identical
+                results.
+            track_changes: If True, fingerprint the XML of each contest
+                while parsing, so that ``diff()`` can skip contests that
+                haven't changed without comparing their results.  This
+                slows parsing down somewhat, so only use it for parsers
+                whose results will be compared.  Lazy parsers fingerprint
+                contests on demand, so they don't need this.
+
+        """
+        if stream and lazy:
+            raise ValueError("A parser can't be both streaming and lazy")
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend {}".format(backend))
+
+        self.stream = stream
+        self.lean = lean
+        self.lazy = lazy
+        self.on_phase = on_phase
+        self.backend = backend
+        self.track_changes = track_changes
+        self._backend = BACKENDS[backend]
+        self._result_cls = LeanResult if lean else Result
+        self._strings = {}
         self.timestamp = None
         self.election_name = None
         self.election_date = None
@@ -23,31 +95,424 @@ class Parser(object):
         self._result_jurisdiction_lookup = {}
         self._contests = []
         self._contest_lookup = {}
+        self._contest_digests = {}
+        self._results = None
+        self._index = None
 
-    def parse(self, f):
+    def parse(self, f, contests=None, vote_types=None, levels=None):
         """
         Parse the report XML file, populating attributes
 
+        Parsing can be limited to some of the contests, vote types or
+        jurisdiction levels in the file.  Contests that aren't selected are
+        skipped without creating any objects for them.
+
         Args:
-            f: String containing filename or file-like object for the XML
-               report file to be parsed.
+            f: String containing filename, file-like object or buffer, such
+               as ``bytes``, ``memoryview`` or ``mmap.mmap``, for the XML
+               report file to be parsed, or for a zip archive, such as
+               ``detailxml.zip``, containing it.
+            contests: If specified, only parse contests matching these
+               criteria.  A string, compiled regular expression, or an
+               iterable of them.  Strings match a contest's key or text
+               exactly.  Regular expressions are searched for in a contest's
+               text.
+            vote_types: If specified, only parse results for vote types
+               matching these criteria.  Strings or regular expressions are
+               matched against the vote type name, as with ``contests``.
+            levels: If specified, a sub-jurisdiction level, "precinct" or
+               "county", or an iterable of them, to parse results for.
+               Results for the whole jurisdiction of the report are always
+               parsed, so pass an empty iterable to parse only those.
 
         """
-        tree = etree.parse(f)
-        election_voter_turnout = self._parse_election_voter_turnout(tree)
-        self.timestamp = self._parse_timestamp(tree)
-        self.election_name = self._parse_election_name(tree)
-        self.election_date = self._parse_election_date(tree)
-        self.region = self._parse_region(tree)
-        self.total_voters = int(election_voter_turnout[0])
-        self.ballots_cast = int(election_voter_turnout[1])
-        self.voter_turnout = float(election_voter_turnout[2])
+        self._contest_digests = {}
+        self._results = None
+        self._index = None
+        result_filter = ResultFilter(contests, vote_types, levels)
+        if self.stream:
+            lookup = {}
+
+            def parse_header(tree):
+                self._parse_header(tree)
+                lookup.update(result_filter.filter_jurisdictions(
+                    self._result_jurisdiction_lookup))
+
+            with self._phase('contests') as phase:
+                self._contests = [self._parse_contest(el, lookup, result_filter)
+                                  for el in self._iterparse_contests(f, parse_header)
+                                  if result_filter.match_contest(el.get('key'), el.get('text'))]
+                phase.elements = len(self._contests)
+        else:
+            with self._phase('read'):
+                with open_report(f) as source:
+                    tree = etree.parse(source)
+            self._parse_header(tree)
+            with self._phase('contests') as phase:
+                self._contests = self._parse_contests(tree,
+                    result_filter.filter_jurisdictions(self._result_jurisdiction_lookup),
+                    result_filter)
+                phase.elements = len(self._contests)
+
+        self._contest_lookup = {c.text: c for c in self._contests}
 
-        self._result_jurisdictions = self._parse_result_jurisdictions(tree)
+    def __getstate__(self):
+        """
+        Return a compact representation of the parsed results for pickling
+
+        Rather than the graph of ``Contest``, ``Choice``, ``Result`` and
+        ``ResultJurisdiction`` objects, with all of their back-references,
+        the state consists of flat tuples, with results referring to their
+        jurisdiction by index.
+
+        """
+        jurisdiction_index = {j.name: i for i, j in enumerate(self._result_jurisdictions)}
+
+        def result_state(result):
+            jurisdiction = result.jurisdiction
+            return (result.vote_type,
+                    jurisdiction_index[jurisdiction.name] if jurisdiction is not None else -1,
+                    result.votes)
+
+        contests = []
+        for contest in self._contests:
+            # Lazy contests can only be fingerprinted before they're loaded
+            digest = self._contest_digest(contest)
+            choices = [(choice.key, choice.text, choice.party, choice.total_votes,
+                        [result_state(r) for r in choice.results])
+                       for choice in contest.choices]
+            contests.append((
+                tuple(contest),
+                digest,
+                [result_state(r) for r in contest.results if r.choice is None],
+                choices,
+            ))
+
+        return {
+            'version': PARSER_STATE_VERSION,
+            'options': {'stream': self.stream, 'lean': self.lean, 'lazy': self.lazy,
+                        'backend': self.backend, 'track_changes': self.track_changes},
+            'election': (self.timestamp, self.election_name, self.election_date,
+                         self.region, self.total_voters, self.ballots_cast,
+                         getattr(self, 'voter_turnout', None)),
+            'jurisdictions': [tuple(j) for j in self._result_jurisdictions],
+            'contests': contests,
+        }
+
+    def __setstate__(self, state):
+        """Rebuild the parsed results from the output of ``__getstate__``"""
+        if state.get('version') != PARSER_STATE_VERSION:
+            raise ValueError("Unsupported parser state version {}".format(
+                state.get('version')))
+
+        self.__init__(**state['options'])
+        (self.timestamp, self.election_name, self.election_date, self.region,
+         self.total_voters, self.ballots_cast, self.voter_turnout) = state['election']
+
+        self._result_jurisdictions = [ResultJurisdiction(*j) for j in state['jurisdictions']]
         self._result_jurisdiction_lookup = {j.name: j for j in self._result_jurisdictions}
-        self._contests = self._parse_contests(tree, self._result_jurisdiction_lookup)
+        jurisdictions = self._result_jurisdictions
+        result_cls = self._result_cls
+
+        for contest_state, digest, results, choices in state['contests']:
+            contest = Contest(*contest_state)
+            self._contest_digests[contest.key] = digest
+
+            for vote_type, jurisdiction, votes in results:
+                contest.add_result(result_cls(contest, vote_type,
+                    jurisdictions[jurisdiction] if jurisdiction >= 0 else None,
+                    votes, None))
+
+            for key, text, party, total_votes, choice_results in choices:
+                choice = Choice(contest=contest, key=key, text=text, party=party,
+                                total_votes=total_votes)
+                for vote_type, jurisdiction, votes in choice_results:
+                    choice.add_result(result_cls(contest, vote_type,
+                        jurisdictions[jurisdiction] if jurisdiction >= 0 else None,
+                        votes, choice))
+                contest.add_choice(choice)
+
+            self._contests.append(contest)
+
         self._contest_lookup = {c.text: c for c in self._contests}
 
+    def iter_results(self, f, contests=None, vote_types=None, levels=None):
+        """
+        Iterate over the results in a report XML file as flat records
+
+        The report is parsed incrementally and no ``Contest``, ``Choice``,
+        ``ResultJurisdiction`` or ``Result`` objects are created, so memory
+        use stays constant no matter how many results the file contains.
+        Election-wide attributes such as ``timestamp`` and ``region`` are
+        populated as a side effect, but ``contests``, ``result_jurisdictions``
+        and ``results`` are not.
+
+        Records are yielded in the same order as the ``results`` property of
+        a parser that has parsed the same file.
+
+        Args:
+            f: String containing filename, file-like object or buffer for
+               the XML report file to be parsed, or for a zip archive
+               containing it.  See ``parse()``.
+            contests: Criteria for selecting contests.  See ``parse()``.
+            vote_types: Criteria for selecting vote types.  See ``parse()``.
+            levels: Sub-jurisdiction levels to include.  See ``parse()``.
+
+        Yields:
+            ``ResultRecord`` objects.  For results that apply to the whole
+            jurisdiction of the report, ``jurisdiction_name`` and
+            ``jurisdiction_level`` are None.  For results not associated with
+            a choice, such as overvotes and undervotes, ``choice_key``,
+            ``choice_text`` and ``choice_party`` are None.
+
+        """
+        result_filter = ResultFilter(contests, vote_types, levels)
+        jurisdiction_levels = {}
+
+        def parse_header(tree):
+            self._parse_election(tree)
+            jurisdiction_levels.update(
+                (name, level)
+                for name, level in self._parse_result_jurisdiction_levels(tree).items()
+                if result_filter.match_level(level))
+
+        children = self._backend.children
+        for contest_el in self._iterparse_contests(f, parse_header):
+            contest_key = contest_el.get('key')
+            contest_text = contest_el.get('text')
+            if not result_filter.match_contest(contest_key, contest_text):
+                continue
+
+            for vt_el in children(contest_el, 'VoteType'):
+                if not result_filter.match_vote_type(vt_el.attrib['name']):
+                    continue
+                for record in self._iter_vote_type_records(vt_el, jurisdiction_levels,
+                        contest_key, contest_text, None, None, None):
+                    yield record
+
+            for choice_el in children(contest_el, 'Choice'):
+                choice_key = choice_el.get('key')
+                choice_text = choice_el.get('text')
+                choice_party = choice_el.get('party')
+                for vt_el in children(choice_el, 'VoteType'):
+                    if not result_filter.match_vote_type(vt_el.attrib['name']):
+                        continue
+                    for record in self._iter_vote_type_records(vt_el, jurisdiction_levels,
+                            contest_key, contest_text, choice_key, choice_text, choice_party):
+                        yield record
+
+    def parse_table(self, f, contests=None, vote_types=None, levels=None):
+        """
+        Parse a report XML file into a columnar ``ResultTable``
+
+        The report is parsed incrementally and no ``Contest``, ``Choice`` or
+        ``Result`` objects are created.  Election-wide attributes and
+        ``result_jurisdictions`` are populated as a side effect, but
+        ``contests`` and ``results`` are not.
+
+        This requires NumPy to be installed.
+
+        Args:
+            f: String containing filename, file-like object or buffer for
+               the XML report file to be parsed, or for a zip archive
+               containing it.  See ``parse()``.
+            contests: Criteria for selecting contests.  See ``parse()``.
+            vote_types: Criteria for selecting vote types.  See ``parse()``.
+            levels: Sub-jurisdiction levels to include.  See ``parse()``.
+
+        Returns:
+            A ``clarify.table.ResultTable`` object.
+
+        """
+        from clarify.table import ResultTableBuilder
+
+        result_filter = ResultFilter(contests, vote_types, levels)
+        builder = ResultTableBuilder()
+        jurisdiction_codes = {}
+
+        def parse_header(tree):
+            self._parse_header(tree)
+            for j in self._result_jurisdictions:
+                code = builder.add_jurisdiction(j.name, j.level, j.total_voters,
+                    j.ballots_cast)
+                if result_filter.match_level(j.level):
+                    jurisdiction_codes[j.name] = code
+
+        children = self._backend.children
+        for contest_el in self._iterparse_contests(f, parse_header):
+            contest_key = contest_el.get('key')
+            contest_text = contest_el.get('text')
+            if not result_filter.match_contest(contest_key, contest_text):
+                continue
+            contest = builder.add_contest(contest_key, contest_text)
+
+            for vt_el in children(contest_el, 'VoteType'):
+                if not result_filter.match_vote_type(vt_el.attrib['name']):
+                    continue
+                self._add_vote_type_rows(builder, vt_el, jurisdiction_codes,
+                    contest, -1)
+
+            for choice_el in children(contest_el, 'Choice'):
+                choice = builder.add_choice(contest, choice_el.get('key'),
+                    choice_el.get('text'), choice_el.get('party'),
+                    int(choice_el.attrib['totalVotes']))
+                for vt_el in children(choice_el, 'VoteType'):
+                    if not result_filter.match_vote_type(vt_el.attrib['name']):
+                        continue
+                    self._add_vote_type_rows(builder, vt_el, jurisdiction_codes,
+                        contest, choice)
+
+        return builder.build()
+
+    def _add_vote_type_rows(self, builder, vt_el, jurisdiction_codes, contest,
+            choice):
+        """
+        Add rows for a single ``VoteType`` element to a ``ResultTableBuilder``
+
+        Args:
+            builder: ``ResultTableBuilder`` object
+            vt_el: Element object for a ``VoteType`` element in the XML
+                document.
+            jurisdiction_codes: Dictionary mapping jurisdiction names to
+                their codes in the table
+            contest: Code of the contest
+            choice: Code of the choice, or -1
+
+        """
+        vote_type = vt_el.attrib['name']
+        builder.add_result(contest, choice, -1, vote_type, int(vt_el.attrib['votes']))
+
+        for name, votes in self._backend.subjurisdiction_votes(vt_el, jurisdiction_codes):
+            builder.add_result(contest, choice, jurisdiction_codes[name], vote_type, votes)
+
+    def _iter_vote_type_records(self, vt_el, jurisdiction_levels, contest_key,
+            contest_text, choice_key, choice_text, choice_party):
+        """
+        Generate flat result records for a single ``VoteType`` element
+
+        Args:
+            vt_el: Element object for a ``VoteType`` element in the XML
+                document.
+            jurisdiction_levels: Dictionary mapping jurisdiction names to
+                their level
+            contest_key: Key of the contest
+            contest_text: Text of the contest
+            choice_key: Key of the choice, or None
+            choice_text: Text of the choice, or None
+            choice_party: Party of the choice, or None
+
+        Yields:
+            ``ResultRecord`` objects, starting with the jurisdiction-wide
+            result, followed by one for each sub-jurisdiction.
+
+        """
+        vote_type = vt_el.attrib['name']
+        yield ResultRecord(contest_key, contest_text, choice_key, choice_text,
+            choice_party, vote_type, None, None, int(vt_el.attrib['votes']))
+
+        for name, votes in self._backend.subjurisdiction_votes(vt_el, jurisdiction_levels):
+            yield ResultRecord(contest_key, contest_text, choice_key,
+                choice_text, choice_party, vote_type, name,
+                jurisdiction_levels[name], votes)
+
+    def _parse_header(self, tree):
+        """
+        Parse election-wide attributes and result jurisdictions
+
+        Everything that is parsed here precedes the ``Contest`` elements in
+        the XML document.
+
+        Args:
+            tree: ElementTree object representing the root of the parsed XML
+                document
+
+        """
+        self._parse_election(tree)
+        with self._phase('jurisdictions') as phase:
+            self._result_jurisdictions = self._parse_result_jurisdictions(tree)
+            self._result_jurisdiction_lookup = {j.name: j for j in self._result_jurisdictions}
+            phase.elements = len(self._result_jurisdictions)
+
+    def _parse_election(self, tree):
+        """
+        Parse election-wide attributes such as the timestamp and turnout
+
+        Args:
+            tree: ElementTree object representing the root of the parsed XML
+                document
+
+        """
+        with self._phase('timestamp') as phase:
+            self.timestamp = self._parse_timestamp(tree)
+            phase.elements = 1
+
+        with self._phase('election') as phase:
+            election_voter_turnout = self._parse_election_voter_turnout(tree)
+            self.election_name = self._parse_election_name(tree)
+            self.election_date = self._parse_election_date(tree)
+            self.region = self._parse_region(tree)
+            self.total_voters = int(election_voter_turnout[0])
+            self.ballots_cast = int(election_voter_turnout[1])
+            self.voter_turnout = float(election_voter_turnout[2])
+            phase.elements = 4
+
+    def _phase(self, name):
+        """
+        Measure a phase of parsing, if ``on_phase`` is set
+
+        Args:
+            name: Name of the phase
+
+        Returns:
+            A context manager wrapping the phase.  Set its ``elements``
+            attribute to the number of elements parsed in the phase.
+
+        """
+        if self.on_phase is None:
+            return _NO_PHASE
+        return _Phase(self.on_phase, name)
+
+    def _iterparse_contests(self, f, parse_header):
+        """
+        Incrementally parse ``Contest`` elements from a report XML file
+
+        The header of the document is passed to ``parse_header`` as soon
+        as the first ``Contest`` element has been read.  Each ``Contest``
+        element is cleared, and removed from the document, once the consumer
+        requests the next one.
+
+        Args:
+            f: String containing filename, file-like object or buffer for
+               the XML report file to be parsed, or for a zip archive
+               containing it.  See ``parse()``.
+            parse_header: Function called with an ElementTree object
+                containing everything that precedes the ``Contest`` elements
+
+        Yields:
+            Element object for each completely parsed ``Contest`` element.
+
+        """
+        with open_report(f) as source:
+            context = etree.iterparse(source, events=('end',), tag='Contest')
+            header_parsed = False
+            for _event, el in context:
+                if not header_parsed:
+                    parse_header(el.getroottree())
+                    header_parsed = True
+
+                yield el
+
+                # Free the contest subtree and any preceding siblings, which
+                # includes the header elements once they've been parsed.
+                el.clear()
+                parent = el.getparent()
+                while el.getprevious() is not None:
+                    del parent[0]
+
+            if not header_parsed:
+                # A document without any contests
+                parse_header(etree.ElementTree(context.root))
+
     def _parse_timestamp(self, tree):
         """
         Parse timestamp of this results file
@@ -61,6 +526,9 @@ class Parser(object):
             the ``Timestamp`` element in the XML document
 
         """
+        # dateutil is slow to import and only needed here
+        import dateutil.parser
+
         return dateutil.parser.parse(tree.xpath('/ElectionResult/Timestamp')[0].text)
 
     def _parse_election_name(self, tree):
@@ -144,7 +612,7 @@ class Parser(object):
         precinct_els = tree.xpath('/ElectionResult/VoterTurnout/Precincts/Precinct')
         for el in precinct_els:
             result_jurisdictions.append(ResultJurisdiction(
-              name=el.attrib['name'],
+              name=self._intern(el.attrib['name']),
               total_voters=int(el.attrib['totalVoters']),
               ballots_cast=int(el.attrib['ballotsCast']),
               voter_turnout=float(el.attrib['voterTurnout']),
@@ -157,7 +625,7 @@ class Parser(object):
         county_els = tree.xpath('/ElectionResult/ElectionVoterTurnout/Counties/County')
         for el in county_els:
             result_jurisdictions.append(ResultJurisdiction(
-              name=el.attrib['name'],
+              name=self._intern(el.attrib['name']),
               total_voters=int(el.attrib['totalVoters']),
               ballots_cast=int(el.attrib['ballotsCast']),
               voter_turnout=float(el.attrib['voterTurnout']),
@@ -169,6 +637,30 @@ class Parser(object):
             ))
         return result_jurisdictions
 
+    def _parse_result_jurisdiction_levels(self, tree):
+        """
+        Parse the names and levels of sub-jurisdictions for these results
+
+        This is a lighter-weight alternative to
+        ``_parse_result_jurisdictions`` for when ``ResultJurisdiction``
+        objects aren't needed.
+
+        Args:
+            tree: ElementTree object representing the root of the parsed XML
+                document
+
+        Returns:
+            Dictionary mapping jurisdiction names to their level, either
+            "precinct" or "county".
+
+        """
+        levels = {}
+        for el in tree.xpath('/ElectionResult/VoterTurnout/Precincts/Precinct'):
+            levels[el.attrib['name']] = 'precinct'
+        for el in tree.xpath('/ElectionResult/ElectionVoterTurnout/Counties/County'):
+            levels[el.attrib['name']] = 'county'
+        return levels
+
     @property
     def result_jurisdictions(self):
         return self._result_jurisdictions
@@ -179,10 +671,99 @@ class Parser(object):
 
     @property
     def results(self):
-        results = []
-        for c in self.contests:
-            results.extend(c.results)
-        return results
+        """
+        Tuple of the results of all contests
+
+        The tuple is built the first time this is accessed and reused until
+        the next call to ``parse()``.
+        """
+        if self._results is None:
+            results = []
+            for c in self.contests:
+                results.extend(c.results)
+            self._results = tuple(results)
+        return self._results
+
+    @property
+    def index(self):
+        """
+        ``ResultIndex`` of the results of all contests
+
+        The index is built the first time this is accessed and reused until
+        the next call to ``parse()``.
+        """
+        if self._index is None:
+            self._index = ResultIndex(self.results)
+        return self._index
+
+    def query(self, contest=ANY, choice=ANY, jurisdiction=ANY, vote_type=ANY):
+        """
+        Get the results matching some combination of keys
+
+        Lookups use an index of the results, so they take constant time
+        rather than scanning every result.  See ``ResultIndex.query()``.
+
+        Args:
+            contest: Key of the contest, or a ``Contest`` object.
+            choice: Key of the choice, a ``Choice`` object, or None for
+                results not associated with a choice, such as overvotes.
+            jurisdiction: Name of the jurisdiction, a ``ResultJurisdiction``
+                object, or None for results for the whole jurisdiction of the
+                report.
+            vote_type: Name of the vote type, for example "Election Day".
+
+        Returns:
+            Tuple of ``Result`` objects, in the same order as ``results``.
+
+        """
+        return self.index.query(contest=contest, choice=choice,
+            jurisdiction=jurisdiction, vote_type=vote_type)
+
+    def to_table(self):
+        """
+        Build a columnar ``ResultTable`` from the parsed results
+
+        This requires NumPy to be installed.  To parse a file straight into
+        a table, without creating ``Result`` objects, use ``parse_table()``.
+
+        Returns:
+            A ``clarify.table.ResultTable`` object, with rows in the same
+            order as ``results``.
+
+        """
+        from clarify.table import ResultTable
+
+        return ResultTable.from_parser(self)
+
+    def to_dataframe(self):
+        """
+        Build a pandas ``DataFrame`` of the parsed results
+
+        Label columns are categorical and no Python object is created per
+        row.  See ``clarify.table.ResultTable.to_dataframe()``.  This
+        requires NumPy and pandas to be installed.
+
+        Returns:
+            A ``pandas.DataFrame`` object, with rows in the same order as
+            ``results``.
+
+        """
+        return self.to_table().to_dataframe()
+
+    def to_arrow(self):
+        """
+        Build a ``pyarrow.Table`` of the parsed results
+
+        Label columns are dictionary-encoded and no Python object is
+        created per row.  See ``clarify.table.ResultTable.to_arrow()``.
+        This requires NumPy and pyarrow to be installed.
+
+        Returns:
+            A ``pyarrow.Table`` object, with rows in the same order as
+            ``results``.
+
+        """
+        return self.to_table().to_arrow()
 
     def get_contest(self, text):
         """
@@ -211,6 +792,124 @@ class Parser(object):
         """
         return self._result_jurisdiction_lookup[name]
 
+    def diff(self, previous):
+        """
+        Find what changed since a previous version of the same results
+
+        If both parsers were created with ``track_changes=True``, or are
+        lazy, contests whose XML is identical in both versions are skipped
+        without comparing their choices or results, so the cost of a diff
+        depends mostly on how much changed.  Otherwise every contest is
+        compared.
+
+        Args:
+            previous: ``Parser`` object that parsed an earlier version of the
+                report file parsed by this object.
+
+        Returns:
+            A ``ResultsDiff`` object.  ``contests`` contains changes keyed by
+            contest key, ``choices`` by (contest key, choice key), ``results``
+            by (contest key, choice key, vote type, jurisdiction name) and
+            ``jurisdictions`` by jurisdiction name.  Choice keys are None for
+            results not associated with a choice and jurisdiction names are
+            None for jurisdiction-wide results.  Added or removed items have
+            ``previous`` or ``current`` set to None.
+
+        """
+        diff = ResultsDiff([], [], [], [])
+
+        previous_jurisdictions = {j.name: j for j in previous.result_jurisdictions}
+        for j in self.result_jurisdictions:
+            previous_j = previous_jurisdictions.pop(j.name, None)
+            if j != previous_j:
+                diff.jurisdictions.append(Change(j.name, previous_j, j))
+        for previous_j in previous_jurisdictions.values():
+            diff.jurisdictions.append(Change(previous_j.name, previous_j, None))
+
+        previous_contests = {c.key: c for c in previous.contests}
+        for contest in self.contests:
+            previous_contest = previous_contests.pop(contest.key, None)
+            digest = self._contest_digest(contest)
+            if (previous_contest is not None and digest is not None and
+                    digest == previous._contest_digest(previous_contest)):
+                continue
+            self._diff_contest(diff, previous_contest, contest)
+        for previous_contest in previous_contests.values():
+            self._diff_contest(diff, previous_contest, None)
+
+        return diff
+
+    def _contest_digest(self, contest):
+        """
+        Get the fingerprint of a contest's XML
+
+        Args:
+            contest: ``Contest`` object parsed by this parser
+
+        Returns:
+            Bytes containing a digest of the contest's XML, or None if it
+            isn't known.
+
+        """
+        if isinstance(contest, LazyContest):
+            # Lazy contests are fingerprinted on demand.  The digest is kept
+            # on the contest, which may be from an earlier call to
+            # ``parse()``.
+            loader = contest._loader
+            if contest._digest is None and loader is not None:
+                contest._digest = self._digest(loader.args[0])
+            return contest._digest
+        return self._contest_digests.get(contest.key)
+
+    def _digest(self, contest_el):
+        """Return a digest of a ``Contest`` element's XML"""
+        return hashlib.sha1(etree.tostring(contest_el)).digest()
+
+    def _diff_contest(self, diff, previous, current):
+        """
+        Add the differences between two versions of a contest to a diff
+
+        Args:
+            diff: ``ResultsDiff`` object to add changes to
+            previous: ``Contest`` object from the earlier version, or None
+            current: ``Contest`` object from the later version, or None
+
+        """
+        contest_key = (current if current is not None else previous).key
+        if current != previous:
+            diff.contests.append(Change(contest_key, previous, current))
+
+        def choice_values(choice):
+            return (choice.text, choice.party, choice.total_votes)
+
+        previous_choices = {c.key: c for c in previous.choices} if previous is not None else {}
+        for choice in (current.choices if current is not None else []):
+            previous_choice = previous_choices.pop(choice.key, None)
+            if (previous_choice is None or
+                    choice_values(choice) != choice_values(previous_choice)):
+                diff.choices.append(Change((contest_key, choice.key),
+                    previous_choice, choice))
+        for previous_choice in previous_choices.values():
+            diff.choices.append(Change((contest_key, previous_choice.key),
+                previous_choice, None))
+
+        def result_votes(contest):
+            if contest is None:
+                return {}
+            return {(contest_key,
+                     r.choice.key if r.choice is not None else None,
+                     r.vote_type,
+                     r.jurisdiction.name if r.jurisdiction is not None else None): r.votes
+                    for r in contest.results}
+
+        previous_votes = result_votes(previous)
+        for key, votes in result_votes(current).items():
+            previous_result_votes = previous_votes.pop(key, None)
+            if votes != previous_result_votes:
+                diff.results.append(Change(key, previous_result_votes, votes))
+        for key, previous_result_votes in previous_votes.items():
+            diff.results.append(Change(key, previous_result_votes, None))
+
     def _get_attrib(self, el, attr, fn=None):
         """
         Get an attribute for an XML element
@@ -238,7 +937,25 @@ class Parser(object):
         except KeyError:
             return None
 
-    def _parse_contests(self, tree, result_jurisdiction_lookup):
+    def _intern(self, s):
+        """
+        Return a canonical copy of a string
+
+        Strings such as vote type names are repeated for every result.
+        Sharing a single copy of each saves one string object per result.
+
+        Args:
+            s: A string, or None
+
+        Returns:
+            A string equal to ``s``, or None.
+
+        """
+        if s is None:
+            return s
+        return self._strings.setdefault(s, s)
+
+    def _parse_contests(self, tree, result_jurisdiction_lookup, result_filter):
         """
         Parse contests from these results
 
@@ -247,15 +964,20 @@ class Parser(object):
                 document
             result_jurisdiction_lookup: Dictionary mapping jurisdiction names to
                 ``ResultJurisdiction`` objects
+            result_filter: ``ResultFilter`` selecting the contests and
+                results to parse
 
         Returns:
             List of ``Contest`` objects
 
         """
         contest_els = tree.xpath('/ElectionResult/Contest')
-        return [self._parse_contest(el, result_jurisdiction_lookup) for el in contest_els]
+        parse_contest = self._parse_lazy_contest if self.lazy else self._parse_contest
+        return [parse_contest(el, result_jurisdiction_lookup, result_filter)
+                for el in contest_els
+                if result_filter.match_contest(el.get('key'), el.get('text'))]
 
-    def _parse_contest(self, contest_el, result_jurisdiction_lookup):
+    def _parse_contest(self, contest_el, result_jurisdiction_lookup, result_filter):
         """
         Parse a single ``Contest`` element's attributes and results
 
@@ -263,12 +985,55 @@ class Parser(object):
             contest_el: Element object for a ``Contest`` contest_element in the parsed XML.
             result_jurisdiction_lookup: Dictionary mapping jurisdiction names to
                 ``ResultJurisdiction`` objects
+            result_filter: ``ResultFilter`` selecting the results to parse
 
         Returns:
             A ``Contest`` object with attributes parsed from the XML element.
 
         """
-        contest = Contest(
+        contest = Contest(**self._parse_contest_attributes(contest_el))
+        if self.track_changes:
+            # Fingerprint the contest's XML so ``diff()`` can cheaply skip
+            # contests that haven't changed between versions of a report.
+            self._contest_digests[contest.key] = self._digest(contest_el)
+        self._parse_contest_results(contest_el, result_jurisdiction_lookup,
+            result_filter, contest)
+        return contest
+
+    def _parse_lazy_contest(self, contest_el, result_jurisdiction_lookup, result_filter):
+        """
+        Parse a single ``Contest`` element's attributes, deferring its results
+
+        Args:
+            contest_el: Element object for a ``Contest`` contest_element in the parsed XML.
+            result_jurisdiction_lookup: Dictionary mapping jurisdiction names to
+                ``ResultJurisdiction`` objects
+            result_filter: ``ResultFilter`` selecting the results to parse.
+                This is kept with the contest, so its results are parsed with
+                it even if the parser is used to parse another file first.
+
+        Returns:
+            A ``LazyContest`` object with attributes parsed from the XML
+            element.
+
+        """
+        contest = LazyContest(**self._parse_contest_attributes(contest_el))
+        contest._loader = functools.partial(self._parse_contest_results,
+            contest_el, result_jurisdiction_lookup, result_filter)
+        return contest
+
+    def _parse_contest_attributes(self, contest_el):
+        """
+        Parse a single ``Contest`` element's attributes
+
+        Args:
+            contest_el: Element object for a ``Contest`` contest_element in the parsed XML.
+
+        Returns:
+            Dictionary of keyword arguments for creating a ``Contest``.
+
+        """
+        return dict(
            key=self._get_attrib(contest_el, 'key'),
            text=self._get_attrib(contest_el, 'text'),
            vote_for=self._get_attrib(contest_el, 'voteFor', int),
@@ -280,15 +1045,28 @@ class Parser(object):
            counties_participating=self._get_attrib(contest_el, 'countiesParticipating', int)
         )
 
-        for r in self._parse_no_choice_results(contest_el, result_jurisdiction_lookup, contest):
-            contest.add_result(r)
+    def _parse_contest_results(self, contest_el, result_jurisdiction_lookup,
+            result_filter, contest):
+        """
+        Parse a single ``Contest`` element's choices and results
 
-        for c in self._parse_choices(contest_el, contest, result_jurisdiction_lookup):
-            contest.add_choice(c)
+        Args:
+            contest_el: Element object for a ``Contest`` contest_element in the parsed XML.
+            result_jurisdiction_lookup: Dictionary mapping jurisdiction names to
+                ``ResultJurisdiction`` objects
+            result_filter: ``ResultFilter`` selecting the results to parse
+            contest: ``Contest`` object to add the choices and results to
 
-        return contest
+        """
+        contest.add_results(self._parse_no_choice_results(contest_el,
+            result_jurisdiction_lookup, result_filter, contest))
+
+        for c in self._parse_choices(contest_el, contest, result_jurisdiction_lookup,
+                                     result_filter):
+            contest.add_choice(c)
 
-    def _parse_no_choice_results(self, contest_el, result_jurisdiction_lookup, contest):
+    def _parse_no_choice_results(self, contest_el, result_jurisdiction_lookup,
+            result_filter, contest):
         """
         Parse results not associated with a Choice.
 
@@ -299,40 +1077,37 @@ class Parser(object):
                 document.
             result_jurisdiction_lookup: Dictionary mapping jurisdiction names to
                 ``ResultJurisdiction`` objects
+            result_filter: ``ResultFilter`` selecting the results to parse
 
         Returns:
             A list of ``Result`` objects
 
         """
         results = []
-        vote_type_els = contest_el.xpath('./VoteType')
+        result_cls = self._result_cls
+        subjurisdiction_votes = self._backend.subjurisdiction_votes
+        match_vote_type = result_filter.match_vote_type
+        vote_type_els = self._backend.children(contest_el, 'VoteType')
         for vt_el in vote_type_els:
-            vote_type = vt_el.attrib['name']
+            if not match_vote_type(vt_el.attrib['name']):
+                continue
+            vote_type = self._intern(vt_el.attrib['name'])
             # Add one result for the jurisdiction
-            results.append(Result(
+            results.append(result_cls(
                 contest=contest,
                 vote_type=vote_type,
                 jurisdiction=None,
                 votes=int(vt_el.attrib['votes']),
                 choice=None
             ))
-            # The subjurisdiction elements are either ``Precinct`` for county or
-            # city files or ``County`` for state files
-            for subjurisdiction_el in vt_el.xpath('./Precinct') + vt_el.xpath('./County'):
-                if subjurisdiction_el.attrib['name'] in result_jurisdiction_lookup:
-                    subjurisdiction = result_jurisdiction_lookup[subjurisdiction_el.attrib['name']]
-
-                    results.append(Result(
-                        contest=contest,
-                        vote_type=vote_type,
-                        jurisdiction=subjurisdiction,
-                        votes=int(subjurisdiction_el.attrib['votes']),
-                        choice=None
-                    ))
+            results.extend([
+                result_cls(contest, vote_type, result_jurisdiction_lookup[name], votes, None)
+                for name, votes in subjurisdiction_votes(vt_el, result_jurisdiction_lookup)
+            ])
 
         return results
 
-    def _parse_choices(self, contest_el, contest, result_jurisdiction_lookup):
+    def _parse_choices(self, contest_el, contest, result_jurisdiction_lookup, result_filter):
         """
         Parse ``Choice`` elements for a ``Contest`` element.
 
@@ -341,15 +1116,16 @@ class Parser(object):
             contest: ``Contest`` object corresponding to ``Contest`` element
             result_jurisdiction_lookup: Dictionary mapping jurisdiction names to
                 ``ResultJurisdiction`` objects
+            result_filter: ``ResultFilter`` selecting the results to parse
 
         Returns:
             A list of ``Choice`` elements
 
         """
-        return [self._parse_choice(c_el, contest, result_jurisdiction_lookup)
-                for c_el in contest_el.xpath('Choice')]
+        return [self._parse_choice(c_el, contest, result_jurisdiction_lookup, result_filter)
+                for c_el in self._backend.children(contest_el, 'Choice')]
 
-    def _parse_choice(self, contest_el, contest, result_jurisdiction_lookup):
+    def _parse_choice(self, contest_el, contest, result_jurisdiction_lookup, result_filter):
         """
         Parse a single ``Choice`` element
 
@@ -358,6 +1134,7 @@ class Parser(object):
             contest: ``Contest`` object corresponding to ``Contest`` element
             result_jurisdiction_lookup: Dictionary mapping jurisdiction names to
                 ``ResultJurisdiction`` objects
+            result_filter: ``ResultFilter`` selecting the results to parse
 
         Returns:
             A ``Choice`` element
@@ -365,7 +1142,7 @@ class Parser(object):
         """
 
         try:
-            party=contest_el.attrib['party']
+            party=self._intern(contest_el.attrib['party'])
         except:
             party=None
 
@@ -377,9 +1154,14 @@ class Parser(object):
             total_votes=int(contest_el.attrib['totalVotes']),
         )
 
-        for vt_el in contest_el.xpath('./VoteType'):
-            vote_type = vt_el.attrib['name']
-            choice.add_result(Result(
+        result_cls = self._result_cls
+        subjurisdiction_votes = self._backend.subjurisdiction_votes
+        match_vote_type = result_filter.match_vote_type
+        for vt_el in self._backend.children(contest_el, 'VoteType'):
+            if not match_vote_type(vt_el.attrib['name']):
+                continue
+            vote_type = self._intern(vt_el.attrib['name'])
+            choice.add_result(result_cls(
               contest=contest,
               vote_type=vote_type,
               jurisdiction=None,
@@ -387,16 +1169,10 @@ class Parser(object):
               choice=choice
             ))
 
-            for subjurisdiction_el in vt_el.xpath('./Precinct') + vt_el.xpath('./County'):
-              if subjurisdiction_el.attrib['name'] in result_jurisdiction_lookup:
-                  subjurisdiction = result_jurisdiction_lookup[subjurisdiction_el.attrib['name']]
-                  choice.add_result(Result(
-                      contest=contest,
-                      vote_type=vote_type,
-                      jurisdiction=subjurisdiction,
-                      votes=int(subjurisdiction_el.attrib['votes']),
-                      choice=choice
-                  ))
+            choice.add_results([
+                result_cls(contest, vote_type, result_jurisdiction_lookup[name], votes, choice)
+                for name, votes in subjurisdiction_votes(vt_el, result_jurisdiction_lookup)
+            ])
         return choice
 
     @classmethod
@@ -421,10 +1197,293 @@ class Parser(object):
         return s == "true"
 
 
+class XPathBackend(object):
+    """
+    Find results in the XML by evaluating XPath expressions
+
+    A backend provides two functions.  ``children(el, tag)`` returns the
+    child elements of ``el`` with a tag.  ``subjurisdiction_votes(vt_el,
+    names)`` returns a list of ``(name, votes)`` tuples for the
+    sub-jurisdiction results of a ``VoteType`` element, for the
+    sub-jurisdictions whose names are in ``names``, with votes converted to
+    integers.
+    """
+    @staticmethod
+    def children(el, tag):
+        return el.xpath('./' + tag)
+
+    @staticmethod
+    def subjurisdiction_votes(vt_el, names):
+        votes = []
+        # The subjurisdiction elements are either ``Precinct`` for county or
+        # city files or ``County`` for state files
+        for subjurisdiction_el in vt_el.xpath('./Precinct') + vt_el.xpath('./County'):
+            if subjurisdiction_el.attrib['name'] in names:
+                votes.append((subjurisdiction_el.attrib['name'],
+                              int(subjurisdiction_el.attrib['votes'])))
+        return votes
+
+
+class FastBackend(object):
+    """
+    Find results in the XML by iterating over child elements
+
+    This avoids compiling and evaluating an XPath expression, and
+    concatenating lists of matches, for every ``VoteType`` element, and reads
+    each attribute once.  See ``XPathBackend`` for the interface.
+    """
+    @staticmethod
+    def children(el, tag):
+        return el.iterchildren(tag)
+
+    @staticmethod
+    def subjurisdiction_votes(vt_el, names):
+        # Precincts before counties, as with ``XPathBackend``
+        els = itertools.chain(vt_el.iterchildren('Precinct'), vt_el.iterchildren('County'))
+        return [(name, int(votes))
+                for name, votes in ((el.get('name'), el.get('votes')) for el in els)
+                if name in names]
+
+
+BACKENDS = {
+    'xpath': XPathBackend,
+    'fast': FastBackend,
+}
+"""Parsing backends, by the name passed to ``Parser``"""
+
+
+PhaseStats = namedtuple('PhaseStats', ['phase', 'seconds', 'elements', 'allocations'])
+"""
+Measurements of a phase of parsing, passed to a ``Parser``'s ``on_phase``.
+
+``seconds`` is the wall time the phase took.  ``elements`` is the number of
+elements, such as contests or jurisdictions, that were parsed, or None if
+they weren't counted.  ``allocations`` is the change in the number of memory
+blocks allocated by the interpreter, which approximates the number of
+objects created, or None if this isn't available, as on Python 2.
+"""
+
+_timer = getattr(time, 'perf_counter', time.time)
+_allocated_blocks = getattr(sys, 'getallocatedblocks', lambda: None)
+
+
+class _Phase(object):
+    """Context manager that measures a phase of parsing"""
+    def __init__(self, callback, name):
+        self._callback = callback
+        self.name = name
+        self.elements = None
+
+    def __enter__(self):
+        self._blocks = _allocated_blocks()
+        self._start = _timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = _timer() - self._start
+        if exc_type is None:
+            blocks = _allocated_blocks()
+            self._callback(PhaseStats(self.name, seconds, self.elements,
+                blocks - self._blocks if blocks is not None else None))
+        return False
+
+
+class _NoPhase(object):
+    """Context manager used in place of ``_Phase`` when nothing is measured"""
+    elements = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class ResultFilter(object):
+    """
+    Criteria for selecting the contests and results to parse
+
+    Contests and vote types are selected using strings, which must match
+    exactly, or compiled regular expressions, which are searched for.  Any
+    criteria that are None match everything.
+
+    """
+    def __init__(self, contests=None, vote_types=None, levels=None):
+        """
+        Args:
+            contests: String, compiled regular expression, or iterable of
+                them, matched against contest keys and text
+            vote_types: String, compiled regular expression, or iterable of
+                them, matched against vote type names
+            levels: Sub-jurisdiction level, or iterable of them
+
+        """
+        self._contests = self._compile(contests)
+        self._vote_types = self._compile(vote_types)
+        if isinstance(levels, six.string_types):
+            levels = [levels]
+        self._levels = frozenset(levels) if levels is not None else None
+
+    @classmethod
+    def _compile(cls, criteria):
+        """
+        Split criteria into a set of strings and a list of patterns
+
+        Returns:
+            A tuple of a frozenset of strings and a list of compiled regular
+            expressions, or None if ``criteria`` is None.
+
+        """
+        if criteria is None:
+            return None
+
+        if isinstance(criteria, six.string_types) or hasattr(criteria, 'search'):
+            criteria = [criteria]
+
+        strings = set()
+        patterns = []
+        for criterion in criteria:
+            if hasattr(criterion, 'search'):
+                patterns.append(criterion)
+            else:
+                strings.add(criterion)
+
+        return frozenset(strings), patterns
+
+    def match_contest(self, key, text):
+        """Return True if a contest with this key and text is selected"""
+        if self._contests is None:
+            return True
+        strings, patterns = self._contests
+        if key in strings or text in strings:
+            return True
+        return text is not None and any(p.search(text) for p in patterns)
+
+    def match_vote_type(self, name):
+        """Return True if results for this vote type are selected"""
+        if self._vote_types is None:
+            return True
+        strings, patterns = self._vote_types
+        return name in strings or any(p.search(name) for p in patterns)
+
+    def match_level(self, level):
+        """Return True if results for this jurisdiction level are selected"""
+        return self._levels is None or level in self._levels
+
+    def filter_jurisdictions(self, result_jurisdiction_lookup):
+        """
+        Limit a jurisdiction lookup to the selected levels
+
+        Args:
+            result_jurisdiction_lookup: Dictionary mapping jurisdiction names
+                to ``ResultJurisdiction`` objects
+
+        Returns:
+            Dictionary containing the items for jurisdictions whose level is
+            selected.
+
+        """
+        if self._levels is None:
+            return result_jurisdiction_lookup
+        return {name: j for name, j in result_jurisdiction_lookup.items()
+                if j.level in self._levels}
+
+
+class ResultIndex(object):
+    """
+    Index of results by contest, choice, jurisdiction and vote type
+
+    Results can be looked up by any combination of the four keys.  An index
+    for each combination is built, in a single pass over the results, the
+    first time that combination is queried, after which lookups take
+    constant time.
+
+    """
+    KEYS = ('contest', 'choice', 'jurisdiction', 'vote_type')
+
+    def __init__(self, results):
+        """
+        Args:
+            results: Sequence of ``Result`` objects
+
+        """
+        self._results = tuple(results)
+        self._keys = [(
+            r.contest.key,
+            r.choice.key if r.choice is not None else None,
+            r.jurisdiction.name if r.jurisdiction is not None else None,
+            r.vote_type,
+        ) for r in self._results]
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self._results)
+
+    def query(self, contest=ANY, choice=ANY, jurisdiction=ANY, vote_type=ANY):
+        """
+        Get the results matching some combination of keys
+
+        Keys that aren't specified match any result.  Choice keys are only
+        unique within a contest, so querying by choice without a contest
+        matches choices with that key in every contest.
+
+        Args:
+            contest: Key of the contest, or a ``Contest`` object.
+            choice: Key of the choice, a ``Choice`` object, or None for
+                results not associated with a choice, such as overvotes.
+            jurisdiction: Name of the jurisdiction, a ``ResultJurisdiction``
+                object, or None for results for the whole jurisdiction of the
+                report.
+            vote_type: Name of the vote type, for example "Election Day".
+
+        Returns:
+            Tuple of ``Result`` objects, in the order they were indexed.
+
+        """
+        if isinstance(contest, Contest):
+            contest = contest.key
+        if isinstance(choice, Choice):
+            choice = choice.key
+        if isinstance(jurisdiction, ResultJurisdiction):
+            jurisdiction = jurisdiction.name
+
+        values = (contest, choice, jurisdiction, vote_type)
+        positions = tuple(i for i, v in enumerate(values) if v is not ANY)
+        if not positions:
+            return self._results
+
+        return self._get_index(positions).get(
+            tuple(values[i] for i in positions), ())
+
+    def _get_index(self, positions):
+        """
+        Get the index for a combination of keys, building it if needed
+
+        Args:
+            positions: Tuple of positions in ``KEYS`` of the keys to index
+
+        Returns:
+            Dictionary mapping tuples of key values to tuples of results.
+
+        """
+        index = self._indexes.get(positions)
+        if index is None:
+            groups = {}
+            for result, keys in zip(self._results, self._keys):
+                groups.setdefault(tuple(keys[i] for i in positions), []).append(result)
+            index = self._indexes[positions] = {k: tuple(v) for k, v in groups.items()}
+        return index
+
+
 class ResultAggregatorMixin(object):
     """
     Mixin class for classes that have related results
     """
+    __slots__ = ()
+
     def _init_results(self):
         """Initialize the list that holds results"""
         self._results = []
@@ -440,6 +1499,12 @@ class ResultAggregatorMixin(object):
         """
         self._results.append(result)
 
+    def add_results(self, results):
+        """
+        Associate an iterable of ``Result`` objects with this object
+        """
+        self._results.extend(results)
+
 
 RESULT_FIELDS = [
     'name',
@@ -509,6 +1574,52 @@ class Contest(ResultAggregatorMixin, namedtuple('ContestBase', CONTEST_FIELDS)):
         self._results.extend(c.results)
 
 
+class LazyContest(Contest):
+    """
+    A ``Contest`` whose choices and results are parsed on first access
+
+    These are created by a ``Parser`` in lazy mode.  The choices and
+    results are parsed once, even when they're first accessed from several
+    threads at the same time.  Threads wait for the contest to be loaded
+    rather than seeing a partial list.
+    """
+    def __new__(cls, *args, **kwargs):
+        self = super(LazyContest, cls).__new__(cls, *args, **kwargs)
+        self._loader = None
+        # Held while loading, and None once the contest is loaded
+        self._load_lock = threading.RLock()
+        # Fingerprint of the contest's XML, computed by
+        # ``Parser._contest_digest()``
+        self._digest = None
+        return self
+
+    def _load(self):
+        """Parse the choices and results, if that hasn't happened yet"""
+        lock = self._load_lock
+        if lock is None:
+            return
+
+        with lock:
+            loader = self._loader
+            if loader is not None:
+                # Drop the reference to the XML element, so it can be freed
+                self._loader = None
+                loader(self)
+                self._load_lock = None
+
+    @property
+    def results(self):
+        """Return the list of associated Result objects"""
+        self._load()
+        return self._results
+
+    @property
+    def choices(self):
+        """``Choice`` objects associated with this contest"""
+        self._load()
+        return self._choices
+
+
 CHOICE_FIELDS = [
     'contest',
     'key',
@@ -545,6 +1656,10 @@ RESULT_FIELDS = [
 
 class Result(namedtuple('ResultBase', RESULT_FIELDS)):
     """Votes received for a choice in a contest"""
+    # There is one of these for every vote count in a results file, so avoid
+    # a per-instance ``__dict__``.
+    __slots__ = ()
+
     def __new__(cls, *args, **kwargs):
         self = super(Result, cls).__new__(cls, *args, **kwargs)
         if self.jurisdiction is not None:
@@ -552,3 +1667,60 @@ class Result(namedtuple('ResultBase', RESULT_FIELDS)):
             # Jurisdiction's list of results
             self.jurisdiction.add_result(self)
         return self
+
+
+class LeanResult(Result):
+    """
+    A ``Result`` that isn't added to its jurisdiction's list of results
+
+    These are created by a ``Parser`` in lean mode.
+    """
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        # Skip Result.__new__, which links the result to its jurisdiction
+        return super(Result, cls).__new__(cls, *args, **kwargs)
+
+
+RESULT_RECORD_FIELDS = [
+    'contest_key',
+    'contest_text',
+    'choice_key',
+    'choice_text',
+    'choice_party',
+    'vote_type',
+    'jurisdiction_name',
+    'jurisdiction_level',
+    'votes',
+]
+
+
+class ResultRecord(namedtuple('ResultRecordBase', RESULT_RECORD_FIELDS)):
+    """
+    A flat representation of a ``Result``
+
+    Rather than referencing ``Contest``, ``Choice`` and
+    ``ResultJurisdiction`` objects, records carry the identifying attributes
+    of each.
+
+    """
+    __slots__ = ()
+
+
+Change = namedtuple('Change', ['key', 'previous', 'current'])
+"""An item that differs between two versions of a results file"""
+
+
+class ResultsDiff(namedtuple('ResultsDiffBase', ['contests', 'choices', 'results',
+        'jurisdictions'])):
+    """
+    Differences between two versions of a results file
+
+    Each attribute is a list of ``Change`` objects.
+
+    """
+    __slots__ = ()
+
+    def is_empty(self):
+        """Return True if nothing changed"""
+        return not any(self)
@@ -0,0 +1,113 @@
+"""
+Pooled HTTP sessions for requests to Clarity results sites
+
+Every request that ``Jurisdiction`` makes goes through a
+``requests.Session``, so connections to the results site are kept alive and
+reused, rather than paying for a new TCP and TLS handshake per request.  By
+default all jurisdictions share one session, created the first time it's
+needed.  A session with different pooling, timeout or retry settings can be
+created with ``make_session()`` and either passed to ``Jurisdiction``
+objects or installed as the default with ``set_default_session()``.
+
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = 10
+"""Default maximum number of connections kept open to each host"""
+
+DEFAULT_TIMEOUT = (5, 30)
+"""Default connect and read timeouts, in seconds"""
+
+DEFAULT_RETRIES = 3
+"""Default number of times a failed request is retried"""
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+"""Response status codes for which requests are retried"""
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+class ClaritySession(requests.Session):
+    """
+    ``requests.Session`` that applies a default timeout to every request
+
+    ``requests`` waits forever for a response unless a timeout is given, so
+    one stalled connection could hang a whole crawl.
+    """
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            timeout: Timeout in seconds for requests that don't specify one,
+                either a number or a tuple of connect and read timeouts, as
+                accepted by ``requests``.  None to wait forever.
+
+        """
+        super(ClaritySession, self).__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super(ClaritySession, self).request(method, url, **kwargs)
+
+
+def make_session(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES, backoff_factor=0.5):
+    """
+    Create a session for requests to Clarity results sites
+
+    Args:
+        pool_size: Maximum number of connections kept open to each host.
+            This should be at least the number of requests made
+            concurrently, or connections will be discarded and re-opened.
+        timeout: Default timeout in seconds.  See ``ClaritySession``.
+        retries: Number of times a request is retried after a connection
+            error or a response with one of the ``RETRY_STATUSES``.  0 to
+            not retry.
+        backoff_factor: Factor in seconds for the exponential backoff
+            between retries.
+
+    Returns:
+        A ``ClaritySession`` object.
+
+    """
+    session = ClaritySession(timeout=timeout)
+    retry = Retry(total=retries, backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+        max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_default_session():
+    """
+    Get the session shared by jurisdictions that aren't given one
+
+    The session is created with ``make_session()``'s defaults the first
+    time this is called.
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = make_session()
+        return _default_session
+
+
+def set_default_session(session):
+    """
+    Replace the session shared by jurisdictions that aren't given one
+
+    Args:
+        session: A ``requests.Session`` object, or None to create a new
+            default session the next time one is needed.
+
+    """
+    global _default_session
+    with _default_session_lock:
+        _default_session = session
@@ -0,0 +1,320 @@
+"""
+Store successive versions of a results file as a time series
+
+On election night, results sites publish a new version of their results
+files every few minutes.  ``SnapshotStore`` keeps the values parsed from
+each version in a single append-only file, so questions like "how did a
+choice's votes change over the night?" can be answered without re-parsing
+any XML.  Only the values that changed since the previous version are
+written for each version.
+
+Snapshots are stored as compressed pickles, so only open stores that were
+written by trusted users.
+
+"""
+from collections import namedtuple
+import io
+import os
+import pickle
+import struct
+import zlib
+
+from clarify.parser import CONTEST_FIELDS, ResultJurisdiction
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Each record in a store is a zlib-compressed pickle, preceded by its length
+_LENGTH = struct.Struct('>I')
+
+Snapshot = namedtuple('Snapshot', ['timestamp', 'version', 'election_name',
+    'region', 'total_voters', 'ballots_cast'])
+"""A version of a results file in a ``SnapshotStore``"""
+
+Point = namedtuple('Point', ['timestamp', 'version', 'value'])
+"""
+The value of something in one snapshot.  ``value`` is None if it wasn't in
+the snapshot's results file.
+"""
+
+
+class SnapshotStore(object):
+    """
+    Append-only store of successive versions of a results file
+
+    Snapshots appended to the file by other ``SnapshotStore`` objects, such
+    as in another process, are read before each snapshot is appended, but
+    not otherwise.  Only one process should append to a file at a time.
+
+    Four kinds of values are stored for each snapshot, and can be queried
+    as a series:
+
+    * The votes of each result, keyed by contest key, choice key, vote type
+      and jurisdiction name.  See ``result_series()``.
+    * The text, party and total votes of each choice.  See
+      ``choice_series()``.
+    * The attributes of each contest, such as ``precincts_reported``.  See
+      ``contest_series()``.
+    * The attributes of each result jurisdiction, such as ``ballots_cast``.
+      See ``jurisdiction_series()``.
+
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path: Path of the file to store snapshots in.  It is created when
+                the first snapshot is appended.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version of
+                this module.
+
+        """
+        self.path = path
+        self._snapshots = []
+        # Map each kind of value to a dictionary mapping keys to their
+        # current values
+        self._state = {kind: {} for kind in _KINDS}
+        # Map each kind of value to a dictionary mapping keys to a list of
+        # (snapshot index, value) changes
+        self._changes = {kind: {} for kind in _KINDS}
+        # Offset of the end of the last complete record that was read
+        self._size = 0
+        self._load()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    @property
+    def snapshots(self):
+        """List of ``Snapshot`` objects, in the order they were appended"""
+        return list(self._snapshots)
+
+    def append(self, parser, version=None):
+        """
+        Add a parsed results file to the store
+
+        Args:
+            parser: ``Parser`` object that has parsed a results file
+            version: Optional string identifying the version of the results
+                file, such as the Clarity version number in its URL.
+
+        Returns:
+            True if the snapshot was added, or False if a snapshot with the
+            same timestamp and version is already stored.
+
+        """
+        with io.open(os.open(self.path, os.O_RDWR | os.O_CREAT), 'r+b') as f:
+            # Another store may have appended to the file since it was
+            # read, and the delta must be against its latest snapshot
+            self._read(f)
+            if any(s.timestamp == parser.timestamp and s.version == version
+                   for s in self._snapshots):
+                return False
+
+            snapshot = Snapshot(parser.timestamp, version, parser.election_name,
+                parser.region, parser.total_voters, parser.ballots_cast)
+            values = _parser_values(parser)
+            delta = {}
+            for kind in _KINDS:
+                current = self._state[kind]
+                new = values[kind]
+                changed = {key: value for key, value in new.items()
+                           if current.get(key, _MISSING) != value}
+                # Record values that are no longer in the results file as None
+                changed.update((key, None) for key in current
+                               if key not in new and current[key] is not None)
+                delta[kind] = changed
+
+            self._write(f, {'snapshot': tuple(snapshot), 'delta': delta})
+        self._apply(snapshot, delta)
+        return True
+
+    def result_series(self, contest, choice=None, vote_type=None, jurisdiction=None):
+        """
+        Get the votes of a result in each snapshot
+
+        Args:
+            contest: Key of the contest
+            choice: Key of the choice, or None for results not associated
+                with a choice, such as overvotes
+            vote_type: Name of the vote type
+            jurisdiction: Name of the jurisdiction, or None for the result
+                for the whole jurisdiction of the report
+
+        Returns:
+            List of ``Point`` objects, one per snapshot.
+
+        """
+        return self._series('results', (contest, choice, vote_type, jurisdiction))
+
+    def choice_series(self, contest, choice, attribute='total_votes'):
+        """
+        Get an attribute of a choice in each snapshot
+
+        Args:
+            contest: Key of the contest
+            choice: Key of the choice
+            attribute: "text", "party" or "total_votes"
+
+        Returns:
+            List of ``Point`` objects, one per snapshot.
+
+        """
+        return self._series('choices', (contest, choice), _CHOICE_VALUE_FIELDS.index(attribute))
+
+    def contest_series(self, contest, attribute):
+        """
+        Get an attribute of a contest in each snapshot
+
+        Args:
+            contest: Key of the contest
+            attribute: Name of a ``Contest`` attribute, for example
+                "precincts_reported"
+
+        Returns:
+            List of ``Point`` objects, one per snapshot.
+
+        """
+        return self._series('contests', contest, CONTEST_FIELDS.index(attribute))
+
+    def jurisdiction_series(self, name, attribute):
+        """
+        Get an attribute of a result jurisdiction in each snapshot
+
+        Args:
+            name: Name of the jurisdiction
+            attribute: Name of a ``ResultJurisdiction`` attribute, for
+                example "ballots_cast" or "percent_reporting"
+
+        Returns:
+            List of ``Point`` objects, one per snapshot.
+
+        """
+        return self._series('jurisdictions', name, ResultJurisdiction._fields.index(attribute))
+
+    def _series(self, kind, key, field=None):
+        changes = iter(self._changes[kind].get(key, ()))
+        change = next(changes, None)
+        value = None
+        points = []
+        for i, snapshot in enumerate(self._snapshots):
+            # Carry the value forward until it next changes
+            while change is not None and change[0] == i:
+                value = change[1]
+                change = next(changes, None)
+            if field is not None and value is not None:
+                points.append(Point(snapshot.timestamp, snapshot.version, value[field]))
+            else:
+                points.append(Point(snapshot.timestamp, snapshot.version, value))
+        return points
+
+    def _apply(self, snapshot, delta):
+        index = len(self._snapshots)
+        self._snapshots.append(snapshot)
+        for kind, changed in delta.items():
+            self._state[kind].update(changed)
+            changes = self._changes[kind]
+            for key, value in changed.items():
+                changes.setdefault(key, []).append((index, value))
+
+    def _write(self, f, record):
+        """
+        Append a record to the file, after the records that have been read
+
+        A partly written record at the end of the file, which is ignored when
+        reading, is overwritten, since records appended after it would be
+        read as part of it.
+        """
+        data = _encode(record)
+        if self._size == 0:
+            data = _encode({'format': SNAPSHOT_FORMAT_VERSION}) + data
+        f.seek(self._size)
+        f.truncate()
+        f.write(data)
+        self._size += len(data)
+
+    def _load(self):
+        try:
+            f = io.open(self.path, 'rb')
+        except (IOError, OSError):
+            return
+
+        with f:
+            self._read(f)
+
+    def _read(self, f):
+        """Read the complete records after the ones that have been read"""
+        f.seek(self._size)
+        for record in _iter_records(f):
+            if self._size == 0:
+                if record.get('format') != SNAPSHOT_FORMAT_VERSION:
+                    raise ValueError("Unsupported snapshot store format {}".format(
+                        record.get('format')))
+            else:
+                self._apply(Snapshot(*record['snapshot']), record['delta'])
+            self._size = f.tell()
+
+
+_KINDS = ('results', 'choices', 'contests', 'jurisdictions')
+
+_CHOICE_VALUE_FIELDS = ['text', 'party', 'total_votes']
+
+# Placeholder for a value that isn't in the store yet, which compares unequal
+# to everything, including None
+_MISSING = object()
+
+
+def _parser_values(parser):
+    """
+    Get the values to store from a ``Parser``
+
+    Returns:
+        Dictionary mapping each kind of value to a dictionary mapping keys to
+        values.
+
+    """
+    results = {}
+    choices = {}
+    contests = {}
+    for contest in parser.contests:
+        contests[contest.key] = tuple(contest)
+        for choice in contest.choices:
+            choices[(contest.key, choice.key)] = (choice.text, choice.party,
+                                                  choice.total_votes)
+        for result in contest.results:
+            key = (contest.key,
+                   result.choice.key if result.choice is not None else None,
+                   result.vote_type,
+                   result.jurisdiction.name if result.jurisdiction is not None else None)
+            results[key] = result.votes
+
+    return {
+        'results': results,
+        'choices': choices,
+        'contests': contests,
+        'jurisdictions': {j.name: tuple(j) for j in parser.result_jurisdictions},
+    }
+
+
+def _encode(record):
+    data = zlib.compress(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+    return _LENGTH.pack(len(data)) + data
+
+
+def _iter_records(f):
+    """
+    Read the records in a store
+
+    A record that was only partly written, for example because the process
+    writing it was killed, is ignored, and is overwritten by the next record
+    appended to the store.
+    """
+    while True:
+        prefix = f.read(_LENGTH.size)
+        if len(prefix) < _LENGTH.size:
+            return
+        length, = _LENGTH.unpack(prefix)
+        data = f.read(length)
+        if len(data) < length:
+            return
+        yield pickle.loads(zlib.decompress(data))
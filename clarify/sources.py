@@ -0,0 +1,246 @@
+"""
+Open report files in the forms Clarity publishes them
+
+Clarity publishes its reports as zip archives, such as
+``reports/detailxml.zip``.  The helpers in this module let the parsers read
+such archives, as well as uncompressed files, directly from a filename, a
+file-like object or an in-memory buffer, without extracting anything to a
+temporary file.
+
+"""
+import codecs
+import io
+import mmap
+import os
+import zipfile
+from contextlib import contextmanager
+
+import six
+
+ZIP_SIGNATURE = b'PK\x03\x04'
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+"""Types of buffers that can be read in place"""
+
+
+@contextmanager
+def open_report(f, extension='.xml'):
+    """
+    Open a report file for parsing, extracting it from a zip archive if needed
+
+    Args:
+        f: String containing a filename, a file-like object, or a buffer
+            such as ``bytes``, ``bytearray``, ``memoryview`` or ``mmap.mmap``
+            holding either the report itself or a zip archive containing it.
+            On Python 2, where ``bytes`` is ``str``, a ``str`` is taken to
+            be a buffer if it starts like an XML document or a zip archive,
+            and a filename otherwise.
+        extension: Extension of the report file to look for inside zip
+            archives.
+
+    Yields:
+        A filename or file-like object that can be passed to lxml.  Members
+        of zip archives are decompressed incrementally as they are read.
+
+    Raises:
+        ValueError: If ``f`` is a zip archive that doesn't contain a file
+            with the given extension.
+
+    """
+    if is_filename(f):
+        if zipfile.is_zipfile(f):
+            with _open_zip_member(f, extension) as member:
+                yield member
+        else:
+            yield f
+    elif isinstance(f, BUFFER_TYPES):
+        with BufferReader(f) as reader:
+            if reader.peek_signature() == ZIP_SIGNATURE:
+                with _open_zip_member(reader, extension) as member:
+                    yield member
+            else:
+                yield reader
+    elif _peek_signature(f) == ZIP_SIGNATURE:
+        with _open_zip_member(f, extension) as member:
+            yield member
+    else:
+        yield f
+
+
+def is_filename(f):
+    """
+    Return True if ``open_report()`` would treat ``f`` as a filename
+
+    Filenames are strings or ``os.PathLike`` objects.  See ``open_report()``
+    for how strings are treated on Python 2.
+    """
+    if isinstance(f, getattr(os, 'PathLike', ())):
+        return True
+    if not isinstance(f, six.string_types):
+        return False
+    if six.PY2 and isinstance(f, bytes):
+        return not (f.startswith(ZIP_SIGNATURE) or f.lstrip()[:1] == b'<' or
+                    f.startswith(codecs.BOM_UTF8))
+    return True
+
+
+@contextmanager
+def _open_zip_member(f, extension):
+    """
+    Open the first member of a zip archive with the given extension
+
+    Args:
+        f: Filename or seekable file-like object for the zip archive
+        extension: Extension of the member to open
+
+    Yields:
+        A file-like object for the member.
+
+    """
+    with zipfile.ZipFile(f) as archive:
+        name = find_member(archive, extension)
+        with archive.open(name) as member:
+            yield member
+
+
+def find_member(archive, extension):
+    """
+    Find the name of the first file in a zip archive with an extension
+
+    Args:
+        archive: ``zipfile.ZipFile`` object
+        extension: String containing the extension, for example ".xml"
+
+    Returns:
+        String containing the name of the member.
+
+    Raises:
+        ValueError: If the archive contains no matching file.
+
+    """
+    for name in archive.namelist():
+        if name.lower().endswith(extension):
+            return name
+
+    raise ValueError("No {} file found in zip archive".format(extension))
+
+
+def _peek_signature(f):
+    """
+    Read the first bytes of a file-like object without consuming them
+
+    Returns:
+        The first four bytes of the file, or None if the file isn't seekable.
+
+    """
+    try:
+        position = f.tell()
+        signature = f.read(len(ZIP_SIGNATURE))
+        f.seek(position)
+    except (AttributeError, IOError, OSError):
+        return None
+    return signature
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file-like object over a buffer
+
+    Unlike ``io.BytesIO``, this doesn't copy the buffer, so it can be used
+    to read a large ``memoryview`` or memory-mapped file in place.
+
+    """
+    def __init__(self, buf):
+        super(BufferReader, self).__init__()
+        self._view = _byte_view(buf)
+        self._position = 0
+
+    def peek_signature(self):
+        return _slice_bytes(self._view, 0, len(ZIP_SIGNATURE))
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError("Invalid whence ({})".format(whence))
+
+        if position < 0:
+            raise ValueError("Negative seek position {}".format(position))
+
+        self._position = position
+        return position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            end = len(self._view)
+        else:
+            end = min(self._position + size, len(self._view))
+        data = _slice_bytes(self._view, self._position, end)
+        self._position = max(self._position, end)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            _release(self._view)
+        super(BufferReader, self).close()
+
+
+def _byte_view(buf):
+    """
+    Get a view of a buffer that is addressed by byte, without copying it
+
+    Returns:
+        A ``memoryview``, or on Python 2, a ``buffer`` for objects other
+        than ``memoryview`` objects, since Python 2's ``mmap.mmap`` only
+        supports the old buffer protocol.
+
+    """
+    if six.PY2 and not isinstance(buf, memoryview):
+        return buffer(buf)
+
+    view = memoryview(buf)
+    if view.ndim != 1 or view.itemsize != 1:
+        if not hasattr(view, 'cast'):
+            raise ValueError("Only buffers of bytes are supported on Python 2")
+        # Address the buffer by byte
+        cast = view.cast('B')
+        view.release()
+        view = cast
+    return view
+
+
+def _slice_bytes(view, start, end):
+    """Copy part of a view returned by ``_byte_view()`` to ``bytes``"""
+    data = view[start:end]
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    # Slices of Python 2 buffers are already strings
+    return data
+
+
+def _release(view):
+    """Release a view returned by ``_byte_view()``, if that's supported"""
+    # Python 2's memoryview and buffer objects can't be released
+    if hasattr(view, 'release'):
+        view.release()
@@ -0,0 +1,280 @@
+"""
+Parse jurisdiction-wide totals from summary report files
+
+Along with ``detailxml.zip``, Clarity publishes ``reports/summary.zip``, a
+zipped CSV file with one row per choice holding only the totals for the
+whole jurisdiction.  It's a fraction of the size of the detail report, so
+it's much cheaper to download and parse when results for each precinct or
+county aren't needed.
+
+"""
+from contextlib import contextmanager
+import csv
+import io
+import re
+
+import six
+
+from clarify.parser import Choice, Contest, ResultFilter, Result
+from clarify.sources import open_report
+
+# Rows without a choice that hold election-wide turnout, mapped to the
+# attribute of ``SummaryParser`` that they set
+TURNOUT_ROWS = {
+    'registered voters - total': 'total_voters',
+    'ballots cast - total': 'ballots_cast',
+    'voter turnout - total': 'voter_turnout',
+}
+
+# Columns of the number of precincts, or of other areas such as counties,
+# for example "num Precinct total" or "num Area rptg"
+_AREA_COLUMN_RE = re.compile(r'^num \w+ (total|rptg)$', re.IGNORECASE)
+
+
+class SummaryParser(object):
+    """
+    Parser for a jurisdiction's summary CSV report files
+
+    This produces the same ``Contest`` and ``Choice`` objects as ``Parser``,
+    with the total votes of each choice, but without any results for
+    sub-jurisdictions or vote types.  The only results are the overvotes and
+    undervotes of each contest, with the "Overvotes" and "Undervotes" vote
+    types.  Contests and choices are identified by their text, since the
+    summary report doesn't include their keys, so their ``key`` attributes
+    are None.
+
+    An example for such a file can be found at
+    http://results.enr.clarityelections.com/KY/Adair/15263/27401/reports/summary.zip
+
+    """
+    def __init__(self):
+        self.total_voters = None
+        self.ballots_cast = None
+        self.voter_turnout = None
+        self._contests = []
+        self._contest_lookup = {}
+        self._results = None
+
+    def parse(self, f, contests=None):
+        """
+        Parse the summary CSV file, populating attributes
+
+        Args:
+            f: String containing filename, file-like object or buffer, such
+               as ``bytes``, for the CSV report file to be parsed, or for a
+               zip archive, such as ``summary.zip``, containing it.
+            contests: If specified, only parse contests matching these
+               criteria, as with ``Parser.parse()``.
+
+        """
+        result_filter = ResultFilter(contests)
+        self.total_voters = None
+        self.ballots_cast = None
+        self.voter_turnout = None
+        self._contests = []
+        self._contest_lookup = {}
+        self._results = None
+
+        with open_report(f, extension='.csv') as source:
+            with _read_rows(source) as rows:
+                columns = self._parse_header(next(rows, []))
+                for row in rows:
+                    self._parse_row(row, columns, result_filter)
+
+    @property
+    def contests(self):
+        return self._contests
+
+    @property
+    def results(self):
+        """Tuple of the overvote and undervote results of all contests"""
+        if self._results is None:
+            results = []
+            for c in self.contests:
+                results.extend(c.results)
+            self._results = tuple(results)
+        return self._results
+
+    def get_contest(self, text):
+        """
+        Get a contest object by text.
+
+        Args:
+            text: The text of the contest.
+
+        Returns:
+            Contest object matching text
+
+        """
+        return self._contest_lookup[text]
+
+    def _parse_header(self, header):
+        """
+        Find the columns of a summary CSV file
+
+        Returns:
+            Dictionary mapping column names, normalized to lower case, or
+            "area total" and "area rptg" for the area columns, to their
+            positions.
+
+        Raises:
+            ValueError: If the header doesn't have the columns that are
+                required for parsing.
+
+        """
+        columns = {}
+        for i, name in enumerate(header):
+            name = name.strip().lower()
+            m = _AREA_COLUMN_RE.match(name)
+            if m is not None:
+                name = 'area ' + m.group(1).lower()
+            columns.setdefault(name, i)
+
+        missing = [name for name in ('contest name', 'choice name', 'total votes')
+                   if name not in columns]
+        if missing:
+            raise ValueError("Summary file is missing columns: {}".format(
+                ", ".join(missing)))
+        return columns
+
+    def _parse_row(self, row, columns, result_filter):
+        def value(name, fn=None):
+            i = columns.get(name)
+            if i is None or i >= len(row) or row[i].strip() == '':
+                return None
+            s = row[i].strip()
+            return fn(s) if fn is not None else s
+
+        contest_text = value('contest name')
+        if contest_text is None:
+            return
+
+        choice_text = value('choice name')
+        if choice_text is None:
+            attr = TURNOUT_ROWS.get(contest_text.lower())
+            if attr == 'voter_turnout':
+                setattr(self, attr, value('total votes', _parse_float))
+            elif attr is not None:
+                setattr(self, attr, value('total votes', _parse_int))
+            return
+
+        contest = self._contest_lookup.get(contest_text)
+        if contest is None:
+            if not result_filter.match_contest(None, contest_text):
+                return
+            contest = self._parse_contest(contest_text, value)
+
+        contest.add_choice(Choice(
+            contest=contest,
+            key=None,
+            text=choice_text,
+            party=value('party name'),
+            total_votes=value('total votes', _parse_int),
+        ))
+
+    def _parse_contest(self, text, value):
+        """
+        Create a ``Contest`` from the first row of its choices
+
+        Returns:
+            The new ``Contest`` object, which is added to ``contests``.
+
+        """
+        contest = Contest(
+            key=None,
+            text=text,
+            vote_for=value('vote for', _parse_int),
+            is_question=None,
+            precincts_reporting=None,
+            precincts_participating=value('area total', _parse_int),
+            precincts_reported=value('area rptg', _parse_int),
+            counties_participating=None,
+            counties_reported=None,
+        )
+        for vote_type, column in (('Undervotes', 'under votes'),
+                                  ('Overvotes', 'over votes')):
+            votes = value(column, _parse_int)
+            if votes is not None:
+                contest.add_result(Result(contest=contest, vote_type=vote_type,
+                    jurisdiction=None, votes=votes, choice=None))
+
+        self._contests.append(contest)
+        self._contest_lookup[text] = contest
+        return contest
+
+
+def _parse_int(s):
+    """Parse an integer that may have thousands separators, such as 28,162"""
+    return int(s.replace(',', ''))
+
+
+def _parse_float(s):
+    """Parse a number that may be a percentage, such as 21.04%"""
+    return float(s.rstrip('%').replace(',', ''))
+
+
+@contextmanager
+def _read_rows(source):
+    """
+    Read the rows of a CSV file
+
+    A file-like object is left open, but a filename is opened and closed.
+
+    Yields:
+        An iterator over the rows, as lists of text strings.
+
+    """
+    if six.PY2:
+        # Python 2's csv module only reads byte strings
+        with _open_binary(source) as f:
+            yield _decode_rows(csv.reader(f))
+    else:
+        with _open_text(source) as f:
+            yield csv.reader(f)
+
+
+@contextmanager
+def _open_text(source):
+    """
+    Open a filename or binary file-like object as text for the csv module
+
+    A file-like object is left open, but a filename is opened and closed.
+    """
+    if isinstance(source, six.string_types):
+        with io.open(source, encoding='utf-8-sig', newline='') as f:
+            yield f
+    elif isinstance(source, io.TextIOBase):
+        yield source
+    else:
+        f = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+        try:
+            yield f
+        finally:
+            f.detach()
+
+
+@contextmanager
+def _open_binary(source):
+    """
+    Open a filename as an iterator over lines of bytes, for Python 2
+
+    A file-like object is left open, but a filename is opened and closed.
+    """
+    if isinstance(source, six.string_types):
+        with io.open(source, 'rb') as f:
+            yield f
+    elif isinstance(source, io.TextIOBase):
+        yield (line.encode('utf-8') for line in source)
+    else:
+        yield source
+
+
+def _decode_rows(rows):
+    """Decode rows of UTF-8 byte strings, skipping a byte order mark"""
+    first = True
+    for row in rows:
+        row = [value.decode('utf-8') for value in row]
+        if first and row:
+            row[0] = row[0].lstrip(u'\ufeff')
+            first = False
+        yield row
@@ -0,0 +1,517 @@
+"""
+Columnar, NumPy-backed storage for parsed election results
+
+Rather than representing each vote count as its own ``Result`` object,
+a ``ResultTable`` stores vote counts in a single integer array alongside
+integer codes identifying the contest, choice, jurisdiction and vote type of
+each count.  The codes index into small label tables.
+
+NumPy is an optional dependency of clarify.  It only needs to be installed
+to use this module.  Exporting a table to pandas or Arrow additionally
+requires pandas or pyarrow to be installed.
+
+"""
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+
+ContestLabel = namedtuple('ContestLabel', ['key', 'text'])
+"""Label for a contest code"""
+
+ChoiceLabel = namedtuple('ChoiceLabel', ['contest', 'key', 'text', 'party',
+    'total_votes'])
+"""Label for a choice code.  ``contest`` is the code of the choice's contest."""
+
+JurisdictionLabel = namedtuple('JurisdictionLabel', ['name', 'level',
+    'total_voters', 'ballots_cast'])
+"""Label for a jurisdiction code"""
+
+ContestMatrix = namedtuple('ContestMatrix', ['votes', 'choices', 'vote_types'])
+"""
+Votes for a contest arranged as a (choice, jurisdiction, vote type) array.
+
+``choices`` and ``vote_types`` are arrays of the codes that correspond to
+positions along the first and last axes of ``votes``.  The middle axis
+follows the order of the table's ``jurisdictions``.
+"""
+
+
+class ResultTable(object):
+    """
+    Election results stored as parallel arrays, one element per result
+
+    Attributes:
+        votes: Array of vote counts
+        contest: Array of indexes into ``contests``
+        choice: Array of indexes into ``choices``, or -1 for results not
+            associated with a choice, such as overvotes and undervotes
+        jurisdiction: Array of indexes into ``jurisdictions``, or -1 for
+            results for the whole jurisdiction of the report
+        vote_type: Array of indexes into ``vote_types``
+        contests: List of ``ContestLabel`` objects
+        choices: List of ``ChoiceLabel`` objects
+        jurisdictions: List of ``JurisdictionLabel`` objects
+        vote_types: List of vote type names
+
+    Rows are grouped by contest, in the order the contests appear in the
+    results file.
+
+    """
+    def __init__(self, votes, contest, choice, jurisdiction, vote_type,
+            contests, choices, jurisdictions, vote_types):
+        self.votes = votes
+        self.contest = contest
+        self.choice = choice
+        self.jurisdiction = jurisdiction
+        self.vote_type = vote_type
+        self.contests = contests
+        self.choices = choices
+        self.jurisdictions = jurisdictions
+        self.vote_types = vote_types
+
+    def __len__(self):
+        return len(self.votes)
+
+    @classmethod
+    def from_parser(cls, parser):
+        """
+        Build a table from the results of a ``Parser``
+
+        Rows are in the same order as the parser's ``results``.  No Python
+        objects are created per result, so this is much cheaper than
+        building a row per result from the ``Result`` objects.
+
+        Args:
+            parser: ``Parser`` object that has parsed a results file
+
+        Returns:
+            A ``ResultTable`` object.
+
+        """
+        builder = ResultTableBuilder()
+        jurisdiction_codes = {}
+        for j in parser.result_jurisdictions:
+            jurisdiction_codes[j.name] = builder.add_jurisdiction(j.name, j.level,
+                j.total_voters, j.ballots_cast)
+
+        add_result = builder.add_result
+        for contest in parser.contests:
+            contest_code = builder.add_contest(contest.key, contest.text)
+            # Choices are namedtuples, which hash by value, so look them up
+            # by identity instead
+            choice_codes = {}
+            for choice in contest.choices:
+                choice_codes[id(choice)] = builder.add_choice(contest_code,
+                    choice.key, choice.text, choice.party, choice.total_votes)
+
+            for result in contest.results:
+                choice = result.choice
+                jurisdiction = result.jurisdiction
+                add_result(contest_code,
+                    choice_codes[id(choice)] if choice is not None else -1,
+                    jurisdiction_codes[jurisdiction.name] if jurisdiction is not None else -1,
+                    result.vote_type, result.votes)
+
+        return builder.build()
+
+    def to_dataframe(self):
+        """
+        Build a pandas ``DataFrame`` with one row per result
+
+        The contest, choice, party, vote_type and jurisdiction columns are
+        categoricals built from the table's codes, so no Python object is
+        created per row.  Results not associated with a choice, or for the
+        whole jurisdiction of the report, have missing values in the choice
+        and party, or jurisdiction, columns.  The ``votes`` array is shared
+        with the table rather than copied, where pandas allows.
+
+        This requires pandas to be installed.
+
+        Returns:
+            A ``pandas.DataFrame`` object.
+
+        """
+        import pandas as pd
+
+        columns = [(name, pd.Categorical.from_codes(codes, categories))
+                   for name, codes, categories in self._dictionary_columns()]
+        columns.append(('votes', self.votes))
+        return pd.DataFrame(dict(columns), columns=[name for name, _column in columns],
+            copy=False)
+
+    def to_arrow(self):
+        """
+        Build a ``pyarrow.Table`` with one row per result
+
+        The contest, choice, party, vote_type and jurisdiction columns are
+        dictionary-encoded, with nulls where a result isn't associated with a
+        choice or is for the whole jurisdiction of the report.  The
+        ``votes`` column is a zero-copy view of the table's ``votes`` array.
+
+        This requires pyarrow to be installed.
+
+        Returns:
+            A ``pyarrow.Table`` object.
+
+        """
+        import pyarrow as pa
+
+        arrays = []
+        names = []
+        for name, codes, categories in self._dictionary_columns():
+            indices = pa.array(codes, mask=codes < 0)
+            arrays.append(pa.DictionaryArray.from_arrays(indices,
+                pa.array(categories, type=pa.string())))
+            names.append(name)
+        arrays.append(pa.array(self.votes))
+        names.append('votes')
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def _dictionary_columns(self):
+        """
+        Get the label columns of the table as dictionary-encoded arrays
+
+        Labels such as choice text can repeat across contests, so the codes
+        are mapped to the distinct labels.
+
+        Returns:
+            List of ``(name, codes, categories)`` tuples, where ``codes`` is
+            an array of indexes into the list ``categories``, with -1 for
+            missing values.
+
+        """
+        contests, contest_codes = _distinct([c.text for c in self.contests])
+        choices, choice_codes = _distinct([c.text for c in self.choices])
+        parties, party_codes = _distinct([c.party for c in self.choices])
+        vote_types, vote_type_codes = _distinct(self.vote_types)
+        jurisdictions, jurisdiction_codes = _distinct([j.name for j in self.jurisdictions])
+        return [
+            ('contest', _take(contest_codes, self.contest), contests),
+            ('choice', _take(choice_codes, self.choice), choices),
+            ('party', _take(party_codes, self.choice), parties),
+            ('vote_type', _take(vote_type_codes, self.vote_type), vote_types),
+            ('jurisdiction', _take(jurisdiction_codes, self.jurisdiction), jurisdictions),
+        ]
+
+    @property
+    def nbytes(self):
+        """Number of bytes used by the table's arrays"""
+        return (self.votes.nbytes + self.contest.nbytes + self.choice.nbytes +
+                self.jurisdiction.nbytes + self.vote_type.nbytes)
+
+    def contest_code(self, text):
+        """
+        Get the code for a contest by text.
+
+        Args:
+            text (str): The text of the contest.
+
+        Returns:
+            Integer index into ``contests``.
+
+        """
+        return self._code(self.contests, 'text', text)
+
+    def jurisdiction_code(self, name):
+        """
+        Get the code for a jurisdiction by name.
+
+        Args:
+            name (str): Name of the jurisdiction.
+
+        Returns:
+            Integer index into ``jurisdictions``.
+
+        """
+        return self._code(self.jurisdictions, 'name', name)
+
+    def vote_type_code(self, name):
+        """
+        Get the code for a vote type by name.
+
+        Args:
+            name (str): Name of the vote type, for example "Election Day".
+
+        Returns:
+            Integer index into ``vote_types``.
+
+        """
+        try:
+            return self.vote_types.index(name)
+        except ValueError:
+            raise KeyError(name)
+
+    def labels(self, column):
+        """
+        Get the label of each code of a column
+
+        Args:
+            column (str): "contest", "choice", "jurisdiction" or
+                "vote_type".
+
+        Returns:
+            List indexed by code: contest or choice text, jurisdiction name
+            or vote type name.
+
+        Raises:
+            ValueError: If ``column`` isn't the name of a coded column.
+
+        """
+        if column == 'contest':
+            return [c.text for c in self.contests]
+        if column == 'choice':
+            return [c.text for c in self.choices]
+        if column == 'jurisdiction':
+            return [j.name for j in self.jurisdictions]
+        if column == 'vote_type':
+            return self.vote_types
+        raise ValueError("Unknown column {!r}".format(column))
+
+    def _code(self, labels, attr, value):
+        for i, label in enumerate(labels):
+            if getattr(label, attr) == value:
+                return i
+        raise KeyError(value)
+
+    def select(self, mask):
+        """
+        Get the rows matching a boolean mask
+
+        Args:
+            mask: Boolean array with one element per row, for example
+                ``table.vote_type == table.vote_type_code('Absentee')``.
+
+        Returns:
+            A new ``ResultTable`` containing only the matching rows.  Label
+            tables are shared with this table.
+
+        """
+        return self._with_rows(mask)
+
+    def contest_rows(self, contest):
+        """
+        Get the range of rows for a contest
+
+        Args:
+            contest: Integer contest code
+
+        Returns:
+            A ``slice`` object.
+
+        """
+        start = int(np.searchsorted(self.contest, contest, side='left'))
+        stop = int(np.searchsorted(self.contest, contest, side='right'))
+        return slice(start, stop)
+
+    def for_contest(self, contest):
+        """
+        Get the results for a single contest
+
+        Args:
+            contest: Integer contest code
+
+        Returns:
+            A new ``ResultTable`` whose arrays are views into this table's
+            arrays.
+
+        """
+        return self._with_rows(self.contest_rows(contest))
+
+    def matrix(self, contest):
+        """
+        Get a contest's sub-jurisdiction votes as a 3-dimensional array
+
+        Only results associated with both a choice and a sub-jurisdiction
+        are included.  When every choice lists every sub-jurisdiction for
+        every vote type, as is the case for results files produced by
+        Clarity, the returned array is a view into ``votes``.  Otherwise,
+        it is a copy, with zeros for missing results.
+
+        Args:
+            contest: Integer contest code
+
+        Returns:
+            A ``ContestMatrix`` object.
+
+        """
+        rows = self.contest_rows(contest)
+        choice = self.choice[rows]
+        # Results not associated with a choice precede those that are
+        start = rows.start + int(np.count_nonzero(choice < 0))
+        block = slice(start, rows.stop)
+
+        votes = self.votes[block]
+        choice = self.choice[block]
+        jurisdiction = self.jurisdiction[block]
+        vote_type = self.vote_type[block]
+        choices = _unique_in_order(choice[choice >= 0])
+        vote_types = _unique_in_order(vote_type)
+        num_jurisdictions = len(self.jurisdictions)
+
+        shape = (len(choices), len(vote_types), num_jurisdictions + 1)
+        if (choice >= 0).all() and len(votes) == shape[0] * shape[1] * shape[2]:
+            # Each choice and vote type has a jurisdiction-wide result
+            # followed by one result per sub-jurisdiction.
+            if ((choice.reshape(shape) == choices[:, None, None]).all() and
+                    (vote_type.reshape(shape) == vote_types[None, :, None]).all() and
+                    (jurisdiction.reshape(shape) == np.arange(-1, num_jurisdictions)).all()):
+                return ContestMatrix(
+                    votes.reshape(shape)[:, :, 1:].transpose(0, 2, 1),
+                    choices, vote_types)
+
+        matrix = np.zeros((len(choices), num_jurisdictions, len(vote_types)),
+            dtype=votes.dtype)
+        mask = (choice >= 0) & (jurisdiction >= 0)
+        matrix[_positions(choices, choice[mask]), jurisdiction[mask],
+               _positions(vote_types, vote_type[mask])] = votes[mask]
+        return ContestMatrix(matrix, choices, vote_types)
+
+    def _with_rows(self, rows):
+        return ResultTable(self.votes[rows], self.contest[rows],
+            self.choice[rows], self.jurisdiction[rows], self.vote_type[rows],
+            self.contests, self.choices, self.jurisdictions, self.vote_types)
+
+
+class ResultTableBuilder(object):
+    """
+    Incrementally build a ``ResultTable``
+
+    Rows are accumulated in compact ``array.array`` buffers, so building a
+    table never requires a Python object per result.
+
+    """
+    def __init__(self):
+        self._votes = array('q')
+        self._contest = array('i')
+        self._choice = array('i')
+        self._jurisdiction = array('i')
+        self._vote_type = array('i')
+        self._contests = []
+        self._choices = []
+        self._jurisdictions = []
+        self._vote_types = []
+        self._vote_type_codes = {}
+
+    def add_contest(self, key, text):
+        """Add a contest label and return its code"""
+        self._contests.append(ContestLabel(key, text))
+        return len(self._contests) - 1
+
+    def add_choice(self, contest, key, text, party, total_votes):
+        """Add a choice label and return its code"""
+        self._choices.append(ChoiceLabel(contest, key, text, party, total_votes))
+        return len(self._choices) - 1
+
+    def add_jurisdiction(self, name, level, total_voters, ballots_cast):
+        """Add a jurisdiction label and return its code"""
+        self._jurisdictions.append(JurisdictionLabel(name, level, total_voters,
+            ballots_cast))
+        return len(self._jurisdictions) - 1
+
+    def add_result(self, contest, choice, jurisdiction, vote_type, votes):
+        """
+        Add a row to the table
+
+        Args:
+            contest: Contest code
+            choice: Choice code, or -1
+            jurisdiction: Jurisdiction code, or -1
+            vote_type: Vote type name
+            votes: Integer vote count
+
+        """
+        vote_type_code = self._vote_type_codes.get(vote_type)
+        if vote_type_code is None:
+            vote_type_code = len(self._vote_types)
+            self._vote_types.append(vote_type)
+            self._vote_type_codes[vote_type] = vote_type_code
+
+        self._votes.append(votes)
+        self._contest.append(contest)
+        self._choice.append(choice)
+        self._jurisdiction.append(jurisdiction)
+        self._vote_type.append(vote_type_code)
+
+    def build(self):
+        """Return a ``ResultTable`` containing everything added so far"""
+        return ResultTable(
+            np.array(self._votes, dtype=np.int64),
+            np.array(self._contest, dtype=np.int32),
+            np.array(self._choice, dtype=np.int32),
+            np.array(self._jurisdiction, dtype=np.int32),
+            np.array(self._vote_type, dtype=np.int32),
+            self._contests,
+            self._choices,
+            self._jurisdictions,
+            self._vote_types,
+        )
+
+
+def combined_key(codes):
+    """
+    Combine arrays of codes into a single array of integer keys
+
+    Keys sort in the same order as the tuples of codes.  Codes can be -1.
+
+    Args:
+        codes: List of arrays of codes of the same length, for example
+            ``[table.contest, table.choice]``.
+
+    Returns:
+        Tuple of the array of keys and a list of the number of possible
+        values of each array of codes, including -1.
+
+    """
+    key = np.zeros(len(codes[0]) if codes else 0, dtype=np.int64)
+    sizes = []
+    for c in codes:
+        size = int(c.max()) + 2 if len(c) else 1
+        key = key * size + (c.astype(np.int64) + 1)
+        sizes.append(size)
+    return key, sizes
+
+
+def _distinct(labels):
+    """
+    Number the distinct labels in a list
+
+    Returns:
+        Tuple of a list of the distinct labels, other than None, in order of
+        first appearance, and an array with the position of each label in
+        that list, or -1 for None.
+
+    """
+    distinct = []
+    positions = {}
+    codes = np.empty(len(labels), dtype=np.int32)
+    for i, label in enumerate(labels):
+        if label is None:
+            codes[i] = -1
+            continue
+        code = positions.get(label)
+        if code is None:
+            code = positions[label] = len(distinct)
+            distinct.append(label)
+        codes[i] = code
+    return distinct, codes
+
+
+def _take(lookup, codes):
+    """Map an array of codes, which can be -1, through a lookup array"""
+    # Index -1 selects the appended -1, so missing values stay missing
+    return np.append(lookup, np.int32(-1))[codes]
+
+
+def _unique_in_order(codes):
+    """Return the distinct values of an array in order of first appearance"""
+    values, first = np.unique(codes, return_index=True)
+    return values[np.argsort(first)]
+
+
+def _positions(values, codes):
+    """Map each of ``codes`` to its position in ``values``"""
+    lookup = np.full(int(values.max()) + 1 if len(values) else 0, -1, dtype=np.intp)
+    lookup[values] = np.arange(len(values))
+    return lookup[codes]
@@ -0,0 +1,203 @@
+"""
+Vectorized consistency checks on parsed election results
+
+Results files are checked before they're published, to catch files that
+were truncated or exported while the counts were being updated.  The
+checks run as NumPy array operations over a ``clarify.table.ResultTable``,
+rather than a Python loop over ``Result`` objects:
+
+    >>> table = clarify.Parser().parse_table("path/to/detail.xml")
+    >>> report = validate(table)
+    >>> for discrepancy in report:
+    ...     print(discrepancy)
+
+The checks are named by ``CHECKS``:
+
+* "choice_totals": Each choice's ``total_votes`` equals the sum of its
+  results for sub-jurisdictions, over all vote types.
+* "vote_type_totals": The result for the whole jurisdiction of the report,
+  for each contest, choice and vote type, equals the sum of its results for
+  sub-jurisdictions.  This includes results not associated with a choice,
+  such as overvotes.
+* "ballots_cast": Each sub-jurisdiction's ``ballots_cast`` is at most its
+  ``total_voters``.
+
+Tables parsed with a vote type filter, or without sub-jurisdiction results,
+can't be checked against their totals.  Choices and vote types without any
+sub-jurisdiction results are skipped, as are jurisdictions whose total
+voters are unknown or reported as zero, which Clarity does for precincts in
+some county reports.
+
+This requires NumPy to be installed.
+
+"""
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from clarify.table import combined_key
+
+CHECKS = ('choice_totals', 'vote_type_totals', 'ballots_cast')
+"""Names of the checks run by ``validate()``, in order"""
+
+Check = namedtuple('Check', ['name', 'checked', 'keys', 'expected', 'actual'])
+"""
+The outcome of one check.
+
+``checked`` is the number of values that were checked.  ``keys`` is an
+ordered dictionary mapping column names, from ``contest``, ``choice``,
+``jurisdiction`` and ``vote_type``, to arrays of the table's codes
+identifying each discrepancy, with -1 for results not associated with a
+choice.  ``expected`` and ``actual`` are arrays of the reported total, or
+for "ballots_cast" the total voters, and the value it was checked against.
+"""
+
+Discrepancy = namedtuple('Discrepancy', ['check', 'contest', 'choice',
+    'jurisdiction', 'vote_type', 'expected', 'actual'])
+"""
+A value that failed a check, identified by labels rather than codes.
+
+Labels that don't apply to the check are None.
+"""
+
+
+class ValidationReport(object):
+    """
+    Discrepancies found by ``validate()``
+
+    Iterating over a report yields a ``Discrepancy`` for each value that
+    failed a check, in the order of ``CHECKS``.
+
+    Attributes:
+        table: The ``ResultTable`` that was checked
+        checks: Ordered dictionary mapping check names to ``Check`` objects
+
+    """
+    def __init__(self, table, checks):
+        self.table = table
+        self.checks = checks
+
+    def __len__(self):
+        return sum(len(check.expected) for check in self.checks.values())
+
+    def __iter__(self):
+        table = self.table
+        for check in self.checks.values():
+            labels = OrderedDict()
+            for column, codes in check.keys.items():
+                names = table.labels(column)
+                labels[column] = [names[code] if code >= 0 else None
+                                  for code in codes.tolist()]
+
+            for i, (expected, actual) in enumerate(zip(check.expected.tolist(),
+                                                       check.actual.tolist())):
+                yield Discrepancy(
+                    check=check.name,
+                    contest=labels['contest'][i] if 'contest' in labels else None,
+                    choice=labels['choice'][i] if 'choice' in labels else None,
+                    jurisdiction=labels['jurisdiction'][i] if 'jurisdiction' in labels else None,
+                    vote_type=labels['vote_type'][i] if 'vote_type' in labels else None,
+                    expected=expected,
+                    actual=actual,
+                )
+
+    @property
+    def ok(self):
+        """True if no check found any discrepancies"""
+        return len(self) == 0
+
+    def counts(self):
+        """Return an ordered dictionary mapping check names to numbers of discrepancies"""
+        return OrderedDict((name, len(check.expected)) for name, check in self.checks.items())
+
+
+def validate(table, checks=CHECKS):
+    """
+    Check parsed results for internal consistency
+
+    Args:
+        table: A ``ResultTable``
+        checks: Iterable of the names of the checks to run.  See ``CHECKS``.
+
+    Returns:
+        A ``ValidationReport`` object.
+
+    Raises:
+        ValueError: If ``checks`` contains an unknown check.
+
+    """
+    for name in checks:
+        if name not in CHECKS:
+            raise ValueError("Unknown check {}".format(name))
+
+    return ValidationReport(table, OrderedDict(
+        (name, _CHECK_FUNCTIONS[name](table)) for name in CHECKS if name in checks))
+
+
+def _check_choice_totals(table):
+    sub = (table.jurisdiction >= 0) & (table.choice >= 0)
+    choice = table.choice[sub]
+    num_choices = len(table.choices)
+    # Float sums of integer vote counts are exact up to 2 ** 53
+    actual = np.bincount(choice, weights=table.votes[sub],
+        minlength=num_choices).astype(np.int64)
+    has_results = np.bincount(choice, minlength=num_choices) > 0
+    expected = np.fromiter((c.total_votes for c in table.choices), dtype=np.int64,
+        count=num_choices)
+
+    bad = np.flatnonzero(has_results & (expected != actual)).astype(np.int32)
+    contest = np.fromiter((c.contest for c in table.choices), dtype=np.int32,
+        count=num_choices)
+    return Check('choice_totals', int(np.count_nonzero(has_results)),
+        OrderedDict([('contest', contest[bad]), ('choice', bad)]),
+        expected[bad], actual[bad])
+
+
+def _check_vote_type_totals(table):
+    key, _sizes = combined_key([table.contest, table.choice, table.vote_type])
+    sub = table.jurisdiction >= 0
+    groups, ids = np.unique(key[sub], return_inverse=True)
+    sums = np.bincount(ids.reshape(-1), weights=table.votes[sub],
+        minlength=len(groups)).astype(np.int64)
+
+    # Match each jurisdiction-wide result to its group of sub-jurisdiction
+    # results, if there are any
+    total_rows = np.flatnonzero(~sub)
+    total_key = key[total_rows]
+    positions = np.searchsorted(groups, total_key)
+    found = positions < len(groups)
+    found[found] = groups[positions[found]] == total_key[found]
+    rows = total_rows[found]
+    expected = table.votes[rows]
+    actual = sums[positions[found]]
+
+    bad = expected != actual
+    rows = rows[bad]
+    return Check('vote_type_totals', len(expected),
+        OrderedDict([('contest', table.contest[rows]), ('choice', table.choice[rows]),
+                     ('vote_type', table.vote_type[rows])]),
+        expected[bad], actual[bad])
+
+
+def _check_ballots_cast(table):
+    num_jurisdictions = len(table.jurisdictions)
+    # Unknown values are -1
+    total_voters = np.fromiter(
+        (j.total_voters if j.total_voters is not None else -1 for j in table.jurisdictions),
+        dtype=np.int64, count=num_jurisdictions)
+    ballots_cast = np.fromiter(
+        (j.ballots_cast if j.ballots_cast is not None else -1 for j in table.jurisdictions),
+        dtype=np.int64, count=num_jurisdictions)
+
+    checked = total_voters > 0
+    bad = np.flatnonzero(checked & (ballots_cast > total_voters)).astype(np.int32)
+    return Check('ballots_cast', int(np.count_nonzero(checked)),
+        OrderedDict([('jurisdiction', bad)]), total_voters[bad], ballots_cast[bad])
+
+
+_CHECK_FUNCTIONS = {
+    'choice_totals': _check_choice_totals,
+    'vote_type_totals': _check_vote_type_totals,
+    'ballots_cast': _check_ballots_cast,
+}
+
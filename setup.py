@@ -28,16 +28,23 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=[
-        'requests',
+        'requests>=2.18',
+        'urllib3>=1.21.1',
         'lxml',
         'cssselect',
         'six',
         'python-dateutil',
-        'requests-futures',
     ],
+    extras_require={
+        'table': ['numpy'],
+        'pandas': ['numpy', 'pandas'],
+        'arrow': ['numpy', 'pyarrow'],
+        'async': ["aiohttp; python_version >= '3.6'"],
+    },
     tests_require=[
         'nose',
         'responses',
+        "mock; python_version < '3.3'",
         "unittest2; python_version < '3.4'"
     ],
     test_suite='nose.collector',
@@ -0,0 +1,72 @@
+"""
+Fake aiohttp sessions and coroutines for tests of ``clarify.aio``
+
+These use ``async def``, which is a syntax error before Python 3.6, so
+``test_aio`` only imports this module on Python 3.6 or later.
+"""
+import json
+
+from clarify.aio import make_client_session
+
+
+class FakeResponse(object):
+    """The parts of ``aiohttp.ClientResponse`` used by ``AsyncJurisdiction``"""
+    def __init__(self, url, status=200, body=''):
+        self.url = url
+        self.status = status
+        self.ok = status < 400
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def text(self):
+        return self.body
+
+    async def json(self, content_type='application/json'):
+        return json.loads(self.body)
+
+
+class FakeSession(object):
+    """
+    Session that answers requests from a list of routes, and records them
+
+    Each route is a ``(method, url, callback)`` tuple, where ``url`` is a
+    string or a regular expression, and ``callback`` takes the URL and the
+    request's keyword arguments and returns a ``FakeResponse``.  Requests
+    that don't match a route get a 404 response.
+    """
+    def __init__(self, routes=()):
+        self.routes = list(routes)
+        self.requests = []
+
+    def add(self, method, url, status=200, body=''):
+        self.routes.append((method, url, lambda u, kwargs: FakeResponse(u, status, body)))
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        for route_method, route_url, callback in self.routes:
+            if route_method != method:
+                continue
+            if (route_url == url if isinstance(route_url, str)
+                    else route_url.match(url) is not None):
+                return callback(url, kwargs)
+        return FakeResponse(url, 404)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+
+async def client_session_settings(**kwargs):
+    """
+    Create a session with ``make_client_session()`` and return its
+    connection limit and timeout
+    """
+    async with make_client_session(**kwargs) as session:
+        return session.connector.limit, session.timeout
@@ -0,0 +1,80 @@
+from collections import defaultdict
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from clarify.parser import Parser
+
+if np is not None:
+    from clarify.aggregate import rollup, margins
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+COUNTY_XML_PATH = 'tests/data/county.xml'
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestAggregate(unittest.TestCase):
+    def setUp(self):
+        self.parser = Parser()
+        self.parser.parse(PRECINCT_XML_PATH)
+        self.table = Parser().parse_table(PRECINCT_XML_PATH)
+
+    def _sum(self, key, jurisdictions=False, include_no_choice=False):
+        """Sum the parser's results in a loop, to check the rollups against"""
+        totals = defaultdict(int)
+        for r in self.parser.results:
+            if (r.jurisdiction is not None) != jurisdictions:
+                continue
+            if r.choice is None and not include_no_choice:
+                continue
+            totals[key(r)] += r.votes
+        return dict(totals)
+
+    def test_rollup(self):
+        self.assertEqual(
+            dict(rollup(self.table, ('contest', 'party')).to_dict()),
+            self._sum(lambda r: (r.contest.text, r.choice.party)))
+        self.assertEqual(
+            dict(rollup(self.table, 'vote_type', include_no_choice=True).to_dict()),
+            self._sum(lambda r: r.vote_type, include_no_choice=True))
+
+    def test_rollup_jurisdiction(self):
+        by_jurisdiction = rollup(self.table, ('jurisdiction', 'choice'))
+        self.assertEqual(
+            dict(by_jurisdiction.to_dict()),
+            self._sum(lambda r: (r.jurisdiction.name, r.choice.text), jurisdictions=True))
+        self.assertEqual(by_jurisdiction.labels('jurisdiction')[0],
+                         self.table.jurisdictions[0].name)
+
+    def test_rollup_unknown_column(self):
+        self.assertRaises(ValueError, rollup, self.table, ('contest', 'precinct'))
+
+    def test_shares_and_top(self):
+        by_choice = rollup(self.table, ('contest', 'choice'))
+        shares = dict(zip(by_choice.labels('choice'), by_choice.shares().tolist()))
+        total = sum(by_choice.votes.tolist())
+        self.assertAlmostEqual(sum(shares.values()), 1.0)
+        self.assertAlmostEqual(shares['Matt BEVIN'], 820.0 / total)
+
+        top = by_choice.top(2)
+        self.assertEqual(top.labels('choice'), ['Mitch McCONNELL', 'Matt BEVIN'])
+        self.assertEqual(top.votes.tolist(), sorted(by_choice.votes.tolist(), reverse=True)[:2])
+
+    def test_margins(self):
+        result = margins(self.table)
+        contest = self.parser.get_contest("US Senator - REPUBLICAN")
+        ranked = sorted(contest.choices, key=lambda c: c.total_votes, reverse=True)
+        self.assertEqual(self.table.choices[result.winner[0]].text, ranked[0].text)
+        self.assertEqual(self.table.choices[result.runner_up[0]].text, ranked[1].text)
+        self.assertEqual(result.margin.tolist(), [ranked[0].total_votes - ranked[1].total_votes])
+        self.assertEqual(result.total.tolist(), [sum(c.total_votes for c in ranked)])
+
+    def test_margins_single_choice(self):
+        table = Parser().parse_table(COUNTY_XML_PATH)
+        result = margins(table, ('contest', 'jurisdiction'))
+        self.assertEqual(len(result.winner), len(table.jurisdictions))
+        self.assertTrue((result.runner_up == -1).all())
+        self.assertEqual(result.margin.tolist(), result.total.tolist())
@@ -0,0 +1,155 @@
+import json
+import os.path
+import re
+import sys
+import unittest
+
+try:
+    import asyncio
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+if aiohttp is not None and sys.version_info >= (3, 6):
+    from clarify.aio import AsyncJurisdiction
+    from _aio_fakes import FakeResponse, FakeSession, client_session_settings
+else:
+    aiohttp = None
+
+SUMMARY_URL = 'https://results.enr.clarityelections.com/KY/50972/131636/en/summary.html'
+REPORTS_URL = 'https://results.enr.clarityelections.com/KY/50972/131636/reports'
+ELECTION_URL = 'https://results.enr.clarityelections.com/KY/50972'
+
+COUNTY_REDIRECT_URL_RE = re.compile(r'https://results.enr.clarityelections.com/KY/(?P<county>[A-Za-z\.]+)/(?P<page_id>\d+)/$')
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncJurisdiction(unittest.TestCase):
+    def test_session_required(self):
+        with self.assertRaises(ValueError):
+            AsyncJurisdiction(SUMMARY_URL, 'state')
+
+    def test_construct(self):
+        session = FakeSession()
+        j = AsyncJurisdiction(SUMMARY_URL, 'state', session=session)
+        self.assertEqual(j.url, SUMMARY_URL)
+        self.assertEqual(j.state, 'KY')
+        self.assertEqual(session.requests, [])
+
+    def test_get_current_ver(self):
+        session = FakeSession()
+        session.add('GET', ELECTION_URL + '/current_ver.txt', body='131636')
+        self.assertEqual(run(AsyncJurisdiction.get_current_ver(ELECTION_URL, session)),
+                         '131636')
+        self.assertIsNone(run(AsyncJurisdiction.get_current_ver(ELECTION_URL + '0', session)))
+
+    def test_get_latest_summary_url(self):
+        session = FakeSession()
+        session.add('GET', ELECTION_URL + '/current_ver.txt', body='131636')
+        session.add('GET', ELECTION_URL + '/131636/en/summary.html')
+        self.assertEqual(
+            run(AsyncJurisdiction.get_latest_summary_url(ELECTION_URL + '/', session)),
+            ELECTION_URL + '/131636/en/summary.html')
+        # The Web01 page is tried first
+        self.assertEqual([url for _method, url, _kwargs in session.requests], [
+            ELECTION_URL + '/current_ver.txt',
+            ELECTION_URL + '/131636/Web01/en/summary.html',
+            ELECTION_URL + '/131636/en/summary.html',
+        ])
+
+    def test_get_latest_summary_url_missing(self):
+        session = FakeSession()
+        self.assertIsNone(run(AsyncJurisdiction.get_latest_summary_url(ELECTION_URL, session)))
+
+    def test_report_url(self):
+        session = FakeSession()
+        session.add('HEAD', REPORTS_URL + '/detailxml.zip')
+        j = AsyncJurisdiction(SUMMARY_URL, 'state', session=session)
+        self.assertEqual(run(j.report_url('xml')), REPORTS_URL + '/detailxml.zip')
+        self.assertIsNone(run(j.report_url('fake')))
+        self.assertEqual([(method, kwargs) for method, _url, kwargs in session.requests],
+                         [('HEAD', {'allow_redirects': True})] * 2)
+
+    def test_report_url_ranged_get(self):
+        session = FakeSession()
+        session.add('HEAD', re.compile('.*'), status=405)
+        session.add('GET', REPORTS_URL + '/detailtxt.zip', status=206)
+        j = AsyncJurisdiction(SUMMARY_URL, 'state', session=session)
+        self.assertEqual(run(j.report_url('txt')), REPORTS_URL + '/detailtxt.zip')
+        self.assertIsNone(run(j.report_url('xls')))
+        self.assertEqual(session.requests[1][2], {'headers': {'Range': 'bytes=0-0'}})
+
+    def test_get_summary_url(self):
+        session = FakeSession()
+        session.add('HEAD', REPORTS_URL + '/summary.zip')
+        j = AsyncJurisdiction(SUMMARY_URL, 'state', session=session)
+        self.assertEqual(run(j.get_summary_url()), REPORTS_URL + '/summary.zip')
+        self.assertEqual(run(j.get_summary_url()), REPORTS_URL + '/summary.zip')
+        # The URL is cached
+        self.assertEqual(len(session.requests), 1)
+
+    def test_get_subjurisdictions_state(self):
+        response_body_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+            'data', 'select-county__KY__50972__131636.html')
+        with open(response_body_path) as f:
+            response_body = f.read()
+
+        def county_page(url, kwargs):
+            page_id = COUNTY_REDIRECT_URL_RE.match(url).group('page_id')
+            return FakeResponse(url, body="""<html><head>
+                <script src="./{0}/js/version.js" type="text/javascript"></script>
+                </head></html>""".format(page_id))
+
+        session = FakeSession([('GET', COUNTY_REDIRECT_URL_RE, county_page)])
+        session.add('GET', SUMMARY_URL.replace('summary.html', 'select-county.html'),
+                    body=response_body)
+        j = AsyncJurisdiction(SUMMARY_URL, 'state', session=session)
+        subjurisdictions = run(j.get_subjurisdictions())
+
+        # Kentucky has 120 counties
+        self.assertEqual(len(subjurisdictions), 120)
+        adair = subjurisdictions[0]
+        self.assertEqual(adair.name, 'Adair')
+        self.assertEqual(adair.level, 'county')
+        self.assertIs(adair.session, session)
+        self.assertIsNotNone(re.match(
+            r'https://results.enr.clarityelections.com/KY/Adair/\d+/\d+/en/summary.html$',
+            adair.url))
+
+    def test_get_subjurisdictions_web01(self):
+        url = 'https://results.enr.clarityelections.com/AR/53237/149294/Web01/en/summary.html'
+        settings = {'settings': {'electiondetails': {'participatingcounties': [
+            'Arkansas|53238|149297|10/13/2014 2:12:50 PM CDT|16',
+            'Ashley|53239|149299|10/13/2014 2:07:33 PM CDT|16',
+        ]}}}
+        session = FakeSession()
+        session.add('GET', url.replace('summary.html', 'json/electionsettings.json'),
+                    body=json.dumps(settings))
+        j = AsyncJurisdiction(url, 'state', session=session)
+        subjurisdictions = run(j.get_subjurisdictions())
+        self.assertEqual([(s.name, s.url) for s in subjurisdictions], [
+            ('Arkansas', 'https://results.enr.clarityelections.com/AR/Arkansas/53238/149297/Web01/en/summary.html'),
+            ('Ashley', 'https://results.enr.clarityelections.com/AR/Ashley/53239/149299/Web01/en/summary.html'),
+        ])
+
+    def test_get_subjurisdictions_missing(self):
+        session = FakeSession()
+        j = AsyncJurisdiction(SUMMARY_URL, 'state', session=session)
+        self.assertEqual(run(j.get_subjurisdictions()), [])
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestMakeClientSession(unittest.TestCase):
+    def test_settings(self):
+        limit, timeout = run(client_session_settings(pool_size=25, timeout=(3, 60)))
+        self.assertEqual(limit, 25)
+        self.assertEqual((timeout.sock_connect, timeout.sock_read), (3, 60))
+        self.assertIsNone(timeout.total)
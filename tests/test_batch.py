@@ -0,0 +1,54 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from clarify.parser import Parser
+
+if np is not None:
+    from clarify.batch import parse_many, parse_report, merge_reports
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+COUNTY_XML_PATH = 'tests/data/county.xml'
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestParseMany(unittest.TestCase):
+    def test_parse_many(self):
+        merged = parse_many([PRECINCT_XML_PATH, COUNTY_XML_PATH], workers=2)
+
+        self.assertEqual(list(merged.reports), ["Greenup", "AR"])
+        report = merged.reports["Greenup"]
+        self.assertEqual(report.source, PRECINCT_XML_PATH)
+        self.assertEqual(report.election_name, "2014 Primary Election")
+        self.assertEqual(len(report.table), len(self._parse(PRECINCT_XML_PATH).results))
+
+        self.assertEqual(merged.totals["US Senator - REPUBLICAN"]["Matt BEVIN"], 820)
+        self.assertEqual(merged.totals["U.S. Senate"]["Tom Cotton"], 477734)
+
+    def test_parse_many_in_process(self):
+        merged = parse_many([PRECINCT_XML_PATH], workers=1)
+        expected = self._parse(PRECINCT_XML_PATH)
+        contest = expected.get_contest("US Senator - REPUBLICAN")
+        self.assertEqual(merged.totals[contest.text],
+                         {c.text: c.total_votes for c in contest.choices})
+
+    def test_merge_sums_across_reports(self):
+        first = parse_report(PRECINCT_XML_PATH)
+        second = first._replace(region="Greenup Copy")
+        merged = merge_reports([first, second])
+        self.assertEqual(merged.totals["US Senator - REPUBLICAN"]["Matt BEVIN"], 1640)
+
+        with self.assertRaises(ValueError):
+            merge_reports([first, first])
+
+    def _parse(self, path):
+        parser = Parser()
+        parser.parse(path)
+        return parser
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import mmap
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+try:
+    import pathlib
+except ImportError:
+    pathlib = None
+
+from clarify.cache import ParseCache, CACHE_FILE_SUFFIX
+from clarify.parser import Parser
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+COUNTY_XML_PATH = 'tests/data/county.xml'
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _entries(self):
+        return [name for name in os.listdir(self.directory)
+                if name.endswith(CACHE_FILE_SUFFIX)]
+
+    def test_parse_cached(self):
+        expected = Parser()
+        expected.parse(PRECINCT_XML_PATH)
+
+        cache = ParseCache(self.directory)
+        first = cache.parse(PRECINCT_XML_PATH)
+        self.assertEqual(first.results, expected.results)
+        self.assertEqual(len(self._entries()), 1)
+
+        with mock.patch.object(Parser, 'parse') as parse:
+            with open(PRECINCT_XML_PATH, 'rb') as f:
+                cached = cache.parse(f)
+        parse.assert_not_called()
+
+        self.assertEqual(cached.timestamp, expected.timestamp)
+        self.assertEqual(cached.voter_turnout, expected.voter_turnout)
+        self.assertEqual(cached.result_jurisdictions, expected.result_jurisdictions)
+        self.assertEqual(cached.contests, expected.contests)
+        self.assertEqual(cached.results, expected.results)
+        self.assertEqual(len(cached.get_result_jurisdiction("A105").results),
+                         len(expected.get_result_jurisdiction("A105").results))
+        self.assertTrue(cached.diff(expected).is_empty())
+
+    def test_parser_options_in_key(self):
+        with open(PRECINCT_XML_PATH, 'rb') as f:
+            xml = f.read()
+        self.assertNotEqual(ParseCache(self.directory).key(xml),
+                            ParseCache(self.directory, lean=True).key(xml))
+
+        parser = ParseCache(self.directory, lean=True).parse(xml)
+        self.assertTrue(parser.lean)
+        self.assertEqual(parser.get_result_jurisdiction("A105").results, [])
+
+    @unittest.skipIf(pathlib is None, "pathlib is not available")
+    def test_path(self):
+        cache = ParseCache(self.directory)
+        self.assertEqual(cache.key(pathlib.Path(PRECINCT_XML_PATH)),
+                         cache.key(PRECINCT_XML_PATH))
+        parser = cache.parse(pathlib.Path(PRECINCT_XML_PATH))
+        self.assertEqual(parser.region, "Greenup")
+
+    def test_mmap(self):
+        cache = ParseCache(self.directory)
+        with open(PRECINCT_XML_PATH, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                self.assertEqual(cache.key(mapped), cache.key(PRECINCT_XML_PATH))
+                parser = cache.parse(mapped)
+                # The map is hashed and parsed in place, rather than copied
+                # with read(), which would move its position
+                self.assertEqual(mapped.tell(), 0)
+            finally:
+                mapped.close()
+        self.assertEqual(parser.region, "Greenup")
+
+    def test_evict_max_size(self):
+        cache = ParseCache(self.directory)
+        cache.parse(COUNTY_XML_PATH)
+        path = os.path.join(self.directory, self._entries()[0])
+        size = os.path.getsize(path)
+
+        # Make the first entry the least recently used
+        old = time.time() - 60
+        os.utime(path, (old, old))
+
+        cache.max_size = size
+        cache.parse(PRECINCT_XML_PATH)
+        self.assertEqual(self._entries(), [cache.key(PRECINCT_XML_PATH) + CACHE_FILE_SUFFIX])
+
+    def test_evict_max_age(self):
+        cache = ParseCache(self.directory, max_age=3600)
+        cache.parse(PRECINCT_XML_PATH)
+        path = os.path.join(self.directory, self._entries()[0])
+        old = time.time() - 7200
+        os.utime(path, (old, old))
+
+        cache.evict()
+        self.assertEqual(self._entries(), [])
+
+    def test_corrupt_entry(self):
+        cache = ParseCache(self.directory)
+        with open(os.path.join(self.directory, cache.key(PRECINCT_XML_PATH) + CACHE_FILE_SUFFIX), 'wb') as f:
+            f.write(b'garbage')
+
+        parser = cache.parse(PRECINCT_XML_PATH)
+        self.assertEqual(parser.region, "Greenup")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from clarify.export import write_csv, write_jsonl, EXPORT_FIELDS
+from clarify.parser import Parser
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+COUNTY_XML_PATH = 'tests/data/county.xml'
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _expected_rows(self, path):
+        return [[u'' if v is None else u'{}'.format(v) for v in record]
+                for record in Parser().iter_results(path)]
+
+    def test_write_csv(self):
+        path = os.path.join(self.directory, 'results.csv')
+        count = write_csv(PRECINCT_XML_PATH, path)
+
+        with io.open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        self.assertEqual(rows[1:], self._expected_rows(PRECINCT_XML_PATH))
+        self.assertEqual(count, len(rows) - 1)
+
+    def test_write_csv_gzip(self):
+        path = os.path.join(self.directory, 'results.csv.gz')
+        write_csv(COUNTY_XML_PATH, path, header=False, levels=['county'])
+
+        with gzip.open(path, 'rb') as f:
+            text = f.read().decode('utf-8')
+        rows = list(csv.reader(io.StringIO(text, newline='')))
+        expected = [[u'' if v is None else u'{}'.format(v) for v in record]
+                    for record in Parser().iter_results(COUNTY_XML_PATH, levels=['county'])]
+        self.assertEqual(rows, expected)
+
+    def test_write_csv_non_ascii(self):
+        with open(PRECINCT_XML_PATH, 'rb') as f:
+            xml = f.read().replace(b'Matt BEVIN', u'Matt B\u00c9VIN'.encode('utf-8'))
+        out = io.BytesIO()
+        write_csv(xml, out)
+        self.assertIn(u',Matt B\u00c9VIN,', out.getvalue().decode('utf-8'))
+
+    def test_write_jsonl(self):
+        out = io.BytesIO()
+        count = write_jsonl(COUNTY_XML_PATH, out)
+
+        lines = out.getvalue().decode('utf-8').splitlines()
+        self.assertEqual(count, len(lines))
+        records = list(Parser().iter_results(COUNTY_XML_PATH))
+        self.assertEqual([json.loads(line) for line in lines],
+                         [dict(r._asdict()) for r in records])
+        # Keys are always written in the same order
+        self.assertEqual(lines[0].index('"contest_key"'), 1)
+
+    def test_write_jsonl_text_stream(self):
+        out = io.StringIO()
+        write_jsonl(PRECINCT_XML_PATH, out, contests=['US Senator - REPUBLICAN'])
+        first = json.loads(out.getvalue().splitlines()[0])
+        self.assertEqual(first['contest_text'], 'US Senator - REPUBLICAN')
+        self.assertIsNone(first['jurisdiction_name'])
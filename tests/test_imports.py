@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def imported_modules(statement):
+    """Return the names of the modules imported after running a statement in a fresh interpreter"""
+    script = statement + '\nimport sys\nprint("\\n".join(sys.modules))'
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output([sys.executable, '-c', script], env=env, cwd=ROOT)
+    return set(output.decode('utf-8').split())
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "Attributes are imported eagerly before Python 3.7")
+class TestLazyImports(unittest.TestCase):
+    def test_import_clarify(self):
+        modules = imported_modules('import clarify')
+        self.assertNotIn('clarify.parser', modules)
+        self.assertNotIn('clarify.jurisdiction', modules)
+        self.assertNotIn('lxml.etree', modules)
+
+    def test_parser_doesnt_import_requests(self):
+        modules = imported_modules("import clarify\nclarify.Parser().parse('tests/data/precinct.xml')")
+        self.assertIn('clarify.parser', modules)
+        self.assertNotIn('requests', modules)
+        self.assertNotIn('clarify.jurisdiction', modules)
+        self.assertNotIn('lxml.html', modules)
+
+    def test_lazy_attributes(self):
+        import clarify
+        from clarify.jurisdiction import Jurisdiction
+        from clarify.parser import Parser
+
+        self.assertIs(clarify.Parser, Parser)
+        self.assertIs(clarify.Jurisdiction, Jurisdiction)
+        self.assertIn('Parser', dir(clarify))
+        self.assertRaises(AttributeError, getattr, clarify, 'Nonexistent')
@@ -367,3 +367,93 @@ class TestJurisdiction(TestCase):
                     self.assertIsNone(latest_summary_url)
                 else:
                     self.assertEqual(latest_summary_url, expected_url)
+
+
+class TestSummaryUrl(TestCase):
+    COUNTY_URL = 'https://results.enr.clarityelections.com/KY/{}/{}/{}/en/summary.html'
+    SUMMARY_ZIP_URL = 'https://results.enr.clarityelections.com/KY/{}/{}/{}/reports/summary.zip'
+
+    @responses.activate
+    def test_lazy(self):
+        url = 'https://results.enr.clarityelections.com/KY/50972/131636/en/summary.html'
+        summary_zip_url = 'https://results.enr.clarityelections.com/KY/50972/131636/reports/summary.zip'
+        responses.add(responses.HEAD, summary_zip_url, status=200)
+
+        jurisdiction = Jurisdiction(url=url, level='state')
+        self.assertEqual(len(responses.calls), 0)
+        self.assertEqual(jurisdiction.summary_url, summary_zip_url)
+        self.assertEqual(jurisdiction.summary_url, summary_zip_url)
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_resolve_summary_urls(self):
+        jurisdictions = []
+        expected = []
+        for i, name in enumerate(COUNTIES_AR[:30]):
+            ids = (50974 + i, 131638 + i)
+            jurisdictions.append(Jurisdiction(self.COUNTY_URL.format(name, *ids), 'county', name))
+            summary_zip_url = self.SUMMARY_ZIP_URL.format(name, *ids)
+            # Every third county hasn't published a summary report
+            status = 404 if i % 3 == 0 else 200
+            responses.add(responses.HEAD, summary_zip_url, status=status)
+            expected.append(summary_zip_url if status == 200 else None)
+
+        # URLs that have already been looked up aren't requested again
+        self.assertEqual(jurisdictions[0].summary_url, None)
+        self.assertEqual(Jurisdiction.resolve_summary_urls(jurisdictions, max_workers=5),
+                         expected)
+        self.assertEqual(len(responses.calls), len(jurisdictions))
+        self.assertEqual([j.summary_url for j in jurisdictions], expected)
+        self.assertEqual(len(responses.calls), len(jurisdictions))
+
+
+class TestReportUrls(TestCase):
+    URL = 'https://results.enr.clarityelections.com/KY/Adair/15263/27401/en/summary.html'
+    REPORT_URL = 'https://results.enr.clarityelections.com/KY/Adair/15263/27401/reports/detail{}.zip'
+
+    @responses.activate
+    def test_report_url_head(self):
+        responses.add(responses.HEAD, self.REPORT_URL.format('xml'), status=200)
+        responses.add(responses.HEAD, self.REPORT_URL.format('xls'), status=404)
+
+        jurisdiction = Jurisdiction(self.URL, 'county', 'Adair')
+        self.assertEqual(jurisdiction.report_url('xml'), self.REPORT_URL.format('xml'))
+        self.assertIsNone(jurisdiction.report_url('xls'))
+        self.assertEqual([call.request.method for call in responses.calls], ['HEAD', 'HEAD'])
+
+    @responses.activate
+    def test_report_url_ranged_get(self):
+        # A server that doesn't support HEAD requests
+        responses.add(responses.HEAD, self.REPORT_URL.format('xml'), status=405)
+        responses.add(responses.GET, self.REPORT_URL.format('xml'), status=206, body=b'P')
+        responses.add(responses.HEAD, self.REPORT_URL.format('txt'), status=405)
+        responses.add(responses.GET, self.REPORT_URL.format('txt'), status=404)
+
+        jurisdiction = Jurisdiction(self.URL, 'county', 'Adair')
+        self.assertEqual(jurisdiction.report_url('xml'), self.REPORT_URL.format('xml'))
+        self.assertIsNone(jurisdiction.report_url('txt'))
+        self.assertEqual(responses.calls[1].request.headers['Range'], 'bytes=0-0')
+
+    @responses.activate
+    def test_report_urls(self):
+        jurisdictions = []
+        expected = []
+        for i, name in enumerate(COUNTIES_AR[:20]):
+            ids = (50974 + i, 131638 + i)
+            jurisdictions.append(Jurisdiction(TestSummaryUrl.COUNTY_URL.format(name, *ids),
+                                              'county', name))
+            urls = {}
+            for fmt in ('xml', 'txt'):
+                url = 'https://results.enr.clarityelections.com/KY/{}/{}/{}/reports/detail{}.zip'.format(
+                    name, ids[0], ids[1], fmt)
+                # Only some counties publish text reports
+                status = 404 if fmt == 'txt' and i % 2 else 200
+                responses.add(responses.HEAD, url, status=status)
+                urls[fmt] = url if status == 200 else None
+            expected.append(urls)
+
+        self.assertEqual(Jurisdiction.report_urls(jurisdictions, formats=('xml', 'txt'),
+                                                  max_workers=4),
+                         expected)
+        self.assertEqual(len(responses.calls), 40)
+        self.assertEqual(Jurisdiction.report_urls([]), [])
@@ -1,7 +1,33 @@
 import datetime
+import pickle
+import re
+import threading
+import time
 import unittest
 
-from clarify.parser import Parser
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from clarify.parser import Parser, ResultRecord
+
+
+def result_to_record(result):
+    choice = result.choice
+    jurisdiction = result.jurisdiction
+    return ResultRecord(
+        contest_key=result.contest.key,
+        contest_text=result.contest.text,
+        choice_key=choice.key if choice is not None else None,
+        choice_text=choice.text if choice is not None else None,
+        choice_party=choice.party if choice is not None else None,
+        vote_type=result.vote_type,
+        jurisdiction_name=jurisdiction.name if jurisdiction is not None else None,
+        jurisdiction_level=jurisdiction.level if jurisdiction is not None else None,
+        votes=result.votes,
+    )
+
 
 class TestPrecinctParser(unittest.TestCase):
     def test_parse(self):
@@ -67,6 +93,378 @@ class TestPrecinctParser(unittest.TestCase):
         self.assertEqual(contest_choice.key, "1")
         self.assertEqual(contest_choice.total_votes, 820)
 
+    def test_parse_stream(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        streaming = Parser(stream=True)
+        streaming.parse('tests/data/precinct.xml')
+
+        self.assertEqual(streaming.timestamp, er.timestamp)
+        self.assertEqual(streaming.region, er.region)
+        self.assertEqual(streaming.result_jurisdictions, er.result_jurisdictions)
+        self.assertEqual(streaming.contests, er.contests)
+        self.assertEqual(streaming.results, er.results)
+        self.assertEqual(len(streaming.get_result_jurisdiction("A105").results),
+                         len(er.get_result_jurisdiction("A105").results))
+
+    def test_pickle(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        unpickled = pickle.loads(pickle.dumps(er, pickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(unpickled.election_date, er.election_date)
+        self.assertEqual(unpickled.result_jurisdictions, er.result_jurisdictions)
+        self.assertEqual(unpickled.contests, er.contests)
+        self.assertEqual(unpickled.results, er.results)
+        contest = unpickled.get_contest("US Senator - REPUBLICAN")
+        self.assertIs(contest.choices[0].contest, contest)
+        self.assertIs(contest.results[0].contest, contest)
+        self.assertEqual(len(unpickled.get_result_jurisdiction("A105").results),
+                         len(er.get_result_jurisdiction("A105").results))
+
+    def test_parse_lean(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        lean = Parser(lean=True)
+        lean.parse('tests/data/precinct.xml')
+
+        self.assertEqual(lean.contests, er.contests)
+        self.assertEqual(lean.results, er.results)
+        self.assertEqual(lean.get_result_jurisdiction("A105").results, [])
+        self.assertTrue(len(er.get_result_jurisdiction("A105").results) > 0)
+        # Results have no instance dictionary.  Python 2's namedtuple has
+        # a __dict__ property, so check that attributes can't be set instead.
+        with self.assertRaises(AttributeError):
+            lean.results[0].extra = 1
+        # Vote type names are shared between results
+        self.assertIs(lean.results[1].vote_type, lean.results[2].vote_type)
+
+    def test_parse_lazy(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        lazy = Parser(lazy=True)
+        with mock.patch.object(Parser, '_parse_choices', autospec=True,
+                side_effect=Parser._parse_choices) as parse_choices:
+            lazy.parse('tests/data/precinct.xml')
+            self.assertEqual(lazy.contests, er.contests)
+            self.assertEqual(parse_choices.call_count, 0)
+            self.assertEqual(lazy.get_result_jurisdiction("A105").results, [])
+
+            contest = lazy.get_contest("US Senator - REPUBLICAN")
+            self.assertEqual(contest.choices, er.get_contest("US Senator - REPUBLICAN").choices)
+            self.assertEqual(contest.results, er.get_contest("US Senator - REPUBLICAN").results)
+            self.assertIs(contest.choices[0].contest, contest)
+            self.assertEqual(parse_choices.call_count, 1)
+
+            # Each contest is only parsed once
+            contest.results
+            self.assertEqual(parse_choices.call_count, 1)
+
+        self.assertEqual(lazy.results, er.results)
+        self.assertEqual(len(lazy.get_result_jurisdiction("A105").results),
+                         len(er.get_result_jurisdiction("A105").results))
+        self.assertTrue(lazy.diff(er).is_empty())
+
+    def test_parse_lazy_reparsed(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        lazy = Parser(lazy=True)
+        lazy.parse('tests/data/precinct.xml')
+        contest = lazy.contests[0]
+        lazy.parse('tests/data/precinct.xml', vote_types=["Election"])
+
+        # The contest is loaded with the filter of the parse that created it
+        self.assertEqual(contest.results, er.contests[0].results)
+        self.assertTrue(len(lazy.contests[0].results) < len(contest.results))
+
+    def test_parse_lazy_threads(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+        expected = er.contests[0].results
+
+        lazy = Parser(lazy=True)
+        lazy.parse('tests/data/precinct.xml')
+        contest = lazy.contests[0]
+        loading = threading.Event()
+        original = Parser._parse_choices
+
+        def parse_choices(*args, **kwargs):
+            loading.set()
+            # Give the other thread time to read the contest mid-load
+            time.sleep(0.1)
+            return original(*args, **kwargs)
+
+        seen = []
+        reader = lambda: seen.append(len(contest.results))
+        with mock.patch.object(Parser, '_parse_choices', autospec=True,
+                side_effect=parse_choices) as patched:
+            first = threading.Thread(target=reader)
+            first.start()
+            loading.wait()
+            second = threading.Thread(target=reader)
+            second.start()
+            first.join()
+            second.join()
+
+        self.assertEqual(seen, [len(expected)] * 2)
+        self.assertEqual(patched.call_count, 1)
+        self.assertEqual(contest.results, expected)
+
+    def test_parse_lazy_stream(self):
+        self.assertRaises(ValueError, Parser, stream=True, lazy=True)
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, Parser, backend='regex')
+
+    def test_on_phase(self):
+        phases = []
+        er = Parser(on_phase=phases.append)
+        er.parse('tests/data/precinct.xml')
+
+        self.assertEqual([p.phase for p in phases],
+                         ['read', 'timestamp', 'election', 'jurisdictions', 'contests'])
+        self.assertTrue(all(p.seconds >= 0 for p in phases))
+        self.assertEqual(phases[3].elements, 33)
+        self.assertEqual(phases[4].elements, 1)
+
+        del phases[:]
+        streaming = Parser(stream=True, on_phase=phases.append)
+        streaming.parse('tests/data/precinct.xml')
+        self.assertEqual([p.phase for p in phases],
+                         ['timestamp', 'election', 'jurisdictions', 'contests'])
+
+    def test_on_phase_disabled(self):
+        with mock.patch('clarify.parser._timer') as timer:
+            Parser().parse('tests/data/precinct.xml')
+        self.assertFalse(timer.called)
+
+    def test_fast_backend(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        for options in ({}, {'stream': True}, {'lean': True}):
+            fast = Parser(backend='fast', **options)
+            fast.parse('tests/data/precinct.xml')
+            self.assertEqual(fast.contests, er.contests)
+            self.assertEqual(fast.results, er.results)
+            self.assertEqual(fast.result_jurisdictions, er.result_jurisdictions)
+
+        self.assertEqual(list(Parser(backend='fast').iter_results('tests/data/precinct.xml')),
+                         list(Parser().iter_results('tests/data/precinct.xml')))
+
+    def test_iter_results(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        records = list(Parser().iter_results('tests/data/precinct.xml'))
+
+        self.assertEqual(records, [result_to_record(r) for r in er.results])
+        record = next(r for r in records if r.jurisdiction_name == 'A105'
+                      and r.choice_text == 'Matt BEVIN')
+        self.assertEqual(record.jurisdiction_level, 'precinct')
+        self.assertEqual(record.contest_key, '4')
+
+
+class TestResultIndex(unittest.TestCase):
+    def setUp(self):
+        self.parser = Parser()
+        self.parser.parse('tests/data/precinct.xml')
+
+    def _scan(self, **keys):
+        def values(r):
+            return {
+                'contest': r.contest.key,
+                'choice': r.choice.key if r.choice is not None else None,
+                'jurisdiction': r.jurisdiction.name if r.jurisdiction is not None else None,
+                'vote_type': r.vote_type,
+            }
+        return tuple(r for r in self.parser.results
+                     if all(values(r)[k] == v for k, v in keys.items()))
+
+    def test_results_cached(self):
+        self.assertIsInstance(self.parser.results, tuple)
+        self.assertIs(self.parser.results, self.parser.results)
+        results = self.parser.results
+        self.parser.parse('tests/data/precinct.xml')
+        self.assertIsNot(self.parser.results, results)
+
+    def test_query(self):
+        queries = [
+            {'contest': '4', 'choice': '1', 'jurisdiction': 'A105', 'vote_type': 'Election'},
+            {'contest': '4', 'choice': None},
+            {'jurisdiction': None},
+            {'jurisdiction': 'A105', 'vote_type': 'Undervotes'},
+            {'choice': '2'},
+        ]
+        for keys in queries:
+            result = self.parser.query(**keys)
+            self.assertTrue(result)
+            self.assertEqual(result, self._scan(**keys))
+
+        self.assertEqual(self.parser.query(), self.parser.results)
+        self.assertEqual(self.parser.query(contest='nonexistent'), ())
+
+    def test_query_objects(self):
+        contest = self.parser.get_contest("US Senator - REPUBLICAN")
+        jurisdiction = self.parser.get_result_jurisdiction("A105")
+        result = self.parser.query(contest=contest, choice=contest.choices[0],
+                                   jurisdiction=jurisdiction)
+        self.assertEqual(result, self._scan(contest='4', choice=contest.choices[0].key,
+                                            jurisdiction='A105'))
+
+    def test_query_uses_index(self):
+        index = self.parser.index
+        index.query(contest='4', vote_type='Election')
+        with mock.patch.object(index, '_keys', []):
+            # Repeating a combination of keys doesn't scan the results
+            self.assertEqual(index.query(contest='4', vote_type='Overvotes'),
+                             self._scan(contest='4', vote_type='Overvotes'))
+
+
+def two_contest_xml():
+    """
+    Return the precinct test data with a copy of its contest added
+    """
+    with open('tests/data/precinct.xml', 'rb') as f:
+        xml = f.read().decode('utf-8')
+
+    contest = xml[xml.index('<Contest'):xml.index('</Contest>') + len('</Contest>')]
+    copy = contest.replace('key="4" text="US Senator - REPUBLICAN"',
+                           'key="5" text="US Senator - COPY"')
+    return xml.replace('</ElectionResult>', copy + '\n</ElectionResult>')
+
+
+class TestParserFilters(unittest.TestCase):
+    def setUp(self):
+        self.xml = two_contest_xml().encode('utf-8')
+        self.full = Parser()
+        self.full.parse(self.xml)
+
+    def test_contests(self):
+        for criteria in ("5", "US Senator - COPY", ["5"], re.compile(r"COPY$")):
+            for stream in (False, True):
+                parser = Parser(stream=stream)
+                parser.parse(self.xml, contests=criteria)
+                self.assertEqual([c.key for c in parser.contests], ["5"])
+                self.assertEqual(list(parser.results),
+                                 self.full.get_contest("US Senator - COPY").results)
+
+        parser = Parser()
+        with mock.patch.object(Parser, '_parse_contest', autospec=True,
+                side_effect=Parser._parse_contest) as parse_contest:
+            parser.parse(self.xml, contests=["4", re.compile("nothing")])
+        self.assertEqual(parse_contest.call_count, 1)
+        self.assertEqual([c.key for c in parser.contests], ["4"])
+
+    def test_vote_types(self):
+        parser = Parser()
+        parser.parse(self.xml, vote_types=re.compile("votes$"))
+        self.assertEqual(set(r.vote_type for r in parser.results),
+                         set(["Undervotes", "Overvotes"]))
+        self.assertEqual(len(parser.contests), 2)
+        self.assertEqual([r for r in parser.results if r.choice is None],
+                         [r for r in self.full.results if r.choice is None])
+
+    def test_levels(self):
+        parser = Parser()
+        parser.parse(self.xml, levels=[])
+        self.assertEqual(len(parser.result_jurisdictions), 33)
+        self.assertTrue(parser.results)
+        self.assertTrue(all(r.jurisdiction is None for r in parser.results))
+
+        parser = Parser()
+        parser.parse(self.xml, levels=["precinct"])
+        self.assertEqual(parser.results, self.full.results)
+
+        # A single level isn't split into characters
+        parser = Parser()
+        parser.parse(self.xml, levels="precinct")
+        self.assertEqual(parser.results, self.full.results)
+
+    def test_iter_results(self):
+        records = list(Parser().iter_results(self.xml, contests="5",
+            vote_types="Election", levels=()))
+        self.assertEqual(records, [
+            result_to_record(r) for r in self.full.get_contest("US Senator - COPY").results
+            if r.vote_type == "Election" and r.jurisdiction is None])
+
+
+class TestParserDiff(unittest.TestCase):
+    def setUp(self):
+        # Include a second contest, so there's one that doesn't change
+        self.xml = two_contest_xml()
+
+    def _parse(self, xml, track_changes=True):
+        parser = Parser(track_changes=track_changes)
+        parser.parse(xml.encode('utf-8'))
+        return parser
+
+    def test_diff(self):
+        previous = self._parse(self.xml)
+        updated_xml = (self.xml
+            .replace('<Precinct name="A105" totalVoters="0" ballotsCast="171"',
+                     '<Precinct name="A105" totalVoters="0" ballotsCast="172"')
+            .replace('<Choice key="1" text="Matt BEVIN" totalVotes="820">',
+                     '<Choice key="1" text="Matt BEVIN" totalVotes="821">', 1)
+            .replace('<Precinct name="A105" votes="16" />',
+                     '<Precinct name="A105" votes="17" />', 1))
+        current = self._parse(updated_xml)
+
+        with mock.patch.object(Parser, '_diff_contest', autospec=True,
+                side_effect=Parser._diff_contest) as diff_contest:
+            diff = current.diff(previous)
+        # The unchanged contest was skipped
+        self.assertEqual(diff_contest.call_count, 1)
+
+        self.assertFalse(diff.is_empty())
+        self.assertEqual(diff.contests, [])
+        self.assertEqual([c.key for c in diff.jurisdictions], ['A105'])
+        self.assertEqual(diff.jurisdictions[0].previous.ballots_cast, 171)
+        self.assertEqual(diff.jurisdictions[0].current.ballots_cast, 172)
+        self.assertEqual([c.key for c in diff.choices], [('4', '1')])
+        self.assertEqual(diff.choices[0].current.total_votes, 821)
+        self.assertEqual([tuple(c) for c in diff.results],
+                         [(('4', '1', 'Election', 'A105'), 16, 17)])
+
+    def test_diff_untracked(self):
+        previous = self._parse(self.xml, track_changes=False)
+        updated_xml = self.xml.replace('<Precinct name="A105" votes="16" />',
+                                       '<Precinct name="A105" votes="17" />', 1)
+        current = self._parse(updated_xml, track_changes=False)
+
+        with mock.patch.object(Parser, '_digest', autospec=True) as digest:
+            with mock.patch.object(Parser, '_diff_contest', autospec=True,
+                    side_effect=Parser._diff_contest) as diff_contest:
+                diff = current.diff(previous)
+        # Without fingerprints, every contest is compared
+        self.assertEqual(diff_contest.call_count, 2)
+        self.assertEqual(digest.call_count, 0)
+        self.assertEqual([tuple(c) for c in diff.results],
+                         [(('4', '1', 'Election', 'A105'), 16, 17)])
+
+    def test_diff_unchanged(self):
+        self.assertTrue(self._parse(self.xml).diff(self._parse(self.xml)).is_empty())
+
+    def test_diff_added_contest(self):
+        previous = self._parse(self.xml)
+        current = Parser()
+        current.parse('tests/data/precinct.xml')
+
+        diff = previous.diff(current)
+        self.assertEqual([c.key for c in diff.contests], ['5'])
+        self.assertIsNone(diff.contests[0].previous)
+        self.assertEqual(len(diff.results), len(previous.get_contest("US Senator - COPY").results))
+        self.assertTrue(all(c.previous is None for c in diff.results))
+
+        diff = current.diff(previous)
+        self.assertIsNone(diff.contests[0].current)
+        self.assertTrue(all(c.current is None for c in diff.choices))
+
 
 class TestCountyParser(unittest.TestCase):
 
@@ -138,3 +536,43 @@ class TestCountyParser(unittest.TestCase):
         self.assertEqual(contest_choice.party, "REP")
         self.assertEqual(contest_choice.total_votes, 477734)
 
+    def test_parse_stream(self):
+        er = Parser()
+        er.parse('tests/data/county.xml')
+
+        streaming = Parser(stream=True)
+        streaming.parse('tests/data/county.xml')
+
+        self.assertEqual(streaming.total_voters, er.total_voters)
+        self.assertEqual(streaming.result_jurisdictions, er.result_jurisdictions)
+        self.assertEqual(streaming.contests, er.contests)
+        self.assertEqual(streaming.results, er.results)
+
+    def test_fast_backend(self):
+        er = Parser()
+        er.parse('tests/data/county.xml')
+
+        for options in ({}, {'stream': True}, {'lean': True}):
+            fast = Parser(backend='fast', **options)
+            fast.parse('tests/data/county.xml')
+            self.assertEqual(fast.contests, er.contests)
+            self.assertEqual(fast.results, er.results)
+            self.assertEqual(fast.result_jurisdictions, er.result_jurisdictions)
+
+        self.assertEqual(list(Parser(backend='fast').iter_results('tests/data/county.xml')),
+                         list(Parser().iter_results('tests/data/county.xml')))
+
+    def test_iter_results(self):
+        er = Parser()
+        er.parse('tests/data/county.xml')
+
+        parser = Parser()
+        records = list(parser.iter_results('tests/data/county.xml'))
+
+        self.assertEqual(parser.region, "AR")
+        self.assertEqual(parser.contests, [])
+        self.assertEqual(records, [result_to_record(r) for r in er.results])
+        record = next(r for r in records if r.jurisdiction_name == 'Arkansas')
+        self.assertEqual(record.jurisdiction_level, 'county')
+        self.assertEqual(record.choice_party, 'REP')
+
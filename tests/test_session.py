@@ -0,0 +1,105 @@
+import unittest
+
+import requests
+import responses
+
+from clarify import session as clarify_session
+from clarify.jurisdiction import Jurisdiction
+from clarify.session import (ClaritySession, get_default_session, make_session,
+    set_default_session, RETRY_STATUSES)
+
+SUMMARY_URL = 'https://results.enr.clarityelections.com/KY/50972/131636/en/summary.html'
+SUMMARY_ZIP_URL = 'https://results.enr.clarityelections.com/KY/50972/131636/reports/summary.zip'
+
+
+class CountingSession(requests.Session):
+    """Session that records the URLs it requested"""
+    def __init__(self):
+        super(CountingSession, self).__init__()
+        self.urls = []
+
+    def request(self, method, url, **kwargs):
+        self.urls.append(url)
+        return super(CountingSession, self).request(method, url, **kwargs)
+
+
+class TestMakeSession(unittest.TestCase):
+    def test_adapter(self):
+        session = make_session(pool_size=25, retries=5)
+        self.assertIsInstance(session, ClaritySession)
+        adapter = session.get_adapter('https://results.enr.clarityelections.com/')
+        self.assertIs(adapter, session.get_adapter('http://results.enr.clarityelections.com/'))
+        self.assertEqual(adapter._pool_maxsize, 25)
+        self.assertEqual(adapter.max_retries.total, 5)
+        self.assertEqual(tuple(adapter.max_retries.status_forcelist), RETRY_STATUSES)
+
+    @responses.activate
+    def test_default_timeout(self):
+        responses.add(responses.GET, SUMMARY_ZIP_URL, status=200)
+        session = make_session(timeout=7)
+        session.get(SUMMARY_ZIP_URL)
+        session.get(SUMMARY_ZIP_URL, timeout=2)
+        self.assertEqual([call.request.req_kwargs['timeout'] for call in responses.calls],
+                         [7, 2])
+
+
+class TestDefaultSession(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(set_default_session, clarify_session._default_session)
+
+    def test_shared(self):
+        set_default_session(None)
+        session = get_default_session()
+        self.assertIsInstance(session, ClaritySession)
+        self.assertIs(get_default_session(), session)
+
+    @responses.activate
+    def test_jurisdiction_uses_default(self):
+        responses.add(responses.HEAD, SUMMARY_ZIP_URL, status=200)
+        session = CountingSession()
+        set_default_session(session)
+        jurisdiction = Jurisdiction(url=SUMMARY_URL, level='state')
+        self.assertIs(jurisdiction.session, session)
+        self.assertEqual(jurisdiction.summary_url, SUMMARY_ZIP_URL)
+        self.assertEqual(session.urls, [SUMMARY_ZIP_URL])
+
+
+class TestJurisdictionSession(unittest.TestCase):
+    @responses.activate
+    def test_injected_session(self):
+        responses.add(responses.HEAD, SUMMARY_ZIP_URL, status=200)
+        responses.add(responses.HEAD,
+            'https://results.enr.clarityelections.com/KY/50972/131636/reports/detailxml.zip',
+            status=200)
+        responses.add(responses.GET,
+            'https://results.enr.clarityelections.com/KY/50972/current_ver.txt',
+            body='131636')
+
+        session = CountingSession()
+        jurisdiction = Jurisdiction(url=SUMMARY_URL, level='state', session=session)
+        self.assertEqual(jurisdiction.summary_url, SUMMARY_ZIP_URL)
+        self.assertIsNotNone(jurisdiction.report_url('xml'))
+        self.assertEqual(Jurisdiction.get_current_ver(
+            'https://results.enr.clarityelections.com/KY/50972/', session=session), '131636')
+        self.assertEqual(len(session.urls), 3)
+
+    @responses.activate
+    def test_subjurisdictions_share_session(self):
+        url = 'https://results.enr.clarityelections.com/AR/53237/149294/Web01/en/summary.html'
+        responses.add(responses.GET, url.replace('summary.html', 'json/electionsettings.json'),
+            json={'settings': {'electiondetails': {'participatingcounties': [
+                'Arkansas|53238|149295|11/05/2014 10:32:37 AM|',
+                'Ashley|53239|149296|11/05/2014 10:32:37 AM|',
+            ]}}})
+        responses.add(responses.HEAD,
+            'https://results.enr.clarityelections.com/AR/Ashley/53239/149296/reports/summary.zip',
+            status=404)
+
+        session = CountingSession()
+        jurisdiction = Jurisdiction(url=url, level='state', session=session)
+        subjurisdictions = jurisdiction.get_subjurisdictions()
+        self.assertEqual([j.name for j in subjurisdictions], ['Arkansas', 'Ashley'])
+        for j in subjurisdictions:
+            self.assertIs(j.session, session)
+        self.assertIsNone(subjurisdictions[1].summary_url)
+        self.assertEqual(len(session.urls), 2)
@@ -0,0 +1,150 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from clarify.parser import Parser
+from clarify.snapshots import SnapshotStore
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+
+
+def parse_version(replacements=()):
+    """Parse the precinct fixture, with some of its values changed"""
+    with open(PRECINCT_XML_PATH, 'rb') as f:
+        xml = f.read()
+    for old, new in replacements:
+        assert old in xml
+        xml = xml.replace(old, new, 1)
+    parser = Parser()
+    parser.parse(io.BytesIO(xml))
+    return parser
+
+
+FIRST = ()
+SECOND = (
+    (b'8:19:21 PM', b'8:49:21 PM'),
+    (b'<Choice key="1" text="Matt BEVIN" totalVotes="820">\n'
+     b'            <VoteType name="Election" votes="820">\n'
+     b'                <Precinct name="AB" votes="29" />',
+     b'<Choice key="1" text="Matt BEVIN" totalVotes="830">\n'
+     b'            <VoteType name="Election" votes="830">\n'
+     b'                <Precinct name="AB" votes="39" />'),
+)
+REMOVED = (
+    (b'8:19:21 PM', b'9:19:21 PM'),
+    (b'<Choice key="2" text="Brad COPAS" totalVotes="11">\n'
+     b'            <VoteType name="Election" votes="11">\n'
+     b'                <Precinct name="AB" votes="0" />',
+     b'<Choice key="2" text="Brad COPAS" totalVotes="11">\n'
+     b'            <VoteType name="Election" votes="11">'),
+)
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.snapshots')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _store_versions(self):
+        store = SnapshotStore(self.path)
+        self.assertTrue(store.append(parse_version(FIRST), version='1'))
+        self.assertTrue(store.append(parse_version(SECOND), version='2'))
+        return store
+
+    def test_series(self):
+        store = self._store_versions()
+        first, second = store.snapshots
+        self.assertEqual(first.version, '1')
+        self.assertEqual(second.version, '2')
+        self.assertEqual((second.timestamp - first.timestamp).seconds, 30 * 60)
+
+        self.assertEqual([p.value for p in store.choice_series('4', '1')], [820, 830])
+        self.assertEqual([p.value for p in store.choice_series('4', '3')], [1135, 1135])
+        self.assertEqual([p.value for p in store.result_series('4', '1', 'Election', 'AB')],
+                         [29, 39])
+        self.assertEqual([p.value for p in store.result_series('4', '1', 'Election')],
+                         [820, 830])
+        self.assertEqual([p.value for p in store.contest_series('4', 'precincts_reported')],
+                         [32, 32])
+        self.assertEqual([p.value for p in store.jurisdiction_series('AB', 'ballots_cast')],
+                         [203, 203])
+        self.assertEqual([p.value for p in store.choice_series('4', 'missing')],
+                         [None, None])
+
+    def test_reopen(self):
+        expected = self._store_versions()
+        store = SnapshotStore(self.path)
+        self.assertEqual(store.snapshots, expected.snapshots)
+        self.assertEqual(store.result_series('4', '1', 'Election', 'AB'),
+                         expected.result_series('4', '1', 'Election', 'AB'))
+
+        self.assertTrue(store.append(parse_version(FIRST), version='3'))
+        self.assertEqual([p.value for p in store.choice_series('4', '1')], [820, 830, 820])
+        self.assertEqual(len(SnapshotStore(self.path)), 3)
+
+    def test_deduplicates_unchanged_values(self):
+        store = SnapshotStore(self.path)
+        store.append(parse_version(FIRST), version='1')
+        size = os.path.getsize(self.path)
+        store.append(parse_version(SECOND), version='2')
+        self.assertLess(os.path.getsize(self.path) - size, size / 5)
+
+    def test_append_duplicate(self):
+        store = self._store_versions()
+        self.assertFalse(store.append(parse_version(SECOND), version='2'))
+        self.assertEqual(len(store), 2)
+        self.assertEqual(len(SnapshotStore(self.path)), 2)
+
+    def test_concurrent_stores(self):
+        first = SnapshotStore(self.path)
+        first.append(parse_version(FIRST), version='1')
+        second = SnapshotStore(self.path)
+        first.append(parse_version(SECOND), version='2')
+
+        # The snapshot appended by the other store is read before appending
+        self.assertTrue(second.append(parse_version(FIRST), version='3'))
+        self.assertEqual([s.version for s in second.snapshots], ['1', '2', '3'])
+        for store in (second, SnapshotStore(self.path)):
+            self.assertEqual(
+                [p.value for p in store.result_series('4', '1', 'Election', 'AB')],
+                [29, 39, 29])
+
+    def test_truncated_record(self):
+        self._store_versions()
+        with open(self.path, 'ab') as f:
+            f.write(b'\x00\x00\x01\x00partial')
+        store = SnapshotStore(self.path)
+        self.assertEqual(len(store), 2)
+
+        # The partial record is overwritten by the next one
+        self.assertTrue(store.append(parse_version(FIRST), version='3'))
+        store = SnapshotStore(self.path)
+        self.assertEqual([s.version for s in store.snapshots], ['1', '2', '3'])
+        self.assertEqual([p.value for p in store.choice_series('4', '1')], [820, 830, 820])
+
+    def test_truncated_header(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\x00\x00')
+        store = SnapshotStore(self.path)
+        self.assertEqual(len(store), 0)
+        self.assertTrue(store.append(parse_version(FIRST), version='1'))
+        self.assertEqual(len(SnapshotStore(self.path)), 1)
+
+    def test_removed_values(self):
+        store = SnapshotStore(self.path)
+        store.append(parse_version(FIRST), version='1')
+        store.append(parse_version(REMOVED), version='2')
+        store.append(parse_version(FIRST), version='3')
+        self.assertEqual([p.value for p in store.result_series('4', '2', 'Election', 'AB')],
+                         [0, None, 0])
+
+    def test_missing_store(self):
+        store = SnapshotStore(self.path)
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.snapshots, [])
+        self.assertFalse(os.path.exists(self.path))
@@ -0,0 +1,102 @@
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from clarify.parser import Parser
+from clarify.sources import BufferReader, open_report
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+
+
+def zip_bytes(path, arcname='detail.xml'):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('readme.txt', 'Not the report')
+        archive.write(path, arcname)
+    return buf.getvalue()
+
+
+class TestOpenReport(unittest.TestCase):
+    def setUp(self):
+        self.expected = Parser()
+        self.expected.parse(PRECINCT_XML_PATH)
+        with open(PRECINCT_XML_PATH, 'rb') as f:
+            self.xml = f.read()
+        self.zipped = zip_bytes(PRECINCT_XML_PATH)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def assertParsesAsExpected(self, source, **kwargs):
+        parser = Parser(**kwargs)
+        parser.parse(source)
+        self.assertEqual(parser.timestamp, self.expected.timestamp)
+        self.assertEqual(parser.results, self.expected.results)
+
+    def test_zip_path(self):
+        path = os.path.join(self.tmpdir, 'detailxml.zip')
+        with open(path, 'wb') as f:
+            f.write(self.zipped)
+
+        self.assertParsesAsExpected(path)
+        self.assertParsesAsExpected(path, stream=True)
+
+    def test_bytes(self):
+        self.assertParsesAsExpected(self.xml)
+        self.assertParsesAsExpected(self.zipped)
+        self.assertParsesAsExpected(bytearray(self.zipped), stream=True)
+
+    def test_memoryview(self):
+        self.assertParsesAsExpected(memoryview(self.xml))
+        self.assertParsesAsExpected(memoryview(self.zipped), stream=True)
+
+    def test_mmap(self):
+        path = os.path.join(self.tmpdir, 'detailxml.zip')
+        with open(path, 'wb') as f:
+            f.write(self.zipped)
+
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                self.assertParsesAsExpected(mapped)
+                self.assertEqual(len(list(Parser().iter_results(mapped))),
+                                 len(self.expected.results))
+            finally:
+                # This fails if a view of the map is still held
+                mapped.close()
+
+    def test_file_like(self):
+        self.assertParsesAsExpected(io.BytesIO(self.zipped))
+        self.assertParsesAsExpected(io.BytesIO(self.xml), stream=True)
+
+    def test_missing_member(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as archive:
+            archive.writestr('detail.txt', 'Not XML')
+
+        with self.assertRaises(ValueError):
+            with open_report(buf.getvalue()):
+                pass
+
+
+class TestBufferReader(unittest.TestCase):
+    def test_read_seek(self):
+        reader = BufferReader(memoryview(b'0123456789'))
+        self.assertEqual(reader.read(3), b'012')
+        self.assertEqual(reader.tell(), 3)
+        reader.seek(-2, io.SEEK_END)
+        self.assertEqual(reader.read(), b'89')
+        self.assertEqual(reader.read(1), b'')
+        reader.seek(1)
+        buf = bytearray(4)
+        self.assertEqual(reader.readinto(buf), 4)
+        self.assertEqual(bytes(buf), b'1234')
+
+
+if __name__ == '__main__':
+    unittest.main()
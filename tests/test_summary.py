@@ -0,0 +1,89 @@
+import io
+import re
+import unittest
+import zipfile
+
+from clarify.parser import Parser
+from clarify.summary import SummaryParser
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+SUMMARY_CSV_PATH = 'tests/data/summary.csv'
+
+
+def zip_summary():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.write(SUMMARY_CSV_PATH, 'summary.csv')
+    return buf.getvalue()
+
+
+class TestSummaryParser(unittest.TestCase):
+    def test_parse(self):
+        summary = SummaryParser()
+        summary.parse(SUMMARY_CSV_PATH)
+
+        self.assertEqual(summary.total_voters, 28162)
+        self.assertEqual(summary.ballots_cast, 5926)
+        self.assertEqual(summary.voter_turnout, 21.04)
+        self.assertEqual([c.text for c in summary.contests],
+                         ['US Senator - REPUBLICAN', 'US Senator - DEMOCRATIC'])
+
+        contest = summary.get_contest('US Senator - DEMOCRATIC')
+        self.assertIsNone(contest.key)
+        self.assertEqual(contest.precincts_participating, 32)
+        self.assertEqual(contest.precincts_reported, 30)
+        self.assertEqual(len(contest.choices), 4)
+        choice = contest.choices[1]
+        self.assertEqual(choice.text, 'Alison Lundergan GRIMES')
+        self.assertEqual(choice.party, 'DEM')
+        self.assertEqual(choice.total_votes, 2389)
+        self.assertIs(choice.contest, contest)
+        self.assertEqual([(r.vote_type, r.votes) for r in contest.results],
+                         [('Undervotes', 117), ('Overvotes', 1)])
+        self.assertEqual(len(summary.results), 4)
+
+    def test_totals_match_detail(self):
+        detail = Parser()
+        detail.parse(PRECINCT_XML_PATH)
+        summary = SummaryParser()
+        summary.parse(SUMMARY_CSV_PATH)
+
+        self.assertEqual(summary.total_voters, detail.total_voters)
+        self.assertEqual(summary.ballots_cast, detail.ballots_cast)
+        for contest in detail.contests:
+            summary_contest = summary.get_contest(contest.text)
+            self.assertEqual([(c.text, c.party, c.total_votes) for c in summary_contest.choices],
+                             [(c.text, c.party, c.total_votes) for c in contest.choices])
+            self.assertEqual(
+                [(r.vote_type, r.votes) for r in summary_contest.results],
+                [(r.vote_type, r.votes) for r in contest.results
+                 if r.choice is None and r.jurisdiction is None])
+
+    def test_parse_zip(self):
+        expected = SummaryParser()
+        expected.parse(SUMMARY_CSV_PATH)
+
+        for source in (zip_summary(), io.BytesIO(zip_summary())):
+            summary = SummaryParser()
+            summary.parse(source)
+            self.assertEqual([tuple(c) for c in summary.contests],
+                             [tuple(c) for c in expected.contests])
+            self.assertEqual([tuple(c.choices[0]) for c in summary.contests],
+                             [tuple(c.choices[0]) for c in expected.contests])
+
+    def test_parse_file_object(self):
+        with open(SUMMARY_CSV_PATH, 'rb') as f:
+            summary = SummaryParser()
+            summary.parse(f)
+            self.assertFalse(f.closed)
+        self.assertEqual(len(summary.contests), 2)
+
+    def test_contests_filter(self):
+        summary = SummaryParser()
+        summary.parse(SUMMARY_CSV_PATH, contests=re.compile('DEMOCRATIC'))
+        self.assertEqual([c.text for c in summary.contests], ['US Senator - DEMOCRATIC'])
+
+    def test_missing_columns(self):
+        summary = SummaryParser()
+        with self.assertRaises(ValueError):
+            summary.parse(io.BytesIO(b'line number,contest name\n1,Contest\n'))
@@ -0,0 +1,203 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from clarify.parser import Parser
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestResultTable(unittest.TestCase):
+    def test_parse_table_precinct(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+
+        parser = Parser()
+        table = parser.parse_table('tests/data/precinct.xml')
+
+        self.assertEqual(parser.region, "Greenup")
+        self.assertEqual(len(parser.result_jurisdictions), 33)
+        self.assertEqual(len(table), len(er.results))
+        self.assertEqual(table.votes.tolist(), [r.votes for r in er.results])
+        self.assertEqual([table.vote_types[c] for c in table.vote_type],
+                         [r.vote_type for r in er.results])
+        self.assertEqual(
+            [table.jurisdictions[c].name if c >= 0 else None for c in table.jurisdiction],
+            [r.jurisdiction.name if r.jurisdiction else None for r in er.results])
+        self.assertEqual(
+            [table.choices[c].text if c >= 0 else None for c in table.choice],
+            [r.choice.text if r.choice else None for r in er.results])
+
+        contest = table.contest_code("US Senator - REPUBLICAN")
+        self.assertEqual(table.contests[contest].key, "4")
+        self.assertEqual(len(table.for_contest(contest)), len(table))
+
+        choice = table.choices[0]
+        self.assertEqual(choice.text, "Matt BEVIN")
+        self.assertEqual(choice.total_votes, 820)
+
+    def test_matrix(self):
+        er = Parser()
+        er.parse('tests/data/precinct.xml')
+        table = Parser().parse_table('tests/data/precinct.xml')
+
+        contest = table.contest_code("US Senator - REPUBLICAN")
+        matrix = table.matrix(contest)
+
+        num_choices = len(er.get_contest("US Senator - REPUBLICAN").choices)
+        self.assertEqual(matrix.votes.shape,
+                         (num_choices, len(table.jurisdictions), len(matrix.vote_types)))
+        self.assertTrue(np.shares_memory(matrix.votes, table.votes))
+
+        result = next(r for r in er.results
+                      if r.choice is not None and r.jurisdiction is not None
+                      and r.jurisdiction.name == 'A105')
+        choice_pos = list(matrix.choices).index(
+            next(i for i, c in enumerate(table.choices) if c.key == result.choice.key))
+        vote_type_pos = list(matrix.vote_types).index(table.vote_type_code(result.vote_type))
+        self.assertEqual(
+            matrix.votes[choice_pos, table.jurisdiction_code('A105'), vote_type_pos],
+            result.votes)
+
+        # Dropping a row makes the layout irregular, so a copy is returned
+        irregular = table.select(np.arange(len(table)) != len(table) - 1)
+        copied = irregular.matrix(contest)
+        self.assertFalse(np.shares_memory(copied.votes, irregular.votes))
+        self.assertEqual(copied.votes[choice_pos, table.jurisdiction_code('A105'), vote_type_pos],
+                         result.votes)
+        self.assertEqual(copied.votes.sum(), matrix.votes.sum() - table.votes[-1])
+
+    def test_labels(self):
+        table = Parser().parse_table('tests/data/precinct.xml')
+        self.assertEqual(table.labels('contest'), [c.text for c in table.contests])
+        self.assertEqual(table.labels('choice')[0], "Matt BEVIN")
+        self.assertEqual(table.labels('jurisdiction'), [j.name for j in table.jurisdictions])
+        self.assertIs(table.labels('vote_type'), table.vote_types)
+        with self.assertRaises(ValueError):
+            table.labels('votes')
+
+    def test_parse_table_filters(self):
+        table = Parser().parse_table('tests/data/county.xml', contests="100",
+            vote_types=["Absentee"], levels=[])
+        self.assertEqual(len(table.jurisdictions), 75)
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.vote_types, ["Absentee"])
+
+        table = Parser().parse_table('tests/data/county.xml', contests="nothing")
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.contests, [])
+
+    def test_parse_table_county(self):
+        er = Parser()
+        er.parse('tests/data/county.xml')
+        table = Parser().parse_table('tests/data/county.xml')
+
+        self.assertEqual(len(table), len(er.results))
+        self.assertEqual(int(table.votes.sum()), sum(r.votes for r in er.results))
+        arkansas = table.jurisdiction_code('Arkansas')
+        self.assertEqual(table.jurisdictions[arkansas].level, 'county')
+        self.assertEqual(table.jurisdictions[arkansas].ballots_cast, 5137)
+
+        totals = table.select(table.jurisdiction == -1)
+        self.assertEqual(int(totals.votes.sum()),
+                         sum(r.votes for r in er.results if r.jurisdiction is None))
+
+        matrix = table.matrix(0)
+        self.assertEqual(matrix.votes.shape, (1, 75, 4))
+        self.assertEqual(int(matrix.votes.sum()),
+                         sum(r.votes for r in er.results if r.jurisdiction is not None))
+
+
+    def test_parse_table_fast_backend(self):
+        for path in ('tests/data/precinct.xml', 'tests/data/county.xml'):
+            table = Parser().parse_table(path)
+            fast = Parser(backend='fast').parse_table(path)
+            for column in ('votes', 'contest', 'choice', 'jurisdiction', 'vote_type'):
+                self.assertEqual(getattr(fast, column).tolist(),
+                                 getattr(table, column).tolist())
+            self.assertEqual(fast.choices, table.choices)
+            self.assertEqual(fast.jurisdictions, table.jurisdictions)
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def result_rows(parser):
+    """Build rows from the parser's results in a loop, to check exports against"""
+    return [(r.contest.text,
+             r.choice.text if r.choice is not None else None,
+             r.choice.party if r.choice is not None else None,
+             r.vote_type,
+             r.jurisdiction.name if r.jurisdiction is not None else None,
+             r.votes)
+            for r in parser.results]
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestExports(unittest.TestCase):
+    def setUp(self):
+        self.parser = Parser()
+        self.parser.parse('tests/data/county.xml')
+
+    def test_from_parser(self):
+        table = self.parser.to_table()
+        expected = Parser().parse_table('tests/data/county.xml')
+        for column in ('votes', 'contest', 'choice', 'jurisdiction', 'vote_type'):
+            self.assertEqual(getattr(table, column).tolist(),
+                             getattr(expected, column).tolist())
+        self.assertEqual(table.contests, expected.contests)
+        self.assertEqual(table.choices, expected.choices)
+        self.assertEqual(table.jurisdictions, expected.jurisdictions)
+        self.assertEqual(table.vote_types, expected.vote_types)
+
+    @unittest.skipIf(pd is None, "pandas is not installed")
+    def test_to_dataframe(self):
+        df = self.parser.to_dataframe()
+        self.assertEqual(list(df.columns),
+                         ['contest', 'choice', 'party', 'vote_type', 'jurisdiction', 'votes'])
+        for column in ('contest', 'choice', 'party', 'vote_type', 'jurisdiction'):
+            self.assertEqual(str(df[column].dtype), 'category')
+        rows = [tuple(None if pd.isna(v) else v for v in row)
+                for row in df.itertuples(index=False)]
+        self.assertEqual(rows, result_rows(self.parser))
+
+    @unittest.skipIf(pd is None, "pandas is not installed")
+    def test_to_dataframe_shares_votes(self):
+        table = Parser().parse_table('tests/data/precinct.xml')
+        df = table.to_dataframe()
+        self.assertTrue(np.shares_memory(df['votes'].values, table.votes))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_to_arrow(self):
+        arrow = self.parser.to_arrow()
+        self.assertEqual(arrow.column_names,
+                         ['contest', 'choice', 'party', 'vote_type', 'jurisdiction', 'votes'])
+        self.assertTrue(pa.types.is_dictionary(arrow.schema.field('choice').type))
+        columns = arrow.to_pydict()
+        rows = list(zip(*[columns[name] for name in arrow.column_names]))
+        self.assertEqual(rows, result_rows(self.parser))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_to_arrow_repeated_labels(self):
+        # Choice text repeats across contests, such as "Yes" and "No"
+        table = Parser().parse_table('tests/data/precinct.xml')
+        table.choices[1] = table.choices[1]._replace(text=table.choices[0].text)
+        arrow = table.to_arrow()
+        choices = arrow.column('choice').combine_chunks()
+        self.assertEqual(choices.dictionary.to_pylist().count(table.choices[0].text), 1)
+        self.assertEqual(choices.to_pylist(),
+                         [table.choices[c].text if c >= 0 else None
+                          for c in table.choice.tolist()])
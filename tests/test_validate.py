@@ -0,0 +1,64 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from clarify.parser import Parser
+
+if np is not None:
+    from clarify.validate import validate, Discrepancy
+
+PRECINCT_XML_PATH = 'tests/data/precinct.xml'
+COUNTY_XML_PATH = 'tests/data/county.xml'
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestValidate(unittest.TestCase):
+    def test_consistent(self):
+        report = validate(Parser().parse_table(PRECINCT_XML_PATH))
+        self.assertTrue(report.ok)
+        self.assertEqual(len(report), 0)
+        self.assertEqual(list(report), [])
+        self.assertEqual(report.checks['choice_totals'].checked, 5)
+        # Precincts in county reports have no total voters
+        self.assertEqual(report.checks['ballots_cast'].checked, 0)
+
+    def test_choice_totals(self):
+        # The fixture only includes some of the vote types of this choice
+        report = validate(Parser().parse_table(COUNTY_XML_PATH))
+        self.assertFalse(report.ok)
+        self.assertEqual(report.counts(), {'choice_totals': 1, 'vote_type_totals': 0,
+                                           'ballots_cast': 0})
+        self.assertEqual(list(report), [
+            Discrepancy('choice_totals', 'U.S. Senate', 'Tom Cotton', None, None,
+                        477734, 248263 + 200430 + 13319 + 111),
+        ])
+
+    def test_vote_type_totals(self):
+        table = Parser().parse_table(PRECINCT_XML_PATH)
+        overvotes = table.vote_type_code('Overvotes')
+        row = np.flatnonzero((table.vote_type == overvotes) & (table.jurisdiction >= 0))[0]
+        table.votes[row] += 3
+
+        report = validate(table, checks=['vote_type_totals'])
+        self.assertEqual(list(report.checks), ['vote_type_totals'])
+        self.assertEqual(list(report), [
+            Discrepancy('vote_type_totals', 'US Senator - REPUBLICAN', None, None,
+                        'Overvotes', 0, 3),
+        ])
+
+    def test_ballots_cast(self):
+        table = Parser().parse_table(COUNTY_XML_PATH)
+        table.jurisdictions[2] = table.jurisdictions[2]._replace(
+            ballots_cast=table.jurisdictions[2].total_voters + 1)
+
+        check = validate(table, checks=('ballots_cast',)).checks['ballots_cast']
+        self.assertEqual(check.checked, len(table.jurisdictions))
+        self.assertEqual(check.keys['jurisdiction'].tolist(), [2])
+        self.assertEqual(check.actual.tolist(), [check.expected[0] + 1])
+
+    def test_unknown_check(self):
+        table = Parser().parse_table(PRECINCT_XML_PATH)
+        self.assertRaises(ValueError, validate, table, checks=['precincts'])